@@ -0,0 +1,84 @@
+"""Benchmark: fresh httpx client per call vs the shared pooled LLM client.
+
+Runs call_llm against a local stub of the Messages API, so it measures only
+connection setup and HTTP overhead (no TLS here — real savings against
+api.anthropic.com are larger because every fresh client also pays a TLS
+handshake).
+
+Usage: python -m benchmarks.llm_client [calls]
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from src.skill_runtime.llm import call_llm, close_client
+
+RESPONSE = json.dumps({"content": [{"type": "text", "text": "ok"}]}).encode()
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Minimal HTTP/1.1 keep-alive server answering every request with RESPONSE."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                b"content-length: " + str(len(RESPONSE)).encode() + b"\r\n\r\n" + RESPONSE
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _timed(calls: int, fresh_client: bool) -> list[float]:
+    timings: list[float] = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        if fresh_client:
+            async with httpx.AsyncClient() as client:
+                await call_llm("sys", "usr", client=client, max_retries=1)
+        else:
+            await call_llm("sys", "usr", max_retries=1)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> None:
+    print(f"{name:<18} p50={statistics.median(timings):6.2f} ms  "
+          f"mean={statistics.mean(timings):6.2f} ms  n={len(timings)}")
+
+
+async def main(calls: int = 200) -> None:
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("ANTHROPIC_API_KEY", "bench")
+
+    async with server:
+        fresh = await _timed(calls, fresh_client=True)
+        pooled = await _timed(calls, fresh_client=False)
+        await close_client()
+
+    _report("fresh client/call", fresh)
+    _report("pooled client", pooled)
+    saved = statistics.median(fresh) - statistics.median(pooled)
+    print(f"saved per call (p50): {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -5,6 +5,7 @@ Connects all components: Telegram bot -> Input -> Gateway -> Dispatcher -> Skill
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 import os
 import sys
@@ -21,25 +22,43 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "skills", "task-manag
 
 from src.input.detector import detect_type, MessageType
 from src.input.normalizer import normalize
+from src.input.video_stt import get_ffmpeg_pool
+from src.gateway.intent_cache import IntentCache
+from src.gateway.fast_path import FastPathClassifier
+from src.gateway.coalescer import MessageCoalescer, merge_texts
 from src.gateway.intent_parser import parse_intents
-from src.gateway.responder import send_response
-from src.skill_runtime.llm import call_llm
+from src.gateway.responder import send_streaming_response
+from src.gateway.send_queue import SendScheduler
+from src.skill_runtime.llm import (
+    LLMScheduler, Priority, SystemPrompt, call_llm, close_client as close_llm_client,
+    get_scheduler, set_scheduler, usage_stats,
+)
 from src.dispatcher import Dispatcher as OpenEchoDispatcher, SkillOutput, SkillInput
 from src.config_loader import load_skills
-from src.session import SessionState
-from src.queue import IntentQueue
+from src.session import CachedSessionState
+from src.log.incremental import IncrementalIndexer
+from src.log.raw import RawSessionLog
+from src.memory.index import MemoryIndex
+from src.queue import QueueManager
+from src.executor import KeyedExecutor
 from src.debug.telegram import DebugManager
-from src.debug.web import app as debug_app, broadcast_event
+from src.debug.web import app as debug_app, broadcast_event, register_stats
+from handler import close_client as close_todoist_client
 import uvicorn
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 # Global components (initialized in main())
-session: SessionState | None = None
+session: CachedSessionState | None = None
 dispatcher: OpenEchoDispatcher | None = None
 debug_mgr = DebugManager()
+intent_cache: IntentCache | None = None
+fast_path: FastPathClassifier | None = None
 bot_instance: Bot | None = None
+executor: KeyedExecutor | None = None
+coalescer: MessageCoalescer | None = None
+sender: SendScheduler | None = None
 
 
 async def _track(debug_events: list[dict], event: dict) -> None:
@@ -62,6 +81,12 @@ async def run_skill(skill_id: str, skill_input: SkillInput) -> SkillOutput:
             done=result.get("done", True),
         )
     if skill_id == "chatbot":
+        if os.getenv("STREAM_REPLIES", "0") == "1":
+            from skills.chatbot.handler import stream_reply
+            return SkillOutput(
+                type="complete", text="", done=True,
+                stream=stream_reply(skill_input.intent, context=skill_input.context),
+            )
         from skills.chatbot.handler import handle as chatbot_handle
         result = await chatbot_handle(skill_input.intent, context=skill_input.context)
         return SkillOutput(
@@ -98,20 +123,39 @@ async def cmd_debug(message: types.Message) -> None:
 
 @router.message()
 async def on_message(message: types.Message) -> None:
-    """Main message handler — full pipeline."""
+    """Main message handler — optionally coalesces rapid messages, then
+    runs the pipeline in the user's mailbox.
+
+    Messages of one user are processed strictly in order; different users
+    run in parallel up to the executor's worker cap. Returns only once the
+    message is accepted, so a full executor slows the handler down.
+    """
+    assert coalescer is not None
+    await coalescer.add(str(message.from_user.id), message)
+
+
+async def _submit_messages(user_id: str, messages: list[types.Message]) -> None:
+    """Coalescer flush callback: queue one pipeline run for the group."""
+    assert executor is not None
+    await executor.submit(user_id, lambda: _process_messages(messages))
+
+
+async def _process_messages(messages: list[types.Message]) -> None:
+    """Full pipeline for one message (or a coalesced group from one user)."""
     assert session is not None
     assert dispatcher is not None
     assert bot_instance is not None
 
+    message = messages[-1]
     user_id = str(message.from_user.id)
     chat_id = message.chat.id
     debug_events: list[dict] = []
 
     try:
-        # 1. Input: detect type + normalize
-        msg_type = detect_type(message)
-        normalized = normalize(message, msg_type)
-        text = normalized.text
+        # 1. Input: detect type + normalize (coalesced messages merge into one text)
+        msg_types = [detect_type(m) for m in messages]
+        msg_type = msg_types[-1]
+        text = merge_texts([normalize(m, t).text for m, t in zip(messages, msg_types)])
 
         if not text:
             await message.answer("Не удалось обработать сообщение. Попробуй текстом.")
@@ -122,7 +166,8 @@ async def on_message(message: types.Message) -> None:
         await _track(debug_events, {
             "msg_id": msg_id, "user_text": text[:80],
             "step": "input", "label": msg_type.value,
-            "detail": f"type={msg_type.value}",
+            "detail": f"type={msg_type.value}"
+                      + (f", coalesced={len(messages)}" if len(messages) > 1 else ""),
         })
 
         # 2. Gateway: read state
@@ -153,79 +198,79 @@ async def on_message(message: types.Message) -> None:
                 await _send_output(chat_id, output, debug_events, user_id)
                 return
 
-        # 4. Level 2: LLM intent parsing
-        async def _llm_call(system: str, user: str) -> str:
+        # 4. Level 1: deterministic fast path, Level 2: LLM intent parsing
+        async def _llm_call(system: SystemPrompt, user: str) -> str:
             return await call_llm(system, user, model="haiku", max_tokens=300)
 
-        skill_names = list(dispatcher._registry.keys())
-        parse_result = await parse_intents(text, llm_call=_llm_call, skill_names=skill_names)
+        fast = fast_path.classify(text) if fast_path and fast_path.mode != "off" else None
+        if fast and fast.single and fast_path.routes_directly:
+            fast_path.record_bypass()
+            parse_result = fast.to_parse_result(text)
+            source = f"fast {fast.confidence:.2f}"
+        else:
+            skill_names = list(dispatcher._registry.keys())
+            parse_result = await parse_intents(
+                text, llm_call=_llm_call, skill_names=skill_names, cache=intent_cache,
+            )
+            source = "cache" if parse_result.from_cache else "LLM"
+            if fast and not parse_result.from_cache:
+                fast_path.record_shadow(text, fast, parse_result)
 
         intents_summary = "; ".join(pi.text[:40] for pi in parse_result.intents)
         await _track(debug_events, {
-            "step": "gateway", "label": f"LLM({len(parse_result.intents)})",
+            "step": "gateway", "label": f"{source}({len(parse_result.intents)})",
             "detail": f"intents: {intents_summary}",
         })
 
         # 5. Queue parsed intents and dispatch
+        queue = dispatcher.queue_for(user_id)
         matched_skills = []
         for pi in parse_result.intents:
             skill_id = dispatcher.match_skill(pi.text, pi.skill_hint)
             if skill_id:
                 config = dispatcher._registry.get(skill_id)
                 pri = config.priority if config else 5
-                dispatcher._queue.add(pi.text, priority=pri, skill_hint=skill_id)
+                queue.add(pi.text, priority=pri, skill_hint=pi.skill_hint, skill_id=skill_id)
                 matched_skills.append(f"{skill_id}←{pi.skill_hint or 'trigger'}")
 
-        queue_size = dispatcher._queue.size()
+        queue_size = queue.size()
         await _track(debug_events, {
             "step": "queue", "label": f"×{queue_size}",
             "detail": f"matched: {', '.join(matched_skills)}" if matched_skills else "no matches",
         })
 
-        if dispatcher._queue.is_empty():
+        if queue.is_empty():
             # Fallback: chatbot handles everything unmatched
-            dispatcher._queue.add(text, priority=99, skill_hint="chatbot")
+            queue.add(text, priority=99, skill_hint="chatbot", skill_id="chatbot")
             await _track(debug_events, {
                 "step": "queue", "label": "×1",
                 "detail": "fallback → chatbot",
             })
 
-        # Dispatch all queued intents
-        output = await dispatcher.dispatch_next(user_id)
-        if output:
-            skill_state = await session.get(user_id)
-            skill_name = skill_state.get("active_skill", "?")
-            await _track(debug_events, {
-                "step": "dispatcher", "label": "dispatch",
-                "detail": f"→ {skill_name or 'done'}",
-            })
-            await _track(debug_events, {
-                "step": "skill", "label": skill_name or "skill",
-                "detail": f"output: {output.type}, done={output.done}",
-            })
-            await _track(debug_events, {
-                "step": "response", "label": "ответ",
-            })
-            await _send_output(chat_id, output, debug_events, user_id)
-
-            while output and output.done and not dispatcher._queue.is_empty():
-                output = await dispatcher.dispatch_next(user_id)
-                if output:
-                    chain_events: list[dict] = []
-                    chain_state = await session.get(user_id)
-                    chain_skill = chain_state.get("active_skill", "?")
-                    await _track(chain_events, {
-                        "step": "dispatcher", "label": "chain",
-                        "detail": f"→ {chain_skill or 'done'} (from queue)",
-                    })
-                    await _track(chain_events, {
-                        "step": "skill", "label": chain_skill or "skill",
-                        "detail": f"output: {output.type}, done={output.done}",
-                    })
-                    await _track(chain_events, {
-                        "step": "response", "label": "ответ",
-                    })
-                    await _send_output(chat_id, output, chain_events, user_id)
+        # Dispatch queued intents: independent ones run concurrently,
+        # responses go out in queue-priority order
+        events = debug_events
+        while not queue.is_empty():
+            outputs = await dispatcher.dispatch_batch(user_id)
+            for output in outputs:
+                skill_name = output.skill_id
+                label = "dispatch" if events is debug_events else "chain"
+                source = "" if events is debug_events else " (from queue)"
+                await _track(events, {
+                    "step": "dispatcher", "label": label,
+                    "detail": f"→ {skill_name or 'done'}{source}",
+                })
+                await _track(events, {
+                    "step": "skill", "label": skill_name or "skill",
+                    "detail": f"output: {output.type}, done={output.done}",
+                })
+                await _track(events, {
+                    "step": "response", "label": "ответ",
+                })
+                await _send_output(chat_id, output, events, user_id)
+                events = []
+            if not outputs or not all(o.done for o in outputs):
+                break
 
     except Exception as e:
         logger.exception("Error processing message")
@@ -233,25 +278,25 @@ async def on_message(message: types.Message) -> None:
 
 
 async def _send_output(chat_id: int, output: SkillOutput, debug_events: list[dict], user_id: str) -> None:
-    """Send skill output to user, with optional debug block."""
-    assert bot_instance is not None
-    if output.text:
-        await send_response(bot_instance, chat_id, output.text)
-    await _send_debug(chat_id, debug_events, user_id)
+    """Send skill output to user, with optional debug block (packed into one message if it fits)."""
+    assert sender is not None
+    if output.stream is not None:
+        output.text = await send_streaming_response(sender, chat_id, output.stream)
+        await sender.send(chat_id, _debug_block(debug_events, user_id))
+        return
+    await sender.send(chat_id, output.text, _debug_block(debug_events, user_id))
 
 
-async def _send_debug(chat_id: int, debug_events: list[dict], user_id: str) -> None:
-    """Send debug block if debug mode is on."""
-    assert bot_instance is not None
+def _debug_block(debug_events: list[dict], user_id: str) -> str:
+    """Debug block text if debug mode is on, else ""."""
     if debug_mgr.is_enabled(user_id) and debug_events:
-        block = debug_mgr.format_debug_block(debug_events)
-        if block:
-            await send_response(bot_instance, chat_id, block)
+        return debug_mgr.format_debug_block(debug_events) or ""
+    return ""
 
 
 async def main() -> None:
     """Initialize all components and start polling."""
-    global session, dispatcher, bot_instance
+    global session, dispatcher, bot_instance, intent_cache, fast_path, executor, coalescer, sender
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
 
@@ -262,25 +307,72 @@ async def main() -> None:
 
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
-    # Session state
-    session = SessionState(redis_url)
+    # Session state (local cache, invalidated via keyspace notifications)
+    session = CachedSessionState(redis_url)
+    await session.start_invalidation()
     logger.info("Redis session ready")
 
+    # LLM admission control (limits depend on the Anthropic API tier)
+    set_scheduler(LLMScheduler(
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        requests_per_min=float(os.getenv("LLM_REQUESTS_PER_MIN", "50")),
+        tokens_per_min=float(os.getenv("LLM_TOKENS_PER_MIN", "80000")),
+    ))
+
+    # Intent parse cache (memory tier + Redis tier shared across workers)
+    intent_cache = IntentCache(redis_url=redis_url)
+
     # Load skill configs
     skills = load_skills()
     logger.info(f"Loaded {len(skills)} skills: {list(skills.keys())}")
 
-    # Queue + Dispatcher
-    queue = IntentQueue()
-    dispatcher = OpenEchoDispatcher(skills, queue, session)
+    # Per-user queues + Dispatcher
+    queues = QueueManager()
+    dispatcher = OpenEchoDispatcher(skills, queues, session)
     dispatcher.set_skill_runner(run_skill)
+    fast_path = FastPathClassifier(
+        dispatcher.match_skill,
+        mode=os.getenv("FASTPATH_MODE", "shadow"),
+    )
+
+    # Per-user ordered, cross-user parallel message executor
+    executor = KeyedExecutor()
+    # Debouncing is opt-in (COALESCE_WINDOW_SEC > 0): it delays every message
+    coalescer = MessageCoalescer(window=float(os.getenv("COALESCE_WINDOW_SEC", "0")))
+    coalescer.set_flush_callback(_submit_messages)
+
+    # Background indexing of new session log tails into memory. A first boot
+    # starts existing logs at their end; index history in bulk with
+    # `python -m src.log.batch_indexer`, which stops where this picks up.
+    memory_index = MemoryIndex(os.getenv("MEMORY_DB", "memory.db"))
+    memory_index.connect()
+    log_indexer = IncrementalIndexer(
+        RawSessionLog(os.getenv("SESSION_LOG_DIR", "logs/sessions")),
+        memory_index,
+        functools.partial(call_llm, model="haiku", max_tokens=2000, priority=Priority.BACKGROUND),
+        interval=float(os.getenv("LOG_INDEX_INTERVAL_SEC", str(IncrementalIndexer.INTERVAL_SEC))),
+        seed_existing=True,
+    )
+    log_indexer.connect()
+    log_indexer.start()
 
     # Telegram bot
     bot_instance = Bot(token=token)
+    sender = SendScheduler(bot_instance)
     dp = AiogramDP()
     dp.include_router(router)
 
     # Debug web console
+    register_stats("llm", get_scheduler().stats)
+    register_stats("llm_usage", usage_stats)
+    register_stats("session_cache", session.stats)
+    register_stats("intent_cache", intent_cache.stats)
+    register_stats("fast_path", fast_path.stats)
+    register_stats("ffmpeg", get_ffmpeg_pool().stats)
+    register_stats("executor", executor.stats)
+    register_stats("coalescer", coalescer.stats)
+    register_stats("telegram_send", sender.stats)
+    register_stats("log_indexer", log_indexer.stats)
     uvi_config = uvicorn.Config(debug_app, host="0.0.0.0", port=8484, log_level="warning")
     uvi_server = uvicorn.Server(uvi_config)
     asyncio.create_task(uvi_server.serve())
@@ -290,6 +382,15 @@ async def main() -> None:
     try:
         await dp.start_polling(bot_instance)
     finally:
+        coalescer.close()
+        await log_indexer.stop()
+        log_indexer.close()
+        memory_index.close()
+        await executor.shutdown()
+        await sender.close()
+        await close_todoist_client()
+        await close_llm_client()
+        await intent_cache.close()
         await session.close()
 
 
@@ -1,14 +1,18 @@
 """OpenEcho Chatbot Skill — fallback handler.
 
 Answers any message that doesn't match other skills, using LLM (Haiku).
+stream_reply yields the answer incrementally for progressive sending.
 """
 from __future__ import annotations
 
+import logging
 import os
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
-from src.skill_runtime.llm import call_llm, LLMError
+from src.skill_runtime.llm import call_llm, cached_system, stream_llm, LLMError
+
+logger = logging.getLogger(__name__)
 
 # Load prompt once
 _prompt: str | None = None
@@ -22,11 +26,16 @@ def _get_prompt() -> str:
     return _prompt
 
 
+def _system() -> list[dict[str, Any]]:
+    """prompt.md never changes at runtime: send it as a prompt-cache breakpoint."""
+    return cached_system(_get_prompt())
+
+
 async def handle(intent: str, context: dict[str, Any] | None = None) -> dict[str, Any]:
     """Handle a chatbot message via LLM."""
     try:
         response = await call_llm(
-            system_prompt=_get_prompt(),
+            system_prompt=_system(),
             user_message=intent,
             model="haiku",
             max_tokens=1000,
@@ -43,3 +52,24 @@ async def handle(intent: str, context: dict[str, Any] | None = None) -> dict[str
             "text": f"Не удалось ответить: {e}",
             "done": True,
         }
+
+
+async def stream_reply(intent: str, context: dict[str, Any] | None = None) -> AsyncIterator[str]:
+    """Streaming variant of handle: yield answer text deltas."""
+    yielded = False
+    try:
+        async for delta in stream_llm(
+            system_prompt=_system(),
+            user_message=intent,
+            model="haiku",
+            max_tokens=1000,
+            temperature=0.5,
+        ):
+            yielded = True
+            yield delta
+    except LLMError as e:
+        if not yielded:
+            yield f"Не удалось ответить: {e}"
+        else:
+            logger.warning("Chatbot stream interrupted: %s", e)
+            yield "…"
@@ -1,16 +1,30 @@
 """OpenEcho Task Manager Skill — handler.
 
 CRUD operations for Todoist via REST API v1.
+All calls share one pooled httpx client (close_client() on shutdown).
+
+With TODOIST_MIRROR_SEC > 0, reads are served from a local mirror of tasks
+and projects per Todoist account, kept fresh with incremental sync tokens:
+a read resyncs only if the mirror is older than TODOIST_MIRROR_SEC seconds.
+"Today" is evaluated in the account's Todoist timezone, not the server's.
 """
 from __future__ import annotations
 
+import asyncio
+import json
 import os
+import time
+from datetime import date, datetime
 from typing import Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import httpx
 
 BASE_URL = "https://api.todoist.com/api/v1"
 
+_client: httpx.AsyncClient | None = None
+_mirrors: dict[str, "TodoistMirror"] = {}
+
 
 class TodoistError(Exception):
     """Todoist API error."""
@@ -27,6 +41,135 @@ def _headers() -> dict[str, str]:
     return {"Authorization": f"Bearer {_get_token()}"}
 
 
+def _get_client() -> httpx.AsyncClient:
+    """Shared client: keeps TLS connections to Todoist alive between calls."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _mirrors.clear()
+
+
+def _due_date(item: dict[str, Any]) -> str | None:
+    return item.get("due", {}).get("date") if item.get("due") else None
+
+
+class TodoistMirror:
+    """Local copy of one account's tasks and projects (Sync API)."""
+
+    RESOURCES = ["items", "projects", "user"]
+
+    def __init__(self, token: str, max_age: float) -> None:
+        self._token = token
+        self._max_age = max_age
+        self._sync_token = "*"
+        self._synced_at = 0.0
+        self._lock = asyncio.Lock()
+        self.tasks: dict[str, dict[str, Any]] = {}
+        self.projects: dict[str, dict[str, Any]] = {}
+        self.timezone = ""
+        self.syncs = 0
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() - self._synced_at < self._max_age
+
+    async def ensure_fresh(self) -> None:
+        """Resync if older than the freshness bound; concurrent readers share one sync."""
+        if self.fresh:
+            return
+        async with self._lock:
+            if not self.fresh:
+                await self.sync()
+
+    async def sync(self) -> None:
+        """Fetch changes since the last sync token ("*" = full sync)."""
+        r = await _get_client().post(
+            f"{BASE_URL}/sync",
+            headers={"Authorization": f"Bearer {self._token}"},
+            data={"sync_token": self._sync_token, "resource_types": json.dumps(self.RESOURCES)},
+        )
+        if r.status_code != 200:
+            raise TodoistError(f"Sync failed: {r.status_code} {r.text[:200]}")
+        data = r.json()
+        if data.get("full_sync"):
+            self.tasks.clear()
+            self.projects.clear()
+        for item in data.get("items", []):
+            if item.get("is_deleted") or item.get("checked"):
+                self.tasks.pop(item["id"], None)
+            else:
+                self.put_task(item)
+        for project in data.get("projects", []):
+            if project.get("is_deleted") or project.get("is_archived"):
+                self.projects.pop(project["id"], None)
+            else:
+                self.projects[project["id"]] = {"id": project["id"], "name": project["name"]}
+        tz_info = (data.get("user") or {}).get("tz_info") or {}
+        self.timezone = tz_info.get("timezone") or self.timezone
+        self._sync_token = data.get("sync_token", self._sync_token)
+        self._synced_at = time.monotonic()
+        self.syncs += 1
+
+    def put_task(self, item: dict[str, Any]) -> None:
+        self.tasks[item["id"]] = {
+            "id": item["id"],
+            "content": item["content"],
+            "due": _due_date(item),
+            "priority": item.get("priority", 1),
+            "project_id": item.get("project_id", ""),
+        }
+
+    def remove_task(self, task_id: str) -> None:
+        self.tasks.pop(task_id, None)
+
+    def today(self) -> str:
+        """Current date in the account's timezone (server date if unknown)."""
+        if self.timezone:
+            try:
+                return datetime.now(ZoneInfo(self.timezone)).date().isoformat()
+            except (ZoneInfoNotFoundError, ValueError):
+                pass
+        return date.today().isoformat()
+
+    def query(self, filter_str: str, project_id: str = "") -> list[dict[str, Any]]:
+        today = self.today()
+        results = []
+        for t in self.tasks.values():
+            if project_id and t["project_id"] != project_id:
+                continue
+            if filter_str == "today" and (t["due"] or "")[:10] != today:
+                continue
+            results.append({k: t[k] for k in ("id", "content", "due", "priority")})
+        return results
+
+
+# Filters the mirror evaluates locally; anything else goes to the REST API
+MIRROR_FILTERS = ("", "all", "today")
+
+
+def _mirror() -> TodoistMirror | None:
+    """Mirror for the current account, or None if mirroring is disabled."""
+    max_age = float(os.getenv("TODOIST_MIRROR_SEC", "0") or 0)
+    if max_age <= 0:
+        return None
+    token = _get_token()
+    mirror = _mirrors.get(token)
+    if mirror is None:
+        mirror = _mirrors[token] = TodoistMirror(token, max_age)
+    return mirror
+
+
 async def create_task(content: str, due_string: str = "", project_id: str = "") -> dict[str, Any]:
     """Create a task in Todoist."""
     payload: dict[str, Any] = {"content": content}
@@ -35,16 +178,18 @@ async def create_task(content: str, due_string: str = "", project_id: str = "")
     if project_id:
         payload["project_id"] = project_id
 
-    async with httpx.AsyncClient() as client:
-        r = await client.post(f"{BASE_URL}/tasks", headers=_headers(), json=payload)
-        if r.status_code not in (200, 201):
-            raise TodoistError(f"Create failed: {r.status_code} {r.text[:200]}")
-        task = r.json()
-        return {
-            "id": task["id"],
-            "content": task["content"],
-            "due": task.get("due", {}).get("date") if task.get("due") else None,
-        }
+    r = await _get_client().post(f"{BASE_URL}/tasks", headers=_headers(), json=payload)
+    if r.status_code not in (200, 201):
+        raise TodoistError(f"Create failed: {r.status_code} {r.text[:200]}")
+    task = r.json()
+    mirror = _mirror()
+    if mirror is not None:
+        mirror.put_task(task)
+    return {
+        "id": task["id"],
+        "content": task["content"],
+        "due": _due_date(task),
+    }
 
 
 async def get_tasks(filter_str: str = "today", project_id: str = "") -> list[dict[str, Any]]:
@@ -55,53 +200,65 @@ async def get_tasks(filter_str: str = "today", project_id: str = "") -> list[dic
     if project_id:
         params["project_id"] = project_id
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(f"{BASE_URL}/tasks", headers=_headers(), params=params)
-        if r.status_code != 200:
-            raise TodoistError(f"Get failed: {r.status_code} {r.text[:200]}")
-        data = r.json()
-        results = data.get("results", []) if isinstance(data, dict) else data
-        return [
-            {
-                "id": t["id"],
-                "content": t["content"],
-                "due": t.get("due", {}).get("date") if t.get("due") else None,
-                "priority": t.get("priority", 1),
-            }
-            for t in results
-        ]
+    mirror = _mirror()
+    if mirror is not None and filter_str in MIRROR_FILTERS:
+        await mirror.ensure_fresh()
+        return mirror.query(filter_str, project_id)
+
+    r = await _get_client().get(f"{BASE_URL}/tasks", headers=_headers(), params=params)
+    if r.status_code != 200:
+        raise TodoistError(f"Get failed: {r.status_code} {r.text[:200]}")
+    data = r.json()
+    results = data.get("results", []) if isinstance(data, dict) else data
+    return [
+        {
+            "id": t["id"],
+            "content": t["content"],
+            "due": _due_date(t),
+            "priority": t.get("priority", 1),
+        }
+        for t in results
+    ]
 
 
 async def complete_task(task_id: str) -> bool:
     """Mark a task as completed."""
-    async with httpx.AsyncClient() as client:
-        r = await client.post(f"{BASE_URL}/tasks/{task_id}/close", headers=_headers())
-        if r.status_code not in (200, 204):
-            raise TodoistError(f"Complete failed: {r.status_code} {r.text[:200]}")
-        return True
+    r = await _get_client().post(f"{BASE_URL}/tasks/{task_id}/close", headers=_headers())
+    if r.status_code not in (200, 204):
+        raise TodoistError(f"Complete failed: {r.status_code} {r.text[:200]}")
+    mirror = _mirror()
+    if mirror is not None:
+        mirror.remove_task(task_id)
+    return True
 
 
 async def delete_task(task_id: str) -> bool:
     """Delete a task."""
-    async with httpx.AsyncClient() as client:
-        r = await client.delete(f"{BASE_URL}/tasks/{task_id}", headers=_headers())
-        if r.status_code not in (200, 204):
-            raise TodoistError(f"Delete failed: {r.status_code} {r.text[:200]}")
-        return True
+    r = await _get_client().delete(f"{BASE_URL}/tasks/{task_id}", headers=_headers())
+    if r.status_code not in (200, 204):
+        raise TodoistError(f"Delete failed: {r.status_code} {r.text[:200]}")
+    mirror = _mirror()
+    if mirror is not None:
+        mirror.remove_task(task_id)
+    return True
 
 
 async def get_projects() -> list[dict[str, Any]]:
     """Get all projects."""
-    async with httpx.AsyncClient() as client:
-        r = await client.get(f"{BASE_URL}/projects", headers=_headers())
-        if r.status_code != 200:
-            raise TodoistError(f"Projects failed: {r.status_code} {r.text[:200]}")
-        data = r.json()
-        results = data.get("results", []) if isinstance(data, dict) else data
-        return [
-            {"id": p["id"], "name": p["name"]}
-            for p in results
-        ]
+    mirror = _mirror()
+    if mirror is not None:
+        await mirror.ensure_fresh()
+        return list(mirror.projects.values())
+
+    r = await _get_client().get(f"{BASE_URL}/projects", headers=_headers())
+    if r.status_code != 200:
+        raise TodoistError(f"Projects failed: {r.status_code} {r.text[:200]}")
+    data = r.json()
+    results = data.get("results", []) if isinstance(data, dict) else data
+    return [
+        {"id": p["id"], "name": p["name"]}
+        for p in results
+    ]
 
 
 async def handle(intent: str, context: dict[str, Any] | None = None) -> dict[str, Any]:
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any
+from typing import Any, Callable
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
@@ -21,6 +21,14 @@ _clients: list[WebSocket] = []
 _events: list[dict[str, Any]] = []
 MAX_EVENTS = 2000
 
+# Named metric providers shown in /debug/state (queue depth, cache hits, ...)
+_stats_providers: dict[str, Callable[[], dict[str, Any]]] = {}
+
+
+def register_stats(name: str, provider: Callable[[], dict[str, Any]]) -> None:
+    """Expose *provider()* under *name* in /debug/state."""
+    _stats_providers[name] = provider
+
 
 async def broadcast_event(event: dict[str, Any]) -> None:
     """Broadcast an event to all connected WebSocket clients."""
@@ -488,7 +496,10 @@ async def debug_page() -> HTMLResponse:
 @app.get("/debug/state")
 async def debug_state() -> dict[str, Any]:
     """Return current system state."""
-    return {
+    state: dict[str, Any] = {
         "events_buffered": len(_events),
         "clients_connected": len(_clients),
     }
+    for name, provider in _stats_providers.items():
+        state[name] = provider()
+    return state
@@ -1,20 +1,26 @@
-"""OpenEcho Dispatcher — atoms 5.1-5.5.
+"""OpenEcho Dispatcher — atoms 5.1-5.5, 5.7.
 
 Determines target skill for intent, launches it, handles completion/questions,
-updates session state.
+updates session state. dispatch_batch runs independent queued intents
+(different skills, at most one that may ask the user) concurrently.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 from dataclasses import dataclass
-from typing import Any, Callable, Awaitable
+from typing import Any, AsyncIterator, Callable, Awaitable
 
 from src.config_loader import SkillConfig
-from src.queue import IntentQueue, QueuedIntent
+from src.queue import IntentQueue, QueueManager, QueuedIntent
 from src.session import SessionState
+from src.triggers import TriggerIndex
 
 logger = logging.getLogger(__name__)
 
+# Skills with this tool may answer with a question and wait for the user
+ASK_TOOL = "ask_user"
+
 
 @dataclass
 class SkillInput:
@@ -32,6 +38,8 @@ class SkillOutput:
     text: str
     done: bool
     report: str = ""
+    skill_id: str = ""  # set by Dispatcher, saves a session re-read for debug
+    stream: AsyncIterator[str] | None = None  # text deltas to send progressively instead of text
 
 
 class Dispatcher:
@@ -40,10 +48,11 @@ class Dispatcher:
     def __init__(
         self,
         skill_registry: dict[str, SkillConfig],
-        queue: IntentQueue,
+        queue: IntentQueue | QueueManager,
         session: SessionState,
     ) -> None:
         self._registry = skill_registry
+        self._triggers = TriggerIndex(skill_registry)
         self._queue = queue
         self._session = session
         self._skill_runner: Callable[..., Awaitable[SkillOutput]] | None = None
@@ -52,40 +61,30 @@ class Dispatcher:
         """Set the function that actually runs a skill."""
         self._skill_runner = runner
 
+    def queue_for(self, user_id: str) -> IntentQueue:
+        """Return the intent queue for *user_id* (own shard if sharded)."""
+        if isinstance(self._queue, QueueManager):
+            return self._queue.get(user_id)
+        return self._queue
+
     def match_skill(self, intent_text: str, skill_hint: str = "") -> str | None:
         """Determine which skill handles the intent. Returns skill_id or None."""
         # If hint matches a known skill, use it
         if skill_hint and skill_hint in self._registry:
             return skill_hint
 
-        # Search by triggers
-        text_lower = intent_text.lower()
-        best_match: str | None = None
-        best_priority = 999
-
-        for skill_id, config in self._registry.items():
-            for trigger in config.triggers:
-                trig_lower = trigger.lower()
-                # Check if trigger root (first 4+ chars) appears in text
-                # This handles Russian morphology: "задача" matches "задачу", "задачи"
-                root = trig_lower[:min(4, len(trig_lower))]
-                if root in text_lower or trig_lower in text_lower:
-                    if config.priority < best_priority:
-                        best_priority = config.priority
-                        best_match = skill_id
-                    break
-
-        return best_match
+        # Search by triggers (precompiled roots, one pass over the text)
+        return self._triggers.best(intent_text)
 
     async def dispatch_next(self, user_id: str) -> SkillOutput | None:
         """Take next intent from queue and dispatch to skill."""
-        item = self._queue.pop()
+        item = self.queue_for(user_id).pop()
         if item is None:
             # Queue empty -> go idle
             await self._session.update(user_id, active_skill="", status="idle")
             return None
 
-        skill_id = self.match_skill(item.text, item.skill_hint)
+        skill_id = item.skill_id or self.match_skill(item.text, item.skill_hint)
         if not skill_id:
             await self._session.update(user_id, active_skill="", status="idle")
             return SkillOutput(
@@ -98,23 +97,87 @@ class Dispatcher:
         await self._session.update(user_id, active_skill=skill_id, status="busy")
 
         # Run skill
-        if self._skill_runner:
-            skill_input = SkillInput(
-                intent=item.text,
-                user_id=user_id,
-                session_id=f"{user_id}_session",
-                context={"timestamp": "", "source_message": item.text},
+        output = await self._run(user_id, skill_id, item)
+
+        # Handle output
+        return await self._handle_output(user_id, skill_id, output)
+
+    async def dispatch_batch(self, user_id: str) -> list[SkillOutput]:
+        """Pop the next run of independent intents and execute them concurrently.
+
+        A batch is the longest queue prefix (in priority order) whose intents
+        go to different skills that cannot ask a question. An intent for a
+        skill that may ask runs in a batch of its own and ends it, so no other
+        reply arrives while its question is open. Outputs are returned in
+        queue-priority order. Returns [] if the queue is empty.
+        """
+        queue = self.queue_for(user_id)
+        batch: list[tuple[QueuedIntent, str | None]] = []
+        skills: set[str] = set()
+        while (item := queue.head()) is not None:
+            skill_id = item.skill_id or self.match_skill(item.text, item.skill_hint)
+            config = self._registry.get(skill_id) if skill_id else None
+            may_ask = config is not None and ASK_TOOL in config.tools
+            if batch and (skill_id in skills or may_ask):
+                break
+            queue.pop()
+            batch.append((item, skill_id))
+            if may_ask:
+                break
+            if skill_id:
+                skills.add(skill_id)
+
+        if not batch:
+            await self._session.update(user_id, active_skill="", status="idle")
+            return []
+
+        busy = next((sid for _, sid in batch if sid), "")
+        if busy:
+            await self._session.update(user_id, active_skill=busy, status="busy")
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(self._run_safe(user_id, sid, item)) for item, sid in batch]
+        outputs = [t.result() for t in tasks]
+
+        question = next((o for o in outputs if not o.done and o.type == "question"), None)
+        if question is not None:
+            await self._session.update(
+                user_id, active_skill=question.skill_id, status="waiting_answer",
             )
-            output = await self._skill_runner(skill_id, skill_input)
         else:
-            output = SkillOutput(
+            await self._session.update(user_id, active_skill="", status="idle")
+        return outputs
+
+    async def _run(self, user_id: str, skill_id: str, item: QueuedIntent) -> SkillOutput:
+        if not self._skill_runner:
+            return SkillOutput(
                 type="error",
                 text="Skill runner not configured",
                 done=True,
             )
+        skill_input = SkillInput(
+            intent=item.text,
+            user_id=user_id,
+            session_id=f"{user_id}_session",
+            context={"timestamp": "", "source_message": item.text},
+        )
+        return await self._skill_runner(skill_id, skill_input)
 
-        # Handle output
-        return await self._handle_output(user_id, skill_id, output)
+    async def _run_safe(self, user_id: str, skill_id: str | None, item: QueuedIntent) -> SkillOutput:
+        """Run one batch member; a failure becomes an error output, not a batch abort."""
+        if not skill_id:
+            return SkillOutput(
+                type="error",
+                text=f"Не нашёл подходящий скилл для: {item.text}",
+                done=True,
+            )
+        try:
+            output = await self._run(user_id, skill_id, item)
+        except Exception as e:
+            logger.exception("Skill %s failed in batch", skill_id)
+            output = SkillOutput(type="error", text=f"Ошибка скилла '{skill_id}': {e}", done=True)
+        output.skill_id = output.skill_id or skill_id
+        return output
 
     async def handle_message_to_active(self, user_id: str, text: str) -> SkillOutput | None:
         """Forward message to currently active skill."""
@@ -134,9 +197,10 @@ class Dispatcher:
 
     async def _handle_output(self, user_id: str, skill_id: str, output: SkillOutput) -> SkillOutput:
         """Process skill output: update state, chain next if done."""
+        output.skill_id = output.skill_id or skill_id
         if output.done:
             # Skill finished — check queue for next
-            if not self._queue.is_empty():
+            if not self.queue_for(user_id).is_empty():
                 await self._session.update(user_id, active_skill="", status="idle")
                 # Caller should call dispatch_next again
             else:
@@ -0,0 +1,136 @@
+"""OpenEcho Keyed Executor — atom 0.6.
+
+Runs message pipelines with per-key (user) ordering and cross-key parallelism.
+Each user has a FIFO mailbox drained by one task at a time, so a user's
+messages never race on session state or their intent queue. A global worker
+cap bounds jobs running at once; submit() blocks when mailboxes are full
+(backpressure) instead of buffering without limit.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class KeyedExecutor:
+    """Per-key serialized, cross-key parallel job runner."""
+
+    MAX_WORKERS = 32
+    MAX_PENDING = 1000
+    MAX_PENDING_PER_KEY = 20
+    LAG_SAMPLES = 1000
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        max_pending_per_key: int | None = None,
+    ) -> None:
+        self._max_workers = max_workers or self.MAX_WORKERS
+        self._max_pending = max_pending or self.MAX_PENDING
+        self._max_per_key = max_pending_per_key or self.MAX_PENDING_PER_KEY
+        self._workers = asyncio.Semaphore(self._max_workers)
+        self._space = asyncio.Condition()
+        self._mailboxes: dict[str, deque[tuple[float, Job, asyncio.Future]]] = {}
+        self._drainers: dict[str, asyncio.Task] = {}
+        self._pending = 0
+        self._running = 0
+        self._lags: deque[float] = deque(maxlen=self.LAG_SAMPLES)
+        self.completed = 0
+        self.failed = 0
+
+    async def submit(self, key: str, job: Job) -> asyncio.Future:
+        """Enqueue *job* behind earlier jobs for *key*; waits while full.
+
+        Returns a future with the job's result. Errors are logged, so callers
+        may ignore the future.
+        """
+        async with self._space:
+            await self._space.wait_for(
+                lambda: self._pending < self._max_pending
+                and len(self._mailboxes.get(key, ())) < self._max_per_key
+            )
+            fut: asyncio.Future = asyncio.get_running_loop().create_future()
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._mailboxes.setdefault(key, deque()).append((time.monotonic(), job, fut))
+            self._pending += 1
+            if key not in self._drainers:
+                self._drainers[key] = asyncio.create_task(self._drain(key))
+        return fut
+
+    async def _drain(self, key: str) -> None:
+        mailbox = self._mailboxes[key]
+        try:
+            while mailbox:
+                enqueued_at, job, fut = mailbox[0]
+                async with self._workers:
+                    mailbox.popleft()
+                    self._lags.append(time.monotonic() - enqueued_at)
+                    async with self._space:
+                        self._pending -= 1
+                        self._space.notify_all()
+                    self._running += 1
+                    try:
+                        result = await job()
+                    except Exception as e:
+                        logger.exception("Job for %s failed", key)
+                        self.failed += 1
+                        if not fut.done():
+                            fut.set_exception(e)
+                    else:
+                        self.completed += 1
+                        if not fut.done():
+                            fut.set_result(result)
+                    finally:
+                        self._running -= 1
+                        if not fut.done():
+                            fut.cancel()
+        finally:
+            del self._drainers[key]
+            if not mailbox:
+                del self._mailboxes[key]
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+        while self._drainers:
+            await asyncio.gather(*self._drainers.values(), return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        """Cancel running and queued jobs."""
+        for task in list(self._drainers.values()):
+            task.cancel()
+        await asyncio.gather(*self._drainers.values(), return_exceptions=True)
+
+    def lag(self, key: str) -> float:
+        """Seconds the oldest waiting job for *key* has been queued."""
+        mailbox = self._mailboxes.get(key)
+        if not mailbox:
+            return 0.0
+        return time.monotonic() - mailbox[0][0]
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        waiting = {k: now - m[0][0] for k, m in self._mailboxes.items() if m}
+        lags = sorted(self._lags)
+        return {
+            "running": self._running,
+            "max_workers": self._max_workers,
+            "pending": self._pending,
+            "active_keys": len(self._drainers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "lag_p50_ms": round(statistics.median(lags) * 1000, 1) if lags else 0.0,
+            "lag_max_ms": round(lags[-1] * 1000, 1) if lags else 0.0,
+            "lagging": {
+                k: round(v * 1000, 1)
+                for k, v in sorted(waiting.items(), key=lambda kv: -kv[1])[:10]
+            },
+        }
@@ -3,14 +3,33 @@
 Accumulates forwarded messages / photos without intent.
 When an intent arrives, attaches buffered items.
 Timer (60s) asks user "what to do with these?" if no intent follows.
+All users' timers share one TimerWheel instead of a sleeping task each.
+RedisMessageBuffer keeps the items, and which timer is current, in Redis so
+any worker can serve any user.
 """
 from __future__ import annotations
 
 import asyncio
+import json
 import time
-from dataclasses import dataclass, field
+import uuid
+from dataclasses import asdict, dataclass, field
 from typing import Any
 
+import redis.asyncio as aioredis
+
+from src.timer_wheel import TimerWheel
+
+# Fire only if ARGV[1] is still the user's current timer token: returns 1
+# (items waiting), 0 (nothing buffered) or -1 (timer replaced or cancelled)
+_CLAIM_TIMEOUT_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return -1
+end
+redis.call('DEL', KEYS[1])
+return redis.call('EXISTS', KEYS[2])
+"""
+
 
 @dataclass
 class BufferItem:
@@ -25,9 +44,9 @@ class MessageBuffer:
 
     TIMEOUT_SEC = 60.0
 
-    def __init__(self) -> None:
+    def __init__(self, wheel: TimerWheel | None = None) -> None:
         self._buffers: dict[str, list[BufferItem]] = {}
-        self._timers: dict[str, asyncio.TimerHandle | asyncio.Task | None] = {}
+        self._wheel = wheel if wheel is not None else TimerWheel()
         self._timeout_callback: Any = None
 
     def set_timeout_callback(self, callback: Any) -> None:
@@ -60,18 +79,107 @@ class MessageBuffer:
         self._cancel_timer(user_id)
 
     def start_timer(self, user_id: str, loop: asyncio.AbstractEventLoop | None = None) -> None:
-        """Start timeout timer for user's buffer."""
-        self._cancel_timer(user_id)
+        """Start (or restart) timeout timer for user's buffer.
 
+        *loop* is accepted for compatibility; the wheel uses the running loop.
+        """
         async def _fire():
-            await asyncio.sleep(self.TIMEOUT_SEC)
             if self._timeout_callback and self.has_items(user_id):
                 await self._timeout_callback(user_id)
 
-        _loop = loop or asyncio.get_event_loop()
-        self._timers[user_id] = _loop.create_task(_fire())
+        self._wheel.schedule(user_id, self.TIMEOUT_SEC, _fire)
 
     def _cancel_timer(self, user_id: str) -> None:
-        timer = self._timers.pop(user_id, None)
-        if timer and isinstance(timer, asyncio.Task):
-            timer.cancel()
+        self._wheel.cancel(user_id)
+
+
+class RedisMessageBuffer:
+    """Per-user message buffer stored in Redis lists.
+
+    Async counterpart of MessageBuffer. Each user's items live in one list
+    whose TTL is refreshed on every add (pipelined with the RPUSH); collect
+    reads and deletes the list in one MULTI, so two workers never both get
+    the same items.
+
+    A timeout timer runs on the worker that started it, but its token lives
+    in Redis: restarting the timer replaces the token, and collect/clear on
+    any worker delete it, so a superseded timer fires as a no-op.
+    """
+
+    TIMEOUT_SEC = MessageBuffer.TIMEOUT_SEC
+    TTL_SEC = 3600
+    PREFIX = "buffer:"
+
+    def __init__(
+        self, redis_url: str = "redis://localhost:6379/0", wheel: TimerWheel | None = None,
+    ) -> None:
+        self._redis: aioredis.Redis = aioredis.from_url(redis_url)
+        self._wheel = wheel if wheel is not None else TimerWheel()
+        self._timeout_callback: Any = None
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+    def _timer_key(self, user_id: str) -> str:
+        return f"{self.PREFIX}{user_id}:timer"
+
+    def set_timeout_callback(self, callback: Any) -> None:
+        """Set callback(user_id) called when buffer times out."""
+        self._timeout_callback = callback
+
+    async def add(self, user_id: str, item: BufferItem) -> None:
+        """Add an item to user's buffer."""
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, json.dumps(asdict(item), ensure_ascii=False))
+            pipe.expire(key, self.TTL_SEC)
+            await pipe.execute()
+
+    async def has_items(self, user_id: str) -> bool:
+        """Check if user has buffered items."""
+        return bool(await self._redis.exists(self._key(user_id)))
+
+    async def collect(self, user_id: str) -> list[BufferItem]:
+        """Atomically collect and clear all buffered items for user."""
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key, self._timer_key(user_id))
+            raw, _ = await pipe.execute()
+        self._cancel_timer(user_id)
+        return [self._decode(r) for r in raw]
+
+    async def peek(self, user_id: str) -> list[BufferItem]:
+        """View buffered items without clearing."""
+        return [self._decode(r) for r in await self._redis.lrange(self._key(user_id), 0, -1)]
+
+    async def clear(self, user_id: str) -> None:
+        """Discard buffer for user."""
+        await self._redis.delete(self._key(user_id), self._timer_key(user_id))
+        self._cancel_timer(user_id)
+
+    async def start_timer(self, user_id: str) -> None:
+        """Start (or restart) timeout timer for user's buffer, on any worker."""
+        token = uuid.uuid4().hex
+        timer_key = self._timer_key(user_id)
+        await self._redis.set(timer_key, token, ex=self.TTL_SEC)
+
+        async def _fire():
+            claimed = await self._redis.eval(
+                _CLAIM_TIMEOUT_SCRIPT, 2, timer_key, self._key(user_id), token,
+            )
+            if self._timeout_callback and claimed == 1:
+                await self._timeout_callback(user_id)
+
+        self._wheel.schedule(user_id, self.TIMEOUT_SEC, _fire)
+
+    def _cancel_timer(self, user_id: str) -> None:
+        self._wheel.cancel(user_id)
+
+    async def close(self) -> None:
+        """Close Redis connection."""
+        await self._redis.aclose()
+
+    @staticmethod
+    def _decode(raw: bytes | str) -> BufferItem:
+        return BufferItem(**json.loads(raw))
@@ -0,0 +1,140 @@
+"""OpenEcho Gateway Coalescer — atom 2.10.
+
+Optional debounce stage in front of intent parsing. With a window set,
+messages from one user that arrive within it of each other are collected
+(like MessageBuffer) and flushed together once the user pauses, so
+"купи молоко" / "и хлеб" / "на завтра" cost one parse_intents call instead of
+three. MAX_WAIT_SEC caps the delay for a user who keeps typing. The default
+window, 0, passes every message straight through. Quiet-window timers live on
+a TimerWheel (shareable with other gateway stages) rather than one sleeping
+task per user.
+
+Backpressure: add() waits while the user's previous flush, or MAX_FLUSHING
+flushes overall, are still blocked in the flush callback (e.g. a full
+executor), so a slow pipeline slows the message handler down instead of
+piling up timer flushes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from src.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[str, list[Any]], Awaitable[None]]
+
+
+def merge_texts(texts: list[str]) -> str:
+    """Join message texts into one, one message per line, skipping blanks."""
+    return "\n".join(t.strip() for t in texts if t and t.strip())
+
+
+class MessageCoalescer:
+    """Per-user debounce buffer that flushes after a quiet window."""
+
+    WINDOW_SEC = 0.0  # pass-through; e.g. 0.8 to coalesce
+    MAX_WAIT_SEC = 3.0
+    MAX_ITEMS = 10
+    MAX_FLUSHING = 100
+    TICK_SEC = 0.05  # timer resolution of the default wheel
+
+    def __init__(
+        self,
+        window: float | None = None,
+        max_wait: float | None = None,
+        max_items: int | None = None,
+        wheel: TimerWheel | None = None,
+        max_flushing: int | None = None,
+    ) -> None:
+        self.window = self.WINDOW_SEC if window is None else window
+        self._max_wait = self.MAX_WAIT_SEC if max_wait is None else max_wait
+        self._max_items = max_items or self.MAX_ITEMS
+        self._items: dict[str, list[Any]] = {}
+        self._first_at: dict[str, float] = {}
+        self._wheel = wheel if wheel is not None else TimerWheel(tick=self.TICK_SEC)
+        self._flush_callback: FlushCallback | None = None
+        self._max_flushing = max_flushing or self.MAX_FLUSHING
+        self._flushing: dict[str, int] = {}  # user_id -> flushes inside the callback
+        self._flush_done = asyncio.Condition()
+        self.received = 0
+        self.flushed = 0
+        self.failed = 0
+
+    def set_flush_callback(self, callback: FlushCallback) -> None:
+        """Set callback(user_id, items) called with each coalesced group."""
+        self._flush_callback = callback
+
+    async def add(self, user_id: str, item: Any) -> None:
+        """Add a message; (re)start the user's quiet-window timer.
+
+        Waits first while earlier flushes are blocked (see module docstring).
+        """
+        async with self._flush_done:
+            await self._flush_done.wait_for(
+                lambda: user_id not in self._flushing
+                and sum(self._flushing.values()) < self._max_flushing
+            )
+        self.received += 1
+        items = self._items.setdefault(user_id, [])
+        items.append(item)
+        now = time.monotonic()
+        first_at = self._first_at.setdefault(user_id, now)
+
+        delay = min(self.window, first_at + self._max_wait - now)
+        if delay <= 0 or len(items) >= self._max_items:
+            await self.flush(user_id)
+            return
+
+        async def _fire():
+            await self.flush(user_id)
+
+        self._wheel.schedule(self._timer_key(user_id), delay, _fire)
+
+    async def flush(self, user_id: str) -> None:
+        """Hand the user's pending messages to the flush callback now."""
+        self._wheel.cancel(self._timer_key(user_id))
+        items = self._items.pop(user_id, [])
+        self._first_at.pop(user_id, None)
+        if items and self._flush_callback:
+            self.flushed += 1
+            self._flushing[user_id] = self._flushing.get(user_id, 0) + 1
+            try:
+                await self._flush_callback(user_id, items)
+            except Exception:
+                self.failed += 1
+                logger.exception("Coalesced flush failed for %s (%d messages)", user_id, len(items))
+            finally:
+                self._flushing[user_id] -= 1
+                if not self._flushing[user_id]:
+                    del self._flushing[user_id]
+                async with self._flush_done:
+                    self._flush_done.notify_all()
+
+    def pending(self, user_id: str) -> list[Any]:
+        return list(self._items.get(user_id, []))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "window_sec": self.window,
+            "received": self.received,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushing": sum(self._flushing.values()),
+            "waiting_users": len(self._items),
+        }
+
+    def close(self) -> None:
+        """Cancel this coalescer's timers; pending messages are dropped."""
+        for user_id in self._items:
+            self._wheel.cancel(self._timer_key(user_id))
+        self._items.clear()
+        self._first_at.clear()
+
+    @staticmethod
+    def _timer_key(user_id: str) -> tuple[str, str]:
+        # Namespaced so a shared wheel can also hold other stages' user timers
+        return ("coalesce", user_id)
@@ -0,0 +1,152 @@
+"""OpenEcho Gateway Fast Path — atom 2.9.
+
+Deterministic pre-classifier in front of the LLM intent parser (Level 2).
+Short messages without separators or chaining words are treated as a single
+intent and routed on triggers alone; anything ambiguous goes to the LLM.
+
+Modes: "off" (always LLM), "shadow" (always LLM, log agreement with the
+fast path for tuning), "on" (confident messages bypass the LLM).
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from src.gateway.intent_parser import ParsedIntent, ParseResult
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "shadow", "on")
+
+MAX_WORDS = 8
+CONFIDENCE_THRESHOLD = 0.7
+
+# Hard multi-intent signals: line/list separators, several sentences, chaining words
+_HARD_SPLIT_RE = re.compile(
+    r"[;\n]|[.!?]\s+\S"
+    r"|\b(?:а также|а ещё|а еще|и ещё|и еще|потом|затем|после этого|кстати|плюс)\b",
+    re.IGNORECASE,
+)
+# Soft signals: plain "и" / comma may join two intents or just two objects
+_SOFT_SPLIT_RE = re.compile(r",|\bи\b", re.IGNORECASE)
+
+
+@dataclass
+class FastPathResult:
+    """Pre-classifier verdict for one message."""
+    single: bool  # confident the message is one intent
+    skill_id: str | None
+    confidence: float
+    reason: str
+
+    def to_parse_result(self, message: str) -> ParseResult:
+        return ParseResult(intents=[ParsedIntent(text=message, skill_hint=self.skill_id or "")])
+
+
+class FastPathClassifier:
+    """Trigger-based single-intent detector with shadow-mode bookkeeping."""
+
+    def __init__(
+        self,
+        match_skill: Callable[[str], str | None],
+        mode: str = "shadow",
+        threshold: float = CONFIDENCE_THRESHOLD,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown fast path mode '{mode}', expected one of {MODES}")
+        self._match_skill = match_skill
+        self.mode = mode
+        self._threshold = threshold
+        self.bypassed = 0
+        self.agree = 0
+        self.disagree = 0
+        self.deferred = 0
+
+    @property
+    def routes_directly(self) -> bool:
+        return self.mode == "on"
+
+    def classify(self, text: str) -> FastPathResult:
+        """Score how likely *text* is a single intent and pick its skill."""
+        stripped = text.strip()
+        if not stripped:
+            return FastPathResult(single=False, skill_id=None, confidence=0.0, reason="empty")
+        if _HARD_SPLIT_RE.search(stripped):
+            return FastPathResult(single=False, skill_id=None, confidence=0.0, reason="separator")
+
+        skill_id = self._match_skill(stripped)
+        confidence = 1.0
+        reasons: list[str] = []
+
+        words = len(stripped.split())
+        if words > 2 * MAX_WORDS:
+            confidence -= 0.5
+            reasons.append(f"{words} words")
+        elif words > MAX_WORDS:
+            confidence -= 0.3
+            reasons.append(f"{words} words")
+        if _SOFT_SPLIT_RE.search(stripped):
+            confidence -= 0.2
+            reasons.append("conjunction")
+        if skill_id is None:
+            confidence -= 0.15
+            reasons.append("no trigger")
+
+        confidence = round(max(confidence, 0.0), 2)
+        return FastPathResult(
+            single=confidence >= self._threshold,
+            skill_id=skill_id,
+            confidence=confidence,
+            reason=", ".join(reasons) or "short, trigger hit",
+        )
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def record_shadow(self, text: str, fast: FastPathResult, parsed: ParseResult) -> bool:
+        """Compare fast-path verdict with the LLM split. Returns True if they agree."""
+        if not fast.single:
+            self.deferred += 1
+            return len(parsed.intents) > 1
+
+        llm_skill: str | None = None
+        if len(parsed.intents) == 1:
+            pi = parsed.intents[0]
+            llm_skill = pi.skill_hint or self._match_skill(pi.text)
+        agrees = len(parsed.intents) == 1 and llm_skill == fast.skill_id
+        if agrees:
+            self.agree += 1
+        else:
+            self.disagree += 1
+
+        from src.logger import log_event
+        try:
+            log_event(
+                "gateway", "fast_path_shadow",
+                input_data={"text": text[:200]},
+                output_data={
+                    "agree": agrees,
+                    "fast_skill": fast.skill_id,
+                    "confidence": fast.confidence,
+                    "reason": fast.reason,
+                    "llm_intents": [
+                        {"text": pi.text[:80], "skill_hint": pi.skill_hint} for pi in parsed.intents
+                    ],
+                },
+            )
+        except OSError as e:
+            logger.warning("Fast path shadow log failed: %s", e)
+        return agrees
+
+    def stats(self) -> dict[str, Any]:
+        judged = self.agree + self.disagree
+        return {
+            "mode": self.mode,
+            "bypassed": self.bypassed,
+            "agree": self.agree,
+            "disagree": self.disagree,
+            "deferred": self.deferred,
+            "agreement": round(self.agree / judged, 3) if judged else 0.0,
+        }
@@ -0,0 +1,142 @@
+"""OpenEcho Gateway Intent Cache — atom 2.8.
+
+Content-addressed cache for intent parsing results.
+Key = hash(normalized message, skill names, prompt version), so exact repeats
+like "что на сегодня" skip the LLM. In-memory LRU with TTL, plus an optional
+Redis tier shared across workers.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any
+
+from src.gateway.intent_parser import ParsedIntent, ParseResult
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Case- and whitespace-insensitive form used for cache keys."""
+    return _WS_RE.sub(" ", message.casefold()).strip().rstrip(".!?… ")
+
+
+class IntentCache:
+    """Two-tier (memory + optional Redis) cache of ParseResult."""
+
+    TTL_SEC = 3600.0
+    MAX_ENTRIES = 5000
+    PREFIX = "intent_cache:"
+
+    def __init__(
+        self,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        redis_url: str | None = None,
+    ) -> None:
+        self._ttl = self.TTL_SEC if ttl is None else ttl
+        self._max_entries = max_entries or self.MAX_ENTRIES
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._redis: Any = None
+        if redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(redis_url)
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+
+    @staticmethod
+    def make_key(message: str, skill_names: list[str], prompt: str) -> str:
+        """Content address for a parse request."""
+        prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        raw = "\x00".join([normalize_message(message), ",".join(sorted(skill_names)), prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> ParseResult | None:
+        """Return cached result or None. Checks memory, then Redis."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._decode(data)
+            del self._entries[key]
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self.PREFIX + key)
+            except Exception as e:
+                logger.warning("Intent cache Redis read failed: %s", e)
+                raw = None
+            if raw:
+                data = json.loads(raw)
+                self._store(key, data, now)
+                self.hits += 1
+                self.redis_hits += 1
+                return self._decode(data)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, result: ParseResult) -> None:
+        """Cache *result* in memory and, if configured, in Redis."""
+        data = self._encode(result)
+        self._store(key, data, time.monotonic())
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    self.PREFIX + key,
+                    json.dumps(data, ensure_ascii=False),
+                    ex=max(1, int(self._ttl)),
+                )
+            except Exception as e:
+                logger.warning("Intent cache Redis write failed: %s", e)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "redis_hits": self.redis_hits,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def _store(self, key: str, data: dict[str, Any], now: float) -> None:
+        self._entries[key] = (now + self._ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _encode(result: ParseResult) -> dict[str, Any]:
+        return {
+            "intents": [{"text": i.text, "skill_hint": i.skill_hint} for i in result.intents],
+            "raw_response": result.raw_response,
+            "tokens_used": result.tokens_used,
+        }
+
+    @staticmethod
+    def _decode(data: dict[str, Any]) -> ParseResult:
+        return ParseResult(
+            intents=[ParsedIntent(text=i["text"], skill_hint=i.get("skill_hint", ""))
+                     for i in data.get("intents", [])],
+            raw_response=data.get("raw_response", ""),
+            tokens_used=data.get("tokens_used", 0),
+            from_cache=True,
+        )
@@ -1,6 +1,9 @@
 """OpenEcho Gateway Level 2 — Intent Parser — atom 2.3.
 
 Uses LLM (Haiku) to split user message into atomic intents.
+Successful parses can be memoized in an IntentCache (atom 2.8).
+The system prompt only changes with the skill list, so it is sent as a
+prompt-cache breakpoint.
 """
 from __future__ import annotations
 
@@ -8,7 +11,12 @@ import json
 import logging
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from src.skill_runtime.llm import cached_system
+
+if TYPE_CHECKING:
+    from src.gateway.intent_cache import IntentCache
 
 logger = logging.getLogger(__name__)
 
@@ -28,20 +36,24 @@ class ParseResult:
     intents: list[ParsedIntent] = field(default_factory=list)
     raw_response: str = ""
     tokens_used: int = 0
+    from_cache: bool = False
 
 
 async def parse_intents(
     message: str,
     llm_call: Any = None,
     skill_names: list[str] | None = None,
+    cache: "IntentCache | None" = None,
 ) -> ParseResult:
     """Parse user message into atomic intents using LLM.
 
     Args:
         message: User message text.
-        llm_call: Async callable(system_prompt, user_message) -> str.
+        llm_call: Async callable(system_prompt, user_message) -> str; the
+                  system prompt arrives as cacheable system blocks.
                   If None, falls back to single-intent passthrough.
         skill_names: Available skill names for hints.
+        cache: Optional IntentCache; hits skip the LLM call entirely.
     """
     if llm_call is None:
         # No LLM available — treat entire message as one intent
@@ -50,10 +62,20 @@ async def parse_intents(
     # Load system prompt
     system_prompt = _load_prompt(skill_names or [])
 
+    cache_key = ""
+    if cache is not None:
+        cache_key = cache.make_key(message, skill_names or [], system_prompt)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        raw = await llm_call(system_prompt, message)
+        raw = await llm_call(cached_system(system_prompt), message)
         intents = _parse_response(raw)
-        return ParseResult(intents=intents, raw_response=raw)
+        result = ParseResult(intents=intents, raw_response=raw)
+        if cache is not None:
+            await cache.put(cache_key, result)
+        return result
     except Exception as e:
         logger.error("Intent parsing failed: %s", e)
         # Fallback: treat as single intent
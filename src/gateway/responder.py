@@ -1,14 +1,52 @@
 """OpenEcho Gateway Responder — atom 2.6.
 
 Accepts skill response and sends it to Telegram via bot.
+send_streaming_response posts a streamed reply progressively: the first
+message goes out with the first text, then it is edited at most once per
+EDIT_INTERVAL_SEC (Telegram throttles frequent edits), through the
+SendScheduler like every other outbound message.
 """
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterable
 
 if TYPE_CHECKING:
     from aiogram import Bot
 
+    from src.gateway.send_queue import SendScheduler
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LEN = 4096
+EDIT_INTERVAL_SEC = 1.2
+
+
+def pack_messages(parts: list[str], limit: int = MAX_MESSAGE_LEN, sep: str = "\n\n") -> list[str]:
+    """Pack text parts into as few messages as fit Telegram's length limit.
+
+    Consecutive parts share a message (joined by *sep*) while they fit;
+    a part longer than *limit* is split into limit-sized chunks.
+    """
+    messages: list[str] = []
+    current = ""
+    for part in parts:
+        if not part:
+            continue
+        if current and len(current) + len(sep) + len(part) <= limit:
+            current += sep + part
+            continue
+        if current:
+            messages.append(current)
+        chunks = [part[i:i + limit] for i in range(0, len(part), limit)]
+        messages.extend(chunks[:-1])
+        current = chunks[-1]
+    if current:
+        messages.append(current)
+    return messages
+
 
 async def send_response(bot: "Bot", chat_id: int, text: str) -> None:
     """Send text response to Telegram chat."""
@@ -23,6 +61,62 @@ async def send_response(bot: "Bot", chat_id: int, text: str) -> None:
             await bot.send_message(chat_id, text[i:i + 4096])
 
 
+async def send_streaming_response(
+    sender: "SendScheduler",
+    chat_id: int,
+    deltas: AsyncIterable[str],
+    edit_interval: float = EDIT_INTERVAL_SEC,
+) -> str:
+    """Send a reply while it is being generated. Returns the full text.
+
+    Text past the 4096-char limit continues in a new message. The message
+    and its edits go through *sender*, so they share its flood limits.
+    """
+    from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+    full = ""
+    sent_upto = 0       # start of the text shown in the current message
+    shown = ""          # what the current message displays
+    message_id: int | None = None
+    last_edit = 0.0
+
+    async def _show(text: str, final: bool = False) -> None:
+        """Post or edit the current message; intermediate updates may be skipped."""
+        nonlocal message_id, shown, last_edit
+        while text != shown:
+            try:
+                if message_id is None:
+                    message = await sender.send_message(chat_id, text)
+                    message_id = message.message_id
+                else:
+                    await sender.edit_text(chat_id, message_id, text)
+                shown = text
+            except TelegramRetryAfter as e:
+                logger.warning("Edit throttled for chat %s (%ss)", chat_id, e.retry_after)
+                if not final:
+                    break
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                if "not modified" not in str(e):
+                    raise
+                shown = text
+        last_edit = time.monotonic()
+
+    async for delta in deltas:
+        full += delta
+        while len(full) - sent_upto > MAX_MESSAGE_LEN:
+            # Close the current message at the limit and continue in a new one
+            await _show(full[sent_upto:sent_upto + MAX_MESSAGE_LEN], final=True)
+            sent_upto += MAX_MESSAGE_LEN
+            message_id, shown = None, ""
+        if message_id is None or time.monotonic() - last_edit >= edit_interval:
+            await _show(full[sent_upto:])
+
+    if full[sent_upto:]:
+        await _show(full[sent_upto:], final=True)
+    return full
+
+
 async def send_skill_response(
     bot: "Bot",
     chat_id: int,
@@ -0,0 +1,252 @@
+"""OpenEcho Gateway Send Queue — atom 2.11.
+
+Outbound scheduler in front of bot.send_message. Respects Telegram flood
+limits with a global token bucket (~30 msg/s) and one per chat (~1 msg/s,
+small burst), retries after TelegramRetryAfter (pausing that chat and the
+whole bot for the flood wait), and sends interactive replies before
+broadcasts when both are waiting. Messages to one
+chat keep their order; a reply and its debug block are packed into as few
+messages as the 4096-char limit allows. Message edits (streamed replies)
+go through the same queues and limits.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.gateway.responder import pack_messages
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+
+class SendPriority(IntEnum):
+    """Lower value is sent first."""
+    INTERACTIVE = 0
+    # For scheduled (cron) sends; unused until a cron runner sends messages
+    BROADCAST = 1
+
+
+class RateBucket:
+    """Token bucket refilled at *per_sec*, holding at most *burst* tokens."""
+
+    def __init__(self, per_sec: float, burst: float) -> None:
+        self._rate = per_sec
+        self.capacity = float(burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill(now)
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self._rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self._tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self._tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Outgoing:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    attempts: int = field(compare=False, default=0)
+
+
+class SendScheduler:
+    """Rate-limited, prioritized outbound message queue."""
+
+    GLOBAL_PER_SEC = 30.0
+    CHAT_PER_SEC = 1.0
+    CHAT_BURST = 3
+    MAX_RETRIES = 3
+    MAX_IDLE_BUCKETS = 1000
+
+    def __init__(
+        self,
+        bot: "Bot",
+        global_per_sec: float | None = None,
+        chat_per_sec: float | None = None,
+        chat_burst: int | None = None,
+    ) -> None:
+        self._bot = bot
+        global_rate = global_per_sec or self.GLOBAL_PER_SEC
+        self._global = RateBucket(global_rate, global_rate)
+        self._chat_rate = chat_per_sec or self.CHAT_PER_SEC
+        self._chat_burst = chat_burst or self.CHAT_BURST
+        self._chat_buckets: dict[int, RateBucket] = {}
+        self._queues: dict[int, deque[_Outgoing]] = {}
+        self._in_flight: set[int] = set()
+        self._blocked_until: dict[int, float] = {}
+        self._global_blocked_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._driver: asyncio.Task | None = None
+        self._deliveries: set[asyncio.Task] = set()
+        self._seq = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def send(
+        self, chat_id: int, *parts: str, priority: SendPriority = SendPriority.INTERACTIVE,
+    ) -> None:
+        """Queue *parts* (reply, debug block, ...) for *chat_id* and wait until sent.
+
+        Parts are packed into as few messages as fit. Raises the Telegram
+        error if a message could not be delivered.
+        """
+        messages = pack_messages(list(parts))
+        if not messages:
+            return
+        await asyncio.gather(*(
+            self._enqueue(chat_id, priority, lambda text=text: self._bot.send_message(chat_id, text))
+            for text in messages
+        ))
+
+    async def send_message(
+        self, chat_id: int, text: str, priority: SendPriority = SendPriority.INTERACTIVE,
+    ) -> Any:
+        """Send one message as is and return Telegram's Message."""
+        return await self._enqueue(chat_id, priority, lambda: self._bot.send_message(chat_id, text))
+
+    async def edit_text(
+        self, chat_id: int, message_id: int, text: str,
+        priority: SendPriority = SendPriority.INTERACTIVE,
+    ) -> Any:
+        """Replace the text of a sent message."""
+        return await self._enqueue(
+            chat_id, priority,
+            lambda: self._bot.edit_message_text(text, chat_id=chat_id, message_id=message_id),
+        )
+
+    def _enqueue(
+        self, chat_id: int, priority: SendPriority, call: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._driver is None or self._driver.done():
+            self._driver = loop.create_task(self._drive())
+        fut = loop.create_future()
+        self._queues.setdefault(chat_id, deque()).append(
+            _Outgoing(int(priority), self._seq, chat_id, call, fut)
+        )
+        self._seq += 1
+        self._wakeup.set()
+        return fut
+
+    async def _drive(self) -> None:
+        while True:
+            now = time.monotonic()
+            best: _Outgoing | None = None
+            next_wake = float("inf")
+            for chat_id, queue in self._queues.items():
+                if chat_id in self._in_flight or not queue:
+                    continue
+                wait = max(
+                    self._bucket(chat_id).wait_time(now),
+                    self._blocked_until.get(chat_id, 0.0) - now,
+                )
+                if wait > 0:
+                    next_wake = min(next_wake, wait)
+                elif best is None or queue[0] < best:
+                    best = queue[0]
+
+            if best is None:
+                self._prune(now)
+                self._wakeup.clear()
+                timeout = None if next_wake == float("inf") else next_wake
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
+                continue
+
+            global_wait = max(self._global.wait_time(now), self._global_blocked_until - now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            self._global.take(now)
+            self._bucket(best.chat_id).take(now)
+            self._queues[best.chat_id].popleft()
+            self._in_flight.add(best.chat_id)
+            task = asyncio.create_task(self._deliver(best))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, item: _Outgoing) -> None:
+        try:
+            result = await item.call()
+        except TelegramRetryAfter as e:
+            item.attempts += 1
+            if item.attempts > self.MAX_RETRIES:
+                self.failed += 1
+                item.future.set_exception(e)
+            else:
+                self.retried += 1
+                logger.warning("Flood control for chat %s, retry in %ss", item.chat_id, e.retry_after)
+                # Flood waits are per bot as well: hold back every chat, not just this one
+                until = time.monotonic() + e.retry_after
+                self._blocked_until[item.chat_id] = until
+                self._global_blocked_until = max(self._global_blocked_until, until)
+                self._queues.setdefault(item.chat_id, deque()).appendleft(item)
+        except Exception as e:
+            self.failed += 1
+            item.future.set_exception(e)
+        else:
+            self.sent += 1
+            item.future.set_result(result)
+        finally:
+            self._in_flight.discard(item.chat_id)
+            if not self._queues.get(item.chat_id):
+                self._queues.pop(item.chat_id, None)
+                self._blocked_until.pop(item.chat_id, None)
+            self._wakeup.set()
+
+    def _bucket(self, chat_id: int) -> RateBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = RateBucket(self._chat_rate, self._chat_burst)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        """Forget idle chats whose bucket has refilled (equivalent to a new one)."""
+        if len(self._chat_buckets) <= self.MAX_IDLE_BUCKETS:
+            return
+        for chat_id in [c for c, b in self._chat_buckets.items() if b.full(now)]:
+            if chat_id not in self._queues:
+                del self._chat_buckets[chat_id]
+
+    async def close(self) -> None:
+        if self._driver is not None:
+            self._driver.cancel()
+            await asyncio.gather(self._driver, return_exceptions=True)
+            self._driver = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": sum(len(q) for q in self._queues.values()),
+            "chats_waiting": len(self._queues),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
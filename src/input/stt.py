@@ -2,82 +2,147 @@
 
 Download voice from Telegram, send to Deepgram API, return text.
 Graceful degradation: if Deepgram is unavailable, return error message.
+Audio is streamed from Telegram straight into the Deepgram upload
+(chunked transfer), without temp files or full in-memory copies.
+With a TranscriptCache and the file's file_unique_id, repeats skip both.
+
+Live mode streams the same bytes over Deepgram's WebSocket API instead:
+no overall upload timeout, and interim transcripts arrive while the voice
+note is still downloading.
 """
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import os
-import tempfile
-from pathlib import Path
-from typing import TYPE_CHECKING
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Awaitable, Callable
+from urllib.parse import urlencode
 
 if TYPE_CHECKING:
     from aiogram import Bot
 
+    from src.input.transcript_cache import TranscriptCache
+
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 64 * 1024
+
+DEEPGRAM_MODEL = "nova-2"
+DEEPGRAM_LANGUAGE = "ru"
+
+DEEPGRAM_LIVE_URL = "wss://api.deepgram.com/v1/listen"
+LIVE_IDLE_TIMEOUT_SEC = 15.0
+
 
 class STTError(Exception):
     """Raised when speech-to-text fails."""
 
 
-async def _download_telegram_file(bot: "Bot", file_id: str) -> str:
-    """Download file from Telegram, return temp file path."""
-    file = await bot.get_file(file_id)
-    with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as tmp:
-        tmp_path = tmp.name
-    await bot.download_file(file.file_path, tmp_path)
-    return tmp_path
+@dataclass
+class TranscriptUpdate:
+    """One live transcription result; interim ones may still be revised."""
+    text: str
+    is_final: bool
+
 
+async def _open_telegram_stream(
+    bot: "Bot", file_id: str, chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Resolve *file_id* and return an async iterator over the file's bytes.
 
-async def transcribe_voice(bot: "Bot", file_id: str) -> str:
+    File lookup happens here, so a missing/unreachable file fails before
+    any upload starts; the bytes themselves are fetched lazily.
+    """
+    file = await bot.get_file(file_id)
+    return _iter_telegram_file(bot, file.file_path, chunk_size)
+
+
+async def _iter_telegram_file(bot: "Bot", file_path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    api = bot.session.api
+    if api.is_local:
+        # Local Bot API server: the file is already on our disk
+        buf = await bot.download_file(file_path, chunk_size=chunk_size)
+        yield buf.getvalue()
+        return
+    url = api.file_url(bot.token, file_path)
+    async for chunk in bot.session.stream_content(
+        url=url, chunk_size=chunk_size, raise_for_status=True,
+    ):
+        yield chunk
+
+
+async def transcribe_voice(
+    bot: "Bot",
+    file_id: str,
+    file_unique_id: str = "",
+    cache: "TranscriptCache | None" = None,
+    live: bool = False,
+    on_interim: Callable[[str], Awaitable[None]] | None = None,
+) -> str:
     """Download voice file from Telegram and transcribe via Deepgram.
 
+    live=True uses the WebSocket streaming API; on_interim then receives
+    the running transcript as it is recognized.
+
     Returns transcribed text.
     Raises STTError on failure.
     """
+    use_cache = cache is not None and bool(file_unique_id)
+    if use_cache:
+        cached = cache.get(file_unique_id, DEEPGRAM_MODEL, DEEPGRAM_LANGUAGE)
+        if cached is not None:
+            return cached
+
     api_key = os.getenv("DEEPGRAM_API_KEY", "")
     if not api_key:
         raise STTError("DEEPGRAM_API_KEY is not set")
 
-    # Download from Telegram
-    tmp_path = ""
+    # Resolve the file on Telegram (bytes are streamed during upload)
     try:
-        tmp_path = await _download_telegram_file(bot, file_id)
+        audio = await _open_telegram_stream(bot, file_id)
     except Exception as e:
         raise STTError(f"Failed to download voice from Telegram: {e}") from e
 
     # Transcribe with Deepgram
     try:
-        text = await _deepgram_transcribe(api_key, tmp_path, "audio/ogg")
+        if live:
+            text = await _deepgram_live_transcribe(api_key, audio, on_interim)
+        else:
+            text = await _deepgram_transcribe(api_key, audio, "audio/ogg")
         if not text:
             raise STTError("Deepgram returned empty transcript")
+        if use_cache:
+            cache.put(file_unique_id, DEEPGRAM_MODEL, DEEPGRAM_LANGUAGE, text)
         return text
     except STTError:
         raise
     except Exception as e:
         raise STTError(f"Deepgram transcription failed: {e}") from e
     finally:
-        if tmp_path:
-            Path(tmp_path).unlink(missing_ok=True)
+        await audio.aclose()
 
 
-async def _deepgram_transcribe(api_key: str, file_path: str, mimetype: str) -> str:
-    """Call Deepgram REST API to transcribe audio file."""
-    import httpx
+async def _deepgram_transcribe(
+    api_key: str, audio: bytes | AsyncIterable[bytes], mimetype: str,
+) -> str:
+    """Call Deepgram REST API to transcribe audio.
 
-    with open(file_path, "rb") as f:
-        audio_data = f.read()
+    *audio* may be bytes or an async byte stream; streams are uploaded with
+    chunked transfer encoding as they are produced.
+    """
+    import httpx
 
     async with httpx.AsyncClient() as client:
         resp = await client.post(
             "https://api.deepgram.com/v1/listen",
-            params={"language": "ru", "model": "nova-2", "smart_format": "true"},
+            params={"language": DEEPGRAM_LANGUAGE, "model": DEEPGRAM_MODEL, "smart_format": "true"},
             headers={
                 "Authorization": f"Token {api_key}",
                 "Content-Type": mimetype,
             },
-            content=audio_data,
+            content=audio,
             timeout=30.0,
         )
         resp.raise_for_status()
@@ -85,6 +150,91 @@ async def _deepgram_transcribe(api_key: str, file_path: str, mimetype: str) -> s
         return data["results"]["channels"][0]["alternatives"][0]["transcript"]
 
 
+async def stream_deepgram(
+    api_key: str,
+    audio: AsyncIterable[bytes],
+    url: str = DEEPGRAM_LIVE_URL,
+    idle_timeout: float = LIVE_IDLE_TIMEOUT_SEC,
+) -> AsyncIterator[TranscriptUpdate]:
+    """Stream *audio* to Deepgram live API, yielding results as they arrive.
+
+    Audio is sent from a background task while results are read; after the
+    last chunk a CloseStream message asks Deepgram to flush and close.
+    Raises TimeoutError if the server is silent for *idle_timeout* seconds.
+    """
+    import websockets
+
+    query = urlencode({
+        "language": DEEPGRAM_LANGUAGE,
+        "model": DEEPGRAM_MODEL,
+        "smart_format": "true",
+        "interim_results": "true",
+    })
+    async with websockets.connect(
+        f"{url}?{query}", subprotocols=["token", api_key], max_size=None,
+    ) as ws:
+        sender = asyncio.create_task(_pump_audio(ws, audio))
+        try:
+            while True:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), idle_timeout)
+                except websockets.ConnectionClosedOK:
+                    break
+                except websockets.ConnectionClosedError:
+                    if sender.done():
+                        await sender  # surfaces the audio source error
+                    raise
+                update = _parse_live_message(raw)
+                if update is not None:
+                    yield update
+            if sender.done():
+                await sender
+        finally:
+            # Let the sender finish unwinding before the socket closes, and
+            # retrieve its exception so it is not reported as never retrieved
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+
+async def _pump_audio(ws, audio: AsyncIterable[bytes]) -> None:
+    try:
+        async for chunk in audio:
+            if chunk:
+                await ws.send(chunk)
+    except Exception:
+        await ws.close(1011, "audio source failed")
+        raise
+    await ws.send(json.dumps({"type": "CloseStream"}))
+
+
+def _parse_live_message(raw: str | bytes) -> TranscriptUpdate | None:
+    data = json.loads(raw)
+    if data.get("type") != "Results":
+        return None
+    alternatives = data.get("channel", {}).get("alternatives") or [{}]
+    return TranscriptUpdate(
+        text=alternatives[0].get("transcript", ""),
+        is_final=bool(data.get("is_final")),
+    )
+
+
+async def _deepgram_live_transcribe(
+    api_key: str,
+    audio: AsyncIterable[bytes],
+    on_interim: Callable[[str], Awaitable[None]] | None = None,
+    url: str = DEEPGRAM_LIVE_URL,
+) -> str:
+    """Collect finalized segments from stream_deepgram into one transcript."""
+    finals: list[str] = []
+    async for update in stream_deepgram(api_key, audio, url=url):
+        if update.is_final and update.text:
+            finals.append(update.text)
+        if on_interim is not None:
+            current = finals if update.is_final else [*finals, update.text]
+            await on_interim(" ".join(t for t in current if t))
+    return " ".join(finals)
+
+
 def graceful_stt_error() -> str:
     """User-friendly message when STT fails."""
     return "Не удалось распознать голосовое сообщение. Пришли текстом, пожалуйста."
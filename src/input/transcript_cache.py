@@ -0,0 +1,92 @@
+"""OpenEcho Transcript Cache — atom 1.6.
+
+SQLite cache of STT results keyed by Telegram file_unique_id + model + language.
+Re-forwarded voice/video notes resolve without downloading or paying Deepgram
+again. Entries expire after a TTL; the table is capped at MAX_ENTRIES (LRU).
+A hit only rewrites the entry's last-used time once it is USED_RESOLUTION_SEC
+stale, so repeated hits do not each cost a write and commit.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+
+class TranscriptCache:
+    """Size-bounded SQLite transcript cache with TTL."""
+
+    TTL_SEC = 30 * 24 * 3600.0
+    MAX_ENTRIES = 10_000
+    USED_RESOLUTION_SEC = 60.0  # LRU precision; finer costs a commit per hit
+
+    def __init__(
+        self,
+        db_path: str | Path = "transcripts.db",
+        ttl: float | None = None,
+        max_entries: int | None = None,
+    ) -> None:
+        self._db_path = str(db_path)
+        self._ttl = self.TTL_SEC if ttl is None else ttl
+        self._max_entries = max_entries or self.MAX_ENTRIES
+        self._conn: sqlite3.Connection | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self) -> None:
+        self._conn = sqlite3.connect(self._db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                created REAL NOT NULL,
+                used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS transcripts_used ON transcripts(used);
+        """)
+
+    @staticmethod
+    def _key(file_unique_id: str, model: str, language: str) -> str:
+        return f"{file_unique_id}:{model}:{language}"
+
+    def get(self, file_unique_id: str, model: str, language: str) -> str | None:
+        """Return cached transcript, or None if missing or expired."""
+        assert self._conn
+        key = self._key(file_unique_id, model, language)
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT text, used FROM transcripts WHERE key = ? AND created > ?",
+            (key, now - self._ttl),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if now - row[1] >= self.USED_RESOLUTION_SEC:
+            self._conn.execute("UPDATE transcripts SET used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def put(self, file_unique_id: str, model: str, language: str, text: str) -> None:
+        """Store a transcript, dropping expired and least recently used rows."""
+        assert self._conn
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO transcripts (key, text, created, used) VALUES (?,?,?,?)",
+            (self._key(file_unique_id, model, language), text, now, now),
+        )
+        self._conn.execute("DELETE FROM transcripts WHERE created <= ?", (now - self._ttl,))
+        self._conn.execute(
+            "DELETE FROM transcripts WHERE key IN "
+            "(SELECT key FROM transcripts ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+        self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
@@ -2,67 +2,217 @@
 
 Download video/video_note from Telegram, extract audio with ffmpeg, transcribe via Deepgram.
 Graceful degradation: if ffmpeg or Deepgram fails, return error message.
+ffmpeg runs as an asyncio subprocess in a bounded pool, so transcodes never
+block the event loop and several video notes can be processed at once.
+The video is downloaded into memory first, so the ffmpeg timeout and pool
+slot cover transcoding only. It is piped into ffmpeg's stdin and the audio
+read from its stdout. MP4 read from a pipe needs its moov atom up front
+(faststart); if ffmpeg can't read it, the job is retried from a seekable
+temp file.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
-import subprocess
 import tempfile
-from pathlib import Path
-from typing import TYPE_CHECKING
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterable
 
-from src.input.stt import STTError, _deepgram_transcribe, _download_telegram_file
+from src.input.stt import (
+    DEEPGRAM_LANGUAGE,
+    DEEPGRAM_MODEL,
+    STTError,
+    _deepgram_transcribe,
+    _open_telegram_stream,
+)
 
 if TYPE_CHECKING:
     from aiogram import Bot
 
+    from src.input.transcript_cache import TranscriptCache
+
 logger = logging.getLogger(__name__)
 
+FFMPEG_TIMEOUT_SEC = 30.0
+AUDIO_ARGS = ["-vn", "-acodec", "libopus", "-f", "ogg", "pipe:1"]
+
+
+class FFmpegPool:
+    """Runs ffmpeg jobs as subprocesses, at most *max_workers* at a time."""
+
+    MAX_WORKERS = 2
+    BINARY = "ffmpeg"
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self._sem = asyncio.Semaphore(self.max_workers)
+        self.queued = 0
+        self.running = 0
+        self.jobs = 0
+        self.failures = 0
+        self._timings: deque[tuple[float, float]] = deque(maxlen=100)  # (wait_ms, run_ms)
+
+    async def run(
+        self,
+        args: list[str],
+        timeout: float = FFMPEG_TIMEOUT_SEC,
+        input: bytes | AsyncIterable[bytes] | None = None,
+    ) -> tuple[int, bytes, bytes]:
+        """Run ffmpeg with *args*. Returns (returncode, stdout, stderr).
+
+        *input* is written to stdin; an async byte stream is fed while stdout
+        is being read, so the source never has to be buffered whole.
+        Raises TimeoutError if the job exceeds *timeout*; the process is
+        killed on timeout and on cancellation.
+        """
+        queued_at = time.monotonic()
+        self.queued += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.queued -= 1
+        started = time.monotonic()
+        self.running += 1
+        ok = False
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.BINARY, *args,
+                stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                if input is None or isinstance(input, bytes):
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(input), timeout)
+                else:
+                    _, stdout, stderr = await asyncio.wait_for(
+                        asyncio.gather(_feed(proc, input), proc.stdout.read(), proc.stderr.read()),
+                        timeout,
+                    )
+                    await proc.wait()
+            except BaseException:
+                _kill(proc)
+                await proc.wait()
+                raise
+            ok = proc.returncode == 0
+            return proc.returncode, stdout, stderr
+        finally:
+            self.running -= 1
+            self.jobs += 1
+            if not ok:
+                self.failures += 1
+            finished = time.monotonic()
+            self._timings.append(((started - queued_at) * 1000, (finished - started) * 1000))
+            self._sem.release()
+
+    def stats(self) -> dict[str, Any]:
+        run_ms = [r for _, r in self._timings]
+        wait_ms = [w for w, _ in self._timings]
+        return {
+            "max_workers": self.max_workers,
+            "queued": self.queued,
+            "running": self.running,
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "avg_run_ms": round(sum(run_ms) / len(run_ms), 1) if run_ms else 0.0,
+            "max_run_ms": round(max(run_ms), 1) if run_ms else 0.0,
+            "avg_wait_ms": round(sum(wait_ms) / len(wait_ms), 1) if wait_ms else 0.0,
+        }
+
+
+async def _feed(proc: asyncio.subprocess.Process, source: AsyncIterable[bytes]) -> None:
+    """Copy *source* into the process stdin, then close it."""
+    try:
+        async for chunk in source:
+            proc.stdin.write(chunk)
+            await proc.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # ffmpeg exited early; its stderr and returncode tell why
+    finally:
+        proc.stdin.close()
+
+
+def _kill(proc: asyncio.subprocess.Process) -> None:
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+_pool = FFmpegPool()
+
+
+def get_ffmpeg_pool() -> FFmpegPool:
+    return _pool
+
+
+async def _extract_audio(video: bytes) -> bytes:
+    """Audio track of *video* as ogg/opus; raises STTError if ffmpeg fails."""
+    returncode, audio, stderr = await _pool.run(
+        ["-i", "pipe:0", *AUDIO_ARGS], timeout=FFMPEG_TIMEOUT_SEC, input=video,
+    )
+    if returncode == 0:
+        return audio
 
-async def transcribe_video(bot: "Bot", file_id: str, api_key: str = "") -> str:
+    # Non-faststart MP4 (moov atom at the end) can't be read from a pipe
+    logger.info("ffmpeg could not read video from stdin, retrying from a temp file")
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as f:
+        await asyncio.to_thread(f.write, video)
+        await asyncio.to_thread(f.flush)
+        returncode, audio, stderr = await _pool.run(
+            ["-i", f.name, *AUDIO_ARGS], timeout=FFMPEG_TIMEOUT_SEC,
+        )
+    if returncode != 0:
+        raise STTError(f"ffmpeg failed: {stderr.decode(errors='replace')[:200]}")
+    return audio
+
+
+async def transcribe_video(
+    bot: "Bot",
+    file_id: str,
+    api_key: str = "",
+    file_unique_id: str = "",
+    cache: "TranscriptCache | None" = None,
+) -> str:
     """Download video from Telegram, extract audio via ffmpeg, transcribe.
 
     Returns transcribed text.
     Raises STTError on failure.
     """
+    use_cache = cache is not None and bool(file_unique_id)
+    if use_cache:
+        cached = cache.get(file_unique_id, DEEPGRAM_MODEL, DEEPGRAM_LANGUAGE)
+        if cached is not None:
+            return cached
+
     import os
     if not api_key:
         api_key = os.getenv("DEEPGRAM_API_KEY", "")
     if not api_key:
         raise STTError("DEEPGRAM_API_KEY is not set")
 
-    video_path = ""
-    audio_path = ""
+    video = None
     try:
-        # Download video from Telegram
-        video_path = await _download_telegram_file(bot, file_id)
-
-        # Extract audio with ffmpeg
-        with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as tmp:
-            audio_path = tmp.name
-
-        result = subprocess.run(
-            ["ffmpeg", "-i", video_path, "-vn", "-acodec", "libopus", "-y", audio_path],
-            capture_output=True,
-            timeout=30,
-        )
-        if result.returncode != 0:
-            raise STTError(f"ffmpeg failed: {result.stderr.decode()[:200]}")
+        # Download before taking an ffmpeg slot; keep only the audio
+        video = await _open_telegram_stream(bot, file_id)
+        data = b"".join([chunk async for chunk in video])
+        audio = await _extract_audio(data)
 
         # Transcribe with Deepgram
-        text = await _deepgram_transcribe(api_key, audio_path, "audio/ogg")
+        text = await _deepgram_transcribe(api_key, audio, "audio/ogg")
         if not text:
             raise STTError("Deepgram returned empty transcript")
+        if use_cache:
+            cache.put(file_unique_id, DEEPGRAM_MODEL, DEEPGRAM_LANGUAGE, text)
         return text
 
     except STTError:
         raise
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         raise STTError("ffmpeg timed out")
     except Exception as e:
         raise STTError(f"Video transcription failed: {e}") from e
     finally:
-        if video_path:
-            Path(video_path).unlink(missing_ok=True)
-        if audio_path:
-            Path(audio_path).unlink(missing_ok=True)
+        if video is not None:
+            await video.aclose()
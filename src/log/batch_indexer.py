@@ -0,0 +1,466 @@
+"""OpenEcho Batch Log Indexer — atom 8.4.
+
+Bulk (re)indexing of many session logs through the Anthropic Message
+Batches API: every chunk of every session becomes one batch request, the
+batch is polled until it ends, and results are streamed back. As soon as
+all chunks of a session are in, its cards are written to MemoryIndex (and
+MemoryVectors, if given).
+
+Progress is checkpointed in SQLite: requests, their batch and their raw
+results. A crashed run resumes with run() on the same checkpoint — already
+submitted batches are polled, not resubmitted, and finished sessions are
+skipped. Each submission is recorded before its POST; if the run dies
+before the batch ID is saved, resume matches the submission against the
+account's batch list (creation time and request count) instead of sending
+the same requests twice.
+
+Run from the command line to index the history of a log directory:
+
+    python -m src.log.batch_indexer logs/sessions --memory-db memory.db
+
+Sessions the incremental indexer has a mark for (--offsets) are indexed
+only up to that mark; it covers everything after.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from src.log.indexer import (
+    assign_card_ids, card_prefix, chunk_log, format_chunk, load_prompt, parse_cards, store_cards,
+)
+from src.log.raw import RawSessionLog
+from src.memory.index import MemoryIndex
+from src.skill_runtime.llm import (
+    MODEL_MAP, LLMError, api_url, cached_system, close_client, get_client,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+    from src.memory.vectors import MemoryVectors
+
+logger = logging.getLogger(__name__)
+
+BATCHES_PATH = "/v1/messages/batches"
+
+
+class BatchIndexer:
+    """Checkpointed bulk indexer on the Message Batches API."""
+
+    MAX_REQUESTS_PER_BATCH = 10_000
+    POLL_INTERVAL_SEC = 30.0
+    MAX_ATTEMPTS = 3  # submissions per chunk before its result is given up as empty
+    CLOCK_SKEW_SEC = 300.0  # slack when matching local submission times to created_at
+
+    def __init__(
+        self,
+        index: MemoryIndex,
+        vectors: "MemoryVectors | None" = None,
+        checkpoint_path: str | Path = "batch_index.db",
+        model: str = "haiku",
+        max_tokens: int = 2000,
+        api_key: str | None = None,
+        client: "httpx.AsyncClient | None" = None,
+    ) -> None:
+        self._index = index
+        self._vectors = vectors
+        self._db_path = str(checkpoint_path)
+        self._model = MODEL_MAP.get(model, model)
+        self._max_tokens = max_tokens
+        self._api_key = api_key
+        self._client = client
+        self._conn: sqlite3.Connection | None = None
+
+    def connect(self) -> None:
+        self._conn = sqlite3.connect(self._db_path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS batch_requests (
+                custom_id TEXT PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                chunk INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                batch_id TEXT,
+                attempts INTEGER DEFAULT 0,
+                result TEXT,
+                done INTEGER DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS batch_requests_session ON batch_requests(session_id);
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS submissions (
+                marker TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                requests INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS indexed_sessions (
+                session_id TEXT PRIMARY KEY,
+                cards INTEGER NOT NULL
+            );
+        """)
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    async def run(
+        self,
+        sessions: dict[str, list[dict[str, Any]]],
+        poll_interval: float | None = None,
+        max_wait: float | None = None,
+    ) -> int:
+        """Index *sessions* ({session_id: messages}). Returns sessions completed.
+
+        Stops polling after *max_wait* seconds (None = until done); calling
+        run() again later resumes from the checkpoint.
+        """
+        self._plan(sessions)
+        await self._reconcile_submissions()
+        await self._submit_pending()
+        return await self._collect(
+            self.POLL_INTERVAL_SEC if poll_interval is None else poll_interval, max_wait,
+        )
+
+    def _plan(self, sessions: dict[str, list[dict[str, Any]]]) -> None:
+        """Record one request per chunk for sessions not seen before."""
+        assert self._conn
+        known = {
+            row[0] for row in self._conn.execute(
+                "SELECT session_id FROM batch_requests UNION SELECT session_id FROM indexed_sessions"
+            )
+        }
+        for session_id, messages in sessions.items():
+            if session_id in known or not messages:
+                continue
+            for i, chunk in enumerate(chunk_log(messages)):
+                # custom_id must match [a-zA-Z0-9_-]{1,64}; session IDs may not
+                self._conn.execute(
+                    "INSERT INTO batch_requests (custom_id, session_id, chunk, body) VALUES (?,?,?,?)",
+                    (uuid.uuid4().hex, session_id, i, format_chunk(chunk)),
+                )
+        self._conn.commit()
+
+    async def _submit_pending(self) -> None:
+        assert self._conn
+        system = cached_system(load_prompt())
+        while True:
+            rows = self._conn.execute(
+                "SELECT custom_id, body FROM batch_requests "
+                "WHERE batch_id IS NULL AND done = 0 LIMIT ?",
+                (self.MAX_REQUESTS_PER_BATCH,),
+            ).fetchall()
+            if not rows:
+                return
+            requests = [
+                {
+                    "custom_id": row["custom_id"],
+                    "params": {
+                        "model": self._model,
+                        "max_tokens": self._max_tokens,
+                        "system": system,
+                        "messages": [{"role": "user", "content": row["body"]}],
+                    },
+                }
+                for row in rows
+            ]
+            # Claim the rows under a marker first: if we die between the POST
+            # and saving its batch ID, resume reconciles instead of resubmitting
+            marker = f"submitting_{uuid.uuid4().hex}"
+            self._conn.execute(
+                "INSERT INTO submissions (marker, created_at, requests) VALUES (?, ?, ?)",
+                (marker, datetime.now(timezone.utc).isoformat(), len(rows)),
+            )
+            self._conn.executemany(
+                "UPDATE batch_requests SET batch_id = ? WHERE custom_id = ?",
+                [(marker, row["custom_id"]) for row in rows],
+            )
+            self._conn.commit()
+            data = await self._request("POST", BATCHES_PATH, json={"requests": requests})
+            self._adopt(marker, data["id"], data.get("processing_status", "in_progress"))
+            logger.info("Submitted batch %s with %d requests", data["id"], len(rows))
+
+    def _adopt(self, marker: str, batch_id: str, status: str) -> None:
+        """Move a submission's requests from its marker to the created batch."""
+        assert self._conn
+        self._conn.execute(
+            "INSERT OR REPLACE INTO batches (batch_id, status) VALUES (?, ?)", (batch_id, status),
+        )
+        self._conn.execute(
+            "UPDATE batch_requests SET batch_id = ?, attempts = attempts + 1 WHERE batch_id = ?",
+            (batch_id, marker),
+        )
+        self._conn.execute("DELETE FROM submissions WHERE marker = ?", (marker,))
+        self._conn.commit()
+
+    async def _reconcile_submissions(self) -> None:
+        """Resolve submissions whose POST outcome was never recorded.
+
+        Each is matched to an unknown batch on the account created no earlier
+        than the submission (less CLOCK_SKEW_SEC) with the same request count.
+        Unmatched submissions never reached the API and are queued again.
+        """
+        assert self._conn
+        markers = self._conn.execute(
+            "SELECT marker, created_at, requests FROM submissions ORDER BY created_at"
+        ).fetchall()
+        if not markers:
+            return
+        skew = timedelta(seconds=self.CLOCK_SKEW_SEC)
+        earliest = datetime.fromisoformat(markers[0]["created_at"]) - skew
+        known = {row[0] for row in self._conn.execute("SELECT batch_id FROM batches")}
+
+        candidates: list[dict[str, Any]] = []
+        params: dict[str, Any] = {"limit": 100}
+        while True:  # newest first; stop once pages are older than any marker
+            page = await self._request("GET", BATCHES_PATH, params=params)
+            batches = page.get("data", [])
+            candidates.extend(b for b in batches if b["id"] not in known)
+            if not page.get("has_more") or not batches or _created_at(batches[-1]) < earliest:
+                break
+            params["after_id"] = page["last_id"]
+        candidates.sort(key=_created_at)
+
+        for row in markers:
+            since = datetime.fromisoformat(row["created_at"]) - skew
+            match = next((
+                b for b in candidates
+                if _created_at(b) >= since
+                and sum(b.get("request_counts", {}).values()) == row["requests"]
+            ), None)
+            if match is not None:
+                candidates.remove(match)
+                self._adopt(row["marker"], match["id"], match.get("processing_status", "in_progress"))
+                logger.info("Recovered unrecorded batch %s", match["id"])
+            else:
+                logger.warning("Submission %s has no batch, requeueing", row["marker"])
+                self._conn.execute(
+                    "UPDATE batch_requests SET batch_id = NULL WHERE batch_id = ?", (row["marker"],),
+                )
+                self._conn.execute("DELETE FROM submissions WHERE marker = ?", (row["marker"],))
+                self._conn.commit()
+
+    async def _collect(self, poll_interval: float, max_wait: float | None) -> int:
+        """Poll open batches; ingest results of ended ones. Returns sessions completed."""
+        assert self._conn
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        completed = 0
+        while True:
+            open_batches = [
+                row[0] for row in self._conn.execute(
+                    "SELECT batch_id FROM batches WHERE status != 'ingested'"
+                )
+            ]
+            if not open_batches:
+                break
+            for batch_id in open_batches:
+                data = await self._request("GET", f"{BATCHES_PATH}/{batch_id}")
+                if data.get("processing_status") == "ended":
+                    completed += await self._ingest(batch_id, data["results_url"])
+            # Failed requests were reset for another attempt
+            await self._submit_pending()
+            if not self._conn.execute(
+                "SELECT 1 FROM batches WHERE status != 'ingested' LIMIT 1"
+            ).fetchone():
+                break
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                break
+            await asyncio.sleep(poll_interval)
+        return completed
+
+    async def _ingest(self, batch_id: str, results_url: str) -> int:
+        """Stream a batch's JSONL results into the checkpoint and memory."""
+        assert self._conn
+        completed = 0
+        async with self._http().stream("GET", results_url, headers=self._headers()) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                row = self._conn.execute(
+                    "SELECT session_id, attempts FROM batch_requests WHERE custom_id = ? AND batch_id = ?",
+                    (entry["custom_id"], batch_id),
+                ).fetchone()
+                if row is None:
+                    continue
+                result = entry.get("result", {})
+                if result.get("type") == "succeeded":
+                    text = result["message"]["content"][0]["text"]
+                    self._finish_request(entry["custom_id"], text)
+                elif row["attempts"] < self.MAX_ATTEMPTS:
+                    logger.warning("Batch request %s %s, will resubmit",
+                                   entry["custom_id"], result.get("type"))
+                    self._conn.execute(
+                        "UPDATE batch_requests SET batch_id = NULL WHERE custom_id = ?",
+                        (entry["custom_id"],),
+                    )
+                else:
+                    logger.error("Batch request %s failed: %s", entry["custom_id"], result)
+                    self._finish_request(entry["custom_id"], None)
+                self._conn.commit()
+                if self._store_if_complete(row["session_id"]):
+                    completed += 1
+        # Requests the batch had no result for (e.g. a mis-recovered batch) go out again
+        self._conn.execute(
+            "UPDATE batch_requests SET batch_id = NULL WHERE batch_id = ? AND done = 0", (batch_id,),
+        )
+        self._conn.execute("UPDATE batches SET status = 'ingested' WHERE batch_id = ?", (batch_id,))
+        self._conn.commit()
+        return completed
+
+    def _finish_request(self, custom_id: str, result: str | None) -> None:
+        assert self._conn
+        self._conn.execute(
+            "UPDATE batch_requests SET result = ?, done = 1 WHERE custom_id = ?", (result, custom_id),
+        )
+
+    def _store_if_complete(self, session_id: str) -> bool:
+        """Write the session's cards once every chunk has a result."""
+        assert self._conn
+        rows = self._conn.execute(
+            "SELECT chunk, result, done FROM batch_requests WHERE session_id = ? ORDER BY chunk",
+            (session_id,),
+        ).fetchall()
+        if not rows or not all(r["done"] for r in rows):
+            return False
+
+        chunk_cards: list[list[dict[str, Any]]] = []
+        for r in rows:
+            try:
+                chunk_cards.append(parse_cards(r["result"]) if r["result"] else [])
+            except Exception as e:
+                logger.error("Bad cards for %s chunk %d: %s", session_id, r["chunk"], e)
+                chunk_cards.append([])
+        cards = assign_card_ids(card_prefix(session_id), chunk_cards)
+        store_cards(cards, self._index, self._vectors, source=session_id)
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO indexed_sessions (session_id, cards) VALUES (?, ?)",
+            (session_id, len(cards)),
+        )
+        self._conn.execute("DELETE FROM batch_requests WHERE session_id = ?", (session_id,))
+        self._conn.commit()
+        return True
+
+    def stats(self) -> dict[str, int]:
+        assert self._conn
+        one = lambda sql: self._conn.execute(sql).fetchone()[0]  # noqa: E731
+        return {
+            "sessions_indexed": one("SELECT COUNT(*) FROM indexed_sessions"),
+            "requests_pending": one("SELECT COUNT(*) FROM batch_requests WHERE done = 0"),
+            "batches_open": one("SELECT COUNT(*) FROM batches WHERE status != 'ingested'"),
+        }
+
+    def _http(self) -> "httpx.AsyncClient":
+        return self._client or get_client()
+
+    def _headers(self) -> dict[str, str]:
+        key = self._api_key or os.getenv("ANTHROPIC_API_KEY", "")
+        if not key:
+            raise LLMError("ANTHROPIC_API_KEY is not set")
+        return {
+            "x-api-key": key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:
+        resp = await self._http().request(
+            method, api_url(path), headers=self._headers(), timeout=60.0, **kwargs,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+
+def _created_at(batch: dict[str, Any]) -> datetime:
+    return datetime.fromisoformat(batch["created_at"].replace("Z", "+00:00"))
+
+
+def load_history(
+    log: RawSessionLog, offsets_path: str | Path | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """Messages of every session in *log*, for BatchIndexer.run().
+
+    If *offsets_path* is an IncrementalIndexer checkpoint, sessions it has a
+    mark for are cut at the mark (and left out if it is 0), so the two
+    indexers never cover the same messages.
+    """
+    marks: dict[str, int] = {}
+    if offsets_path is not None and Path(offsets_path).exists():
+        conn = sqlite3.connect(str(offsets_path))
+        try:
+            marks = dict(conn.execute("SELECT session_id, msg_count FROM log_offsets"))
+        except sqlite3.OperationalError:
+            pass  # not an incremental checkpoint yet
+        finally:
+            conn.close()
+
+    sessions = {}
+    for session_id in log.sessions():
+        messages, _ = log.read_from(session_id, 0)
+        if session_id in marks:
+            messages = messages[:marks[session_id]]
+        if messages:
+            sessions[session_id] = messages
+    return sessions
+
+
+async def _run_cli(args: argparse.Namespace) -> int:
+    sessions = load_history(RawSessionLog(args.logs_dir), args.offsets)
+    index = MemoryIndex(args.memory_db)
+    index.connect()
+    indexer = BatchIndexer(index, checkpoint_path=args.checkpoint, model=args.model)
+    indexer.connect()
+    try:
+        completed = await indexer.run(sessions, poll_interval=args.poll, max_wait=args.max_wait)
+        logger.info("Indexed %d sessions: %s", completed, indexer.stats())
+        return completed
+    finally:
+        indexer.close()
+        index.close()
+        await close_client()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point. Returns the exit status."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.log.batch_indexer",
+        description="Bulk-index session logs into memory through the Message Batches API.",
+    )
+    parser.add_argument("logs_dir", help="directory of <session>.jsonl logs")
+    parser.add_argument("--memory-db", default="memory.db")
+    parser.add_argument("--checkpoint", default="batch_index.db",
+                        help="resumable progress; rerun with the same path after a crash")
+    parser.add_argument("--offsets", default="log_index.db",
+                        help="incremental indexer checkpoint bounding the history")
+    parser.add_argument("--model", default="haiku")
+    parser.add_argument("--poll", type=float, default=BatchIndexer.POLL_INTERVAL_SEC,
+                        help="seconds between batch status checks")
+    parser.add_argument("--max-wait", type=float, default=None,
+                        help="stop polling after this many seconds (resume later)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(_run_cli(args))
+    except LLMError as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
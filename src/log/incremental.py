@@ -0,0 +1,240 @@
+"""OpenEcho Incremental Log Indexer — atom 8.5.
+
+Indexes only what was appended to session logs since the last pass. A
+per-session high-water mark (byte offset + message count) is kept in SQLite.
+Each pass stats the log files, reads just the new tail of those that grew,
+and turns it into index cards. The mark only advances after the cards are
+stored, and a tail with a chunk that failed indexing is retried on the next
+pass, so a crash or an LLM outage means the tail is indexed again (same card
+IDs), never skipped. Failing sessions back off exponentially; after
+MAX_FAILURES passes the tail is indexed with its bad chunks left out, so one
+unindexable chunk cannot make every pass resend the whole tail forever.
+start() runs passes periodically in the background.
+
+With seed_existing, a fresh checkpoint starts every existing log at its
+current end instead of at 0: history is left to a bulk BatchIndexer run
+(python -m src.log.batch_indexer), which stops at these marks.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from src.log.indexer import IndexingError, card_prefix, index_session, store_cards
+
+if TYPE_CHECKING:
+    from src.log.raw import RawSessionLog
+    from src.memory.index import MemoryIndex
+    from src.memory.vectors import MemoryVectors
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalIndexer:
+    """Indexes new session log tails against stored high-water marks."""
+
+    INTERVAL_SEC = 300.0
+    MAX_FAILURES = 3  # failed passes before bad chunks are skipped
+    FAILURE_BACKOFF_SEC = 600.0  # doubled after each failed pass
+
+    def __init__(
+        self,
+        log: "RawSessionLog",
+        index: "MemoryIndex",
+        llm_call: Any,
+        vectors: "MemoryVectors | None" = None,
+        db_path: str | Path = "log_index.db",
+        interval: float | None = None,
+        seed_existing: bool = False,
+    ) -> None:
+        self._log = log
+        self._index = index
+        self._llm_call = llm_call
+        self._vectors = vectors
+        self._db_path = str(db_path)
+        self._interval = interval or self.INTERVAL_SEC
+        self._seed_existing = seed_existing
+        self._conn: sqlite3.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self.passes = 0
+        self.messages_indexed = 0
+        self.cards_indexed = 0
+        self.failed_passes = 0
+
+    def connect(self) -> None:
+        self._conn = sqlite3.connect(self._db_path)
+        fresh = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_offsets'"
+        ).fetchone() is None
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS log_offsets (
+                session_id TEXT PRIMARY KEY,
+                byte_pos INTEGER NOT NULL,
+                msg_count INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS log_failures (
+                session_id TEXT PRIMARY KEY,
+                failures INTEGER NOT NULL,
+                retry_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        if fresh and self._seed_existing:
+            seeded = self.seed()
+            logger.info("Seeded %d existing session logs at their current end", seeded)
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def offset(self, session_id: str) -> tuple[int, int]:
+        """(byte_pos, msg_count) indexed so far for *session_id*."""
+        assert self._conn
+        row = self._conn.execute(
+            "SELECT byte_pos, msg_count FROM log_offsets WHERE session_id = ?", (session_id,),
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def seed(self) -> int:
+        """Mark sessions without a high-water mark as indexed up to their end.
+
+        Returns the number of sessions seeded.
+        """
+        assert self._conn
+        seeded = 0
+        for session_id in self._log.sessions():
+            if self._conn.execute(
+                "SELECT 1 FROM log_offsets WHERE session_id = ?", (session_id,),
+            ).fetchone():
+                continue
+            messages, end = self._log.read_from(session_id, 0)
+            self._save_offset(session_id, end, len(messages))
+            seeded += 1
+        return seeded
+
+    def _save_offset(self, session_id: str, byte_pos: int, msg_count: int) -> None:
+        assert self._conn
+        self._conn.execute(
+            "INSERT OR REPLACE INTO log_offsets (session_id, byte_pos, msg_count, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            (session_id, byte_pos, msg_count, datetime.now(timezone.utc).isoformat()),
+        )
+        self._conn.commit()
+
+    def failures(self, session_id: str) -> tuple[int, float]:
+        """(failed passes in a row, epoch time before which not to retry)."""
+        assert self._conn
+        row = self._conn.execute(
+            "SELECT failures, retry_at FROM log_failures WHERE session_id = ?", (session_id,),
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, 0.0)
+
+    def _record_failure(self, session_id: str) -> None:
+        assert self._conn
+        failures = self.failures(session_id)[0] + 1
+        retry_at = time.time() + self.FAILURE_BACKOFF_SEC * 2 ** (failures - 1)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO log_failures (session_id, failures, retry_at) VALUES (?, ?, ?)",
+            (session_id, failures, retry_at),
+        )
+        self._conn.commit()
+
+    def _clear_failures(self, session_id: str) -> None:
+        assert self._conn
+        self._conn.execute("DELETE FROM log_failures WHERE session_id = ?", (session_id,))
+        self._conn.commit()
+
+    def changed_sessions(self) -> list[str]:
+        """Sessions whose log differs in size from their high-water mark,
+        except those backing off after a failure."""
+        now = time.time()
+        return [
+            sid for sid in self._log.sessions()
+            if self._log.size(sid) != self.offset(sid)[0] and self.failures(sid)[1] <= now
+        ]
+
+    async def index_new(self, session_id: str) -> int:
+        """Index the messages appended to *session_id* since the last pass.
+
+        Returns the number of cards stored.
+        """
+        byte_pos, msg_count = self.offset(session_id)
+        if self._log.size(session_id) < byte_pos:
+            logger.warning("Log for %s shrank, reindexing from the start", session_id)
+            byte_pos, msg_count = 0, 0
+
+        messages, new_pos = self._log.read_from(session_id, byte_pos)
+        if not messages:
+            if new_pos != byte_pos:
+                self._save_offset(session_id, new_pos, msg_count)
+            return 0
+
+        # Card IDs (including any the LLM supplies) are prefixed with the
+        # tail's first message number, so tails never overwrite each other's cards
+        failures = self.failures(session_id)[0]
+        if failures >= self.MAX_FAILURES:
+            logger.warning(
+                "Indexing %s messages %d-%d failed %d times, skipping the bad chunks",
+                session_id, msg_count, msg_count + len(messages) - 1, failures,
+            )
+        cards = await index_session(
+            messages, llm_call=self._llm_call, session_id=card_prefix(session_id, msg_count),
+            strict=failures < self.MAX_FAILURES,
+        )
+        store_cards(cards, self._index, self._vectors, source=session_id)
+        self._save_offset(session_id, new_pos, msg_count + len(messages))
+        if failures:
+            self._clear_failures(session_id)
+        self.messages_indexed += len(messages)
+        self.cards_indexed += len(cards)
+        return len(cards)
+
+    async def run_once(self) -> dict[str, int]:
+        """One pass over every changed session. Returns {session_id: cards}."""
+        results = {}
+        for session_id in self.changed_sessions():
+            try:
+                results[session_id] = await self.index_new(session_id)
+            except IndexingError as e:
+                self.failed_passes += 1
+                self._record_failure(session_id)
+                logger.error("Incremental indexing failed for %s: %s", session_id, e)
+            except Exception:
+                self.failed_passes += 1
+                logger.exception("Incremental indexing failed for %s", session_id)
+        self.passes += 1
+        return results
+
+    def start(self) -> None:
+        """Run passes every interval in a background task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self._interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "passes": self.passes,
+            "messages_indexed": self.messages_indexed,
+            "cards_indexed": self.cards_indexed,
+            "failed_passes": self.failed_passes,
+            "running": self._task is not None and not self._task.done(),
+        }
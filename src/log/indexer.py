@@ -1,19 +1,38 @@
 """OpenEcho Log Indexer — atom 8.3.
 
 Processes session log via LLM to extract index cards for Memory.
+Every chunk shares the same system prompt, sent as a prompt-cache breakpoint.
+Chunks are sent concurrently (bounded) and reassembled in chunk order.
 """
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from src.memory.index import IndexCard, MemoryIndex
+from src.skill_runtime.llm import cached_system
+
+if TYPE_CHECKING:
+    from src.memory.vectors import MemoryVectors
 
 logger = logging.getLogger(__name__)
 
 PROMPT_PATH = Path(__file__).parent / "prompts" / "indexer_prompt.md"
 
+MAX_CONCURRENT_CHUNKS = 4
+CHUNK_RETRIES = 2
+RETRY_DELAY_SEC = 0.5
+
+
+class IndexingError(Exception):
+    """Raised by index_session(strict=True) when chunks stay unindexed after retries."""
 
-def _load_prompt() -> str:
+
+def load_prompt() -> str:
+    """The indexer system prompt (prompts/indexer_prompt.md, or a built-in fallback)."""
     if PROMPT_PATH.exists():
         return PROMPT_PATH.read_text(encoding="utf-8")
     return (
@@ -44,45 +63,127 @@ def chunk_log(messages: list[dict[str, Any]], max_tokens: int = 3000) -> list[li
     return chunks
 
 
+def format_chunk(chunk: list[dict[str, Any]]) -> str:
+    """Render a log chunk as the indexer's user message."""
+    return "\n".join(f"[{m.get('role', '?')}] {m.get('text', '')}" for m in chunk)
+
+
+def parse_cards(raw: str) -> list[dict[str, Any]]:
+    """Parse the LLM's JSON answer (optionally fenced) into a list of cards."""
+    text = raw.strip()
+    if text.startswith("```"):
+        lines = text.split("\n")
+        lines = [l for l in lines if not l.strip().startswith("```")]
+        text = "\n".join(lines)
+    cards = json.loads(text)
+    if isinstance(cards, dict):
+        cards = cards.get("cards", [cards])
+    if not isinstance(cards, list):
+        cards = [cards]
+    return cards
+
+
+def card_prefix(session_id: str, first_message: int = 0) -> str:
+    """Card ID prefix for messages of *session_id* starting at *first_message*.
+
+    Shared by the incremental and batch indexers, so indexing the same
+    messages either way yields the same cards instead of duplicates.
+    """
+    return f"{session_id}_m{first_message}"
+
+
+def assign_card_ids(
+    session_id: str, chunk_cards: list[list[dict[str, Any]]],
+) -> list[dict[str, Any]]:
+    """Flatten per-chunk cards in chunk order, giving every card a scoped ID.
+
+    The ID is "{session_id}_chunk{i}_{n}" where n is the card's position in
+    the flattened list, so it depends only on the results, not on timing.
+    An ID the LLM supplied is kept as the suffix instead of n; it is never
+    used bare, since MemoryIndex.add replaces cards with the same ID.
+    """
+    all_cards: list[dict[str, Any]] = []
+    for i, cards in enumerate(chunk_cards):
+        for card in cards:
+            suffix = card.get("id") or len(all_cards)
+            card["id"] = f"{session_id}_chunk{i}_{suffix}"
+            all_cards.append(card)
+    return all_cards
+
+
+def store_cards(
+    cards: list[dict[str, Any]],
+    index: MemoryIndex,
+    vectors: "MemoryVectors | None" = None,
+    source: str = "",
+) -> None:
+    """Write index cards to MemoryIndex and, if given, MemoryVectors."""
+    for card in cards:
+        index_card = IndexCard(
+            id=str(card["id"]),
+            skill=str(card.get("skill", "")),
+            intent=str(card.get("intent", "")),
+            summary=str(card.get("summary", "")),
+            tags=str(card.get("tags", "")),
+            source=source,
+            timestamp=str(card.get("timestamp", "")),
+        )
+        index.add(index_card)
+        if vectors is not None:
+            vectors.add(index_card.id, index_card.summary, {"skill": index_card.skill, "source": source})
+
+
 async def index_session(
     messages: list[dict[str, Any]],
     llm_call: Any = None,
     session_id: str = "",
+    max_concurrency: int = MAX_CONCURRENT_CHUNKS,
+    retries: int = CHUNK_RETRIES,
+    retry_delay: float | None = None,
+    strict: bool = False,
 ) -> list[dict[str, Any]]:
     """Process session log and return index cards.
 
     Args:
         messages: List of {role, text, timestamp} dicts.
-        llm_call: Async callable(system_prompt, user_message) -> str.
+        llm_call: Async callable(system_prompt, user_message) -> str; the
+                  system prompt arrives as cacheable system blocks. Bind
+                  scheduling options up front, e.g. functools.partial(
+                  call_llm, model="haiku", priority=Priority.BACKGROUND).
         session_id: For card ID generation.
+        max_concurrency: Chunks in flight at once.
+        retries: Extra attempts per chunk after a failed call or bad JSON.
+        retry_delay: Base delay between attempts, doubled each time
+                     (default RETRY_DELAY_SEC).
+        strict: Raise IndexingError if any chunk still fails after its
+                retries, instead of indexing it as empty.
     """
     if not messages or llm_call is None:
         return []
 
-    import json
-    prompt = _load_prompt()
+    prompt = cached_system(load_prompt())
+    if retry_delay is None:
+        retry_delay = RETRY_DELAY_SEC
     chunks = chunk_log(messages)
-    all_cards: list[dict[str, Any]] = []
-
-    for i, chunk in enumerate(chunks):
-        log_text = "\n".join(f"[{m.get('role', '?')}] {m.get('text', '')}" for m in chunk)
-        try:
-            raw = await llm_call(prompt, log_text)
-            text = raw.strip()
-            if text.startswith("```"):
-                lines = text.split("\n")
-                lines = [l for l in lines if not l.strip().startswith("```")]
-                text = "\n".join(lines)
-            cards = json.loads(text)
-            if isinstance(cards, dict):
-                cards = cards.get("cards", [cards])
-            if not isinstance(cards, list):
-                cards = [cards]
-            for card in cards:
-                if not card.get("id"):
-                    card["id"] = f"{session_id}_chunk{i}_{len(all_cards)}"
-            all_cards.extend(cards)
-        except Exception as e:
-            logger.error("Log indexing failed for chunk %d: %s", i, e)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _index_chunk(i: int, chunk: list[dict[str, Any]]) -> list[dict[str, Any]] | None:
+        log_text = format_chunk(chunk)
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    raw = await llm_call(prompt, log_text)
+                return parse_cards(raw)
+            except Exception as e:
+                if attempt == retries:
+                    logger.error("Log indexing failed for chunk %d: %s", i, e)
+                    return None
+                logger.warning("Log indexing chunk %d attempt %d failed: %s", i, attempt + 1, e)
+                await asyncio.sleep(retry_delay * 2 ** attempt)
+        return []
 
-    return all_cards
+    chunk_cards = await asyncio.gather(*(_index_chunk(i, c) for i, c in enumerate(chunks)))
+    failed = sum(cards is None for cards in chunk_cards)
+    if failed and strict:
+        raise IndexingError(f"{failed} of {len(chunks)} chunks of {session_id!r} failed")
+    return assign_card_ids(session_id, [cards or [] for cards in chunk_cards])
@@ -1,6 +1,7 @@
 """OpenEcho Raw Session Log — atom 8.2.
 
 Writes filtered messages to a session log file with timestamps.
+read_from() returns only entries past a byte offset, for incremental readers.
 """
 from __future__ import annotations
 
@@ -40,3 +41,32 @@ class RawSessionLog:
                 if line.strip():
                     entries.append(json.loads(line))
         return entries
+
+    def sessions(self) -> list[str]:
+        """IDs of all sessions with a log file."""
+        return sorted(p.stem for p in self._log_dir.glob("*.jsonl"))
+
+    def size(self, session_id: str) -> int:
+        """Current log file size in bytes (0 if there is none)."""
+        path = self._session_file(session_id)
+        return path.stat().st_size if path.exists() else 0
+
+    def read_from(self, session_id: str, offset: int = 0) -> tuple[list[dict[str, Any]], int]:
+        """Read entries starting at byte *offset*.
+
+        Returns (entries, new_offset). A trailing line without its newline
+        (a write in progress) is left for the next call.
+        """
+        path = self._session_file(session_id)
+        if not path.exists():
+            return [], offset
+        entries = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if line.strip():
+                    entries.append(json.loads(line))
+        return entries, offset
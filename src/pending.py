@@ -1,12 +1,17 @@
 """OpenEcho Pending Confirmation — atoms 4.1, 4.2, 4.3.
 
 Manages intents waiting for user confirmation before being queued.
+RedisPendingManager keeps them in Redis so any worker can serve any user.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import json
+import time
+from dataclasses import asdict, dataclass, field
 from typing import Any
 
+import redis.asyncio as aioredis
+
 
 @dataclass
 class PendingIntent:
@@ -16,6 +21,11 @@ class PendingIntent:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
+def _confirmation_text(intent: PendingIntent) -> str:
+    skill_name = intent.skill_hint or "неизвестный скилл"
+    return f"Запустить «{intent.text}» ({skill_name})? (да/нет)"
+
+
 class PendingManager:
     """Per-user pending intent manager."""
 
@@ -27,8 +37,7 @@ class PendingManager:
         if user_id not in self._pending:
             self._pending[user_id] = []
         self._pending[user_id].append(intent)
-        skill_name = intent.skill_hint or "неизвестный скилл"
-        return f"Запустить «{intent.text}» ({skill_name})? (да/нет)"
+        return _confirmation_text(intent)
 
     def confirm(self, user_id: str) -> PendingIntent | None:
         """Confirm first pending intent. Returns it for queueing, or None."""
@@ -58,3 +67,74 @@ class PendingManager:
 
     def clear(self, user_id: str) -> None:
         self._pending.pop(user_id, None)
+
+
+class RedisPendingManager:
+    """Per-user pending intents stored in Redis lists.
+
+    Async counterpart of PendingManager. Adds pipeline RPUSH with a TTL
+    refresh; confirm/reject are a single LPOP, so only one worker can take
+    a given pending intent.
+
+    Each entry also carries its own wall-clock deadline, checked by whichever
+    worker reads it: the key TTL is refreshed by every add, so on its own it
+    would keep an old, unanswered intent alive indefinitely.
+    """
+
+    TTL_SEC = 24 * 3600
+    INTENT_TTL_SEC = 3600
+    PREFIX = "pending:"
+
+    def __init__(self, redis_url: str = "redis://localhost:6379/0") -> None:
+        self._redis: aioredis.Redis = aioredis.from_url(redis_url)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+    async def add(self, user_id: str, intent: PendingIntent) -> str:
+        """Add intent to pending list. Returns confirmation message for user."""
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, json.dumps(
+                {"intent": asdict(intent), "expires_at": time.time() + self.INTENT_TTL_SEC},
+                ensure_ascii=False,
+            ))
+            pipe.expire(key, self.TTL_SEC)
+            await pipe.execute()
+        return _confirmation_text(intent)
+
+    async def confirm(self, user_id: str) -> PendingIntent | None:
+        """Confirm first pending intent. Returns it for queueing, or None."""
+        return await self._pop(user_id)
+
+    async def reject(self, user_id: str) -> PendingIntent | None:
+        """Reject first pending intent. Returns removed intent, or None."""
+        return await self._pop(user_id)
+
+    async def has_pending(self, user_id: str) -> bool:
+        return bool(await self.peek(user_id))
+
+    async def peek(self, user_id: str) -> list[PendingIntent]:
+        now = time.time()
+        entries = [self._decode(r) for r in await self._redis.lrange(self._key(user_id), 0, -1)]
+        return [intent for intent, expires_at in entries if expires_at > now]
+
+    async def clear(self, user_id: str) -> None:
+        await self._redis.delete(self._key(user_id))
+
+    async def close(self) -> None:
+        """Close Redis connection."""
+        await self._redis.aclose()
+
+    async def _pop(self, user_id: str) -> PendingIntent | None:
+        """LPOP the oldest live intent, dropping expired ones on the way."""
+        while (raw := await self._redis.lpop(self._key(user_id))) is not None:
+            intent, expires_at = self._decode(raw)
+            if expires_at > time.time():
+                return intent
+        return None
+
+    @staticmethod
+    def _decode(raw: bytes | str) -> tuple[PendingIntent, float]:
+        entry = json.loads(raw)
+        return PendingIntent(**entry["intent"]), entry["expires_at"]
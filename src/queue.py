@@ -1,13 +1,20 @@
-"""OpenEcho Intent Queue — atoms 3.1, 3.2, 3.3.
+"""OpenEcho Intent Queue — atoms 3.1, 3.2, 3.3, 3.4, 3.5.
 
 Priority queue for parsed intents. Lower priority number = higher priority.
+QueueManager shards queues by user_id so users never see each other's intents.
+RedisIntentQueue is a durable variant shared by several bot workers.
 """
 from __future__ import annotations
 
 import heapq
+import json
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Any
 
+import redis.asyncio as aioredis
+
 
 @dataclass(order=True)
 class QueuedIntent:
@@ -17,6 +24,7 @@ class QueuedIntent:
     skill_hint: str = field(compare=False, default="")
     metadata: dict[str, Any] = field(compare=False, default_factory=dict)
     _seq: int = field(compare=True, default=0)  # FIFO tiebreaker
+    skill_id: str = field(compare=False, default="")  # cached match_skill result
 
 
 class IntentQueue:
@@ -26,14 +34,20 @@ class IntentQueue:
         self._heap: list[QueuedIntent] = []
         self._seq = 0
 
-    def add(self, text: str, priority: int = 5, skill_hint: str = "", **meta: Any) -> None:
-        """Add intent to queue with priority (1=high, 10=low)."""
+    def add(
+        self, text: str, priority: int = 5, skill_hint: str = "", skill_id: str = "", **meta: Any,
+    ) -> None:
+        """Add intent to queue with priority (1=high, 10=low).
+
+        Pass *skill_id* if the intent was already matched, so dispatch skips matching.
+        """
         item = QueuedIntent(
             priority=priority,
             text=text,
             skill_hint=skill_hint,
             metadata=meta,
             _seq=self._seq,
+            skill_id=skill_id,
         )
         self._seq += 1
         heapq.heappush(self._heap, item)
@@ -44,6 +58,10 @@ class IntentQueue:
             return None
         return heapq.heappop(self._heap)
 
+    def head(self) -> QueuedIntent | None:
+        """Highest-priority intent without removing it (O(1)), or None if empty."""
+        return self._heap[0] if self._heap else None
+
     def peek(self) -> list[QueuedIntent]:
         """View all queued intents (sorted by priority)."""
         return sorted(self._heap)
@@ -57,3 +75,137 @@ class IntentQueue:
     def clear(self) -> None:
         self._heap.clear()
         self._seq = 0
+
+
+class QueueManager:
+    """Per-user IntentQueue shards with idle eviction.
+
+    Each user gets an isolated priority heap. Shards are kept in LRU order, so
+    eviction only walks the least recently used end: it skips stale shards
+    that still hold intents and stops at the first shard that is still fresh.
+    """
+
+    IDLE_TTL_SEC = 600.0
+    SWEEP_INTERVAL_SEC = 60.0
+
+    def __init__(self, idle_ttl: float | None = None) -> None:
+        self._shards: OrderedDict[str, IntentQueue] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._idle_ttl = self.IDLE_TTL_SEC if idle_ttl is None else idle_ttl
+        self._last_sweep = time.monotonic()
+
+    def get(self, user_id: str) -> IntentQueue:
+        """Return the queue for *user_id*, creating it on first use."""
+        now = time.monotonic()
+        queue = self._shards.get(user_id)
+        if queue is None:
+            queue = IntentQueue()
+            self._shards[user_id] = queue
+        else:
+            self._shards.move_to_end(user_id)
+        self._last_used[user_id] = now
+        if now - self._last_sweep >= self.SWEEP_INTERVAL_SEC:
+            self.evict_idle(now)
+        return queue
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Drop empty shards unused for longer than the idle TTL. Returns count."""
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        evicted = 0
+        for user_id in list(self._shards):
+            if now - self._last_used[user_id] < self._idle_ttl:
+                break  # LRU order: everything after is fresher
+            if not self._shards[user_id].is_empty():
+                continue
+            del self._shards[user_id]
+            del self._last_used[user_id]
+            evicted += 1
+        return evicted
+
+    def has(self, user_id: str) -> bool:
+        return user_id in self._shards
+
+    def active_users(self) -> int:
+        return len(self._shards)
+
+    def total_size(self) -> int:
+        return sum(q.size() for q in self._shards.values())
+
+
+# Score = priority * 2**32 + seq, so ZPOPMIN yields priority order with FIFO ties.
+_SEQ_SPAN = 2 ** 32
+
+# KEYS[1] = queue zset, KEYS[2] = seq counter; ARGV[1] = priority, ARGV[2] = payload
+_ADD_SCRIPT = """
+local seq = redis.call('INCR', KEYS[2]) - 1
+local score = tonumber(ARGV[1]) * 4294967296 + seq
+redis.call('ZADD', KEYS[1], string.format('%.0f', score), string.format('%012d', seq) .. '|' .. ARGV[2])
+return seq
+"""
+
+
+class RedisIntentQueue:
+    """Durable priority queue backed by a Redis sorted set.
+
+    Async counterpart of IntentQueue. Add is one Lua call (INCR + ZADD) and
+    pop is ZPOPMIN, so several workers can drain the same queue without
+    dispatching an intent twice.
+    """
+
+    PREFIX = "queue:"
+
+    def __init__(self, redis_url: str = "redis://localhost:6379/0", name: str = "default") -> None:
+        self._redis: aioredis.Redis = aioredis.from_url(redis_url)
+        self._key = f"{self.PREFIX}{name}"
+        self._seq_key = f"{self._key}:seq"
+
+    async def add(
+        self, text: str, priority: int = 5, skill_hint: str = "", skill_id: str = "", **meta: Any,
+    ) -> int:
+        """Add intent to queue with priority (1=high, 10=low). Returns its seq."""
+        payload = json.dumps(
+            {"text": text, "skill_hint": skill_hint, "skill_id": skill_id, "metadata": meta},
+            ensure_ascii=False,
+        )
+        return int(await self._redis.eval(_ADD_SCRIPT, 2, self._key, self._seq_key, priority, payload))
+
+    async def pop(self) -> QueuedIntent | None:
+        """Atomically remove and return highest-priority intent, or None if empty."""
+        popped = await self._redis.zpopmin(self._key, 1)
+        if not popped:
+            return None
+        member, score = popped[0]
+        return self._decode(member, score)
+
+    async def peek(self) -> list[QueuedIntent]:
+        """View all queued intents (sorted by priority)."""
+        rows = await self._redis.zrange(self._key, 0, -1, withscores=True)
+        return [self._decode(member, score) for member, score in rows]
+
+    async def is_empty(self) -> bool:
+        return await self.size() == 0
+
+    async def size(self) -> int:
+        return int(await self._redis.zcard(self._key))
+
+    async def clear(self) -> None:
+        await self._redis.delete(self._key, self._seq_key)
+
+    async def close(self) -> None:
+        """Close Redis connection."""
+        await self._redis.aclose()
+
+    @staticmethod
+    def _decode(member: bytes | str, score: float) -> QueuedIntent:
+        raw = member.decode() if isinstance(member, bytes) else member
+        seq_str, _, payload = raw.partition("|")
+        data = json.loads(payload)
+        return QueuedIntent(
+            priority=int(score) // _SEQ_SPAN,
+            text=data.get("text", ""),
+            skill_hint=data.get("skill_hint", ""),
+            metadata=data.get("metadata", {}),
+            _seq=int(seq_str),
+            skill_id=data.get("skill_id", ""),
+        )
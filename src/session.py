@@ -2,14 +2,46 @@
 
 Stores per-user session state in Redis hashes.
 Fields: active_skill, status, pending_intents.
+
+update() writes only the changed fields with a single HSET; missing fields
+fall back to defaults on read. compare_and_update() is an optional
+check-and-write done atomically in one Lua call.
+
+CachedSessionState keeps decoded session dicts in a local LRU, writes
+through on update and drops entries on Redis keyspace notifications, so
+several workers stay coherent.
 """
 from __future__ import annotations
 
+import asyncio
+import copy
 import json
+import logging
+import time
+from collections import OrderedDict
 from typing import Any
 
 import redis.asyncio as aioredis
 
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = session hash
+# ARGV = n_expected, (field, expected, default) * n_expected, (field, value) * rest
+_CAS_SCRIPT = """
+local n = tonumber(ARGV[1])
+local pos = 2
+for _ = 1, n do
+    local cur = redis.call('HGET', KEYS[1], ARGV[pos])
+    if cur == false then cur = ARGV[pos + 2] end
+    if cur ~= ARGV[pos + 1] then return 0 end
+    pos = pos + 3
+end
+if pos <= #ARGV then
+    redis.call('HSET', KEYS[1], unpack(ARGV, pos))
+end
+return 1
+"""
+
 
 class SessionState:
     """Per-user session state backed by Redis hash."""
@@ -25,36 +57,43 @@ class SessionState:
     async def get(self, user_id: str) -> dict[str, Any]:
         """Return full session state for *user_id*."""
         raw = await self._redis.hgetall(self._key(user_id))
-        if not raw:
-            return self._default()
-        result: dict[str, Any] = {}
-        for k, v in raw.items():
-            key = k.decode() if isinstance(k, bytes) else k
-            val = v.decode() if isinstance(v, bytes) else v
-            if key == "pending_intents":
-                result[key] = json.loads(val)
-            else:
-                result[key] = val
+        result = self._default()
+        result.update(self._decode(raw))
         return result
 
     async def set(self, user_id: str, state: dict[str, Any]) -> None:
         """Overwrite session state for *user_id*."""
-        data: dict[str, str] = {}
-        for k, v in state.items():
-            if isinstance(v, (list, dict)):
-                data[k] = json.dumps(v, ensure_ascii=False)
-            else:
-                data[k] = str(v)
+        data = self._encode(state)
         key = self._key(user_id)
         await self._redis.delete(key)
         if data:
             await self._redis.hset(key, mapping=data)
 
     async def update(self, user_id: str, **fields: Any) -> None:
-        """Update specific fields without touching others."""
-        current = await self.get(user_id)
-        current.update(fields)
-        await self.set(user_id, current)
+        """Update specific fields without touching others (one HSET)."""
+        data = self._encode(fields)
+        if data:
+            await self._redis.hset(self._key(user_id), mapping=data)
+
+    async def compare_and_update(
+        self,
+        user_id: str,
+        expected: dict[str, Any],
+        **fields: Any,
+    ) -> bool:
+        """Update *fields* only if current values match *expected*.
+
+        Missing fields compare as their defaults. Returns False (and writes
+        nothing) if another handler changed the session in between.
+        """
+        defaults = self._encode(self._default())
+        args: list[str] = [str(len(expected))]
+        for k, v in self._encode(expected).items():
+            args.extend([k, v, defaults.get(k, "")])
+        for k, v in self._encode(fields).items():
+            args.extend([k, v])
+        ok = await self._redis.eval(_CAS_SCRIPT, 1, self._key(user_id), *args)
+        return bool(ok)
 
     async def clear(self, user_id: str) -> None:
         """Remove session state."""
@@ -64,6 +103,28 @@ class SessionState:
         """Close Redis connection."""
         await self._redis.aclose()
 
+    @staticmethod
+    def _encode(state: dict[str, Any]) -> dict[str, str]:
+        data: dict[str, str] = {}
+        for k, v in state.items():
+            if isinstance(v, (list, dict)):
+                data[k] = json.dumps(v, ensure_ascii=False)
+            else:
+                data[k] = str(v)
+        return data
+
+    @staticmethod
+    def _decode(raw: dict[Any, Any]) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        for k, v in raw.items():
+            key = k.decode() if isinstance(k, bytes) else k
+            val = v.decode() if isinstance(v, bytes) else v
+            if key == "pending_intents":
+                result[key] = json.loads(val)
+            else:
+                result[key] = val
+        return result
+
     @staticmethod
     def _default() -> dict[str, Any]:
         return {
@@ -71,3 +132,194 @@ class SessionState:
             "status": "idle",
             "pending_intents": [],
         }
+
+
+class CachedSessionState(SessionState):
+    """SessionState with a write-through in-process LRU cache.
+
+    Call start_invalidation() in multi-worker deployments: it subscribes to
+    keyspace notifications for session keys and evicts entries changed by
+    other workers. If notifications can't be enabled (CONFIG refused, as on
+    many managed Redis services) or the subscription dies, the cache is
+    cleared and bypassed, so reads fall back to Redis instead of going stale.
+    """
+
+    MAX_ENTRIES = 10_000
+    OWN_WRITE_TTL_SEC = 10.0  # our HSET echoes arrive long before this
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        max_entries: int | None = None,
+    ) -> None:
+        super().__init__(redis_url)
+        self._init_cache(max_entries)
+
+    def _init_cache(self, max_entries: int | None = None) -> None:
+        self._cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._max_entries = max_entries or self.MAX_ENTRIES
+        self._own_writes: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._epoch = 0  # bumped on every invalidation; guards in-flight reads
+        self._enabled = True
+        self._listener: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: str) -> dict[str, Any]:
+        """Return session state, served from the local cache when possible."""
+        cached = self._cache.get(user_id) if self._enabled else None
+        if cached is not None:
+            self._cache.move_to_end(user_id)
+            self.hits += 1
+            return copy.deepcopy(cached)
+
+        self.misses += 1
+        epoch = self._epoch
+        state = await super().get(user_id)
+        if self._enabled and epoch == self._epoch:
+            self._store(user_id, state)
+        return copy.deepcopy(state)
+
+    async def set(self, user_id: str, state: dict[str, Any]) -> None:
+        self._invalidate(user_id)
+        await super().set(user_id, state)
+
+    async def update(self, user_id: str, **fields: Any) -> None:
+        """Write changed fields to Redis and patch the cached copy."""
+        data = self._encode(fields)
+        if not data:
+            return
+        # Our own HSET comes back as a notification; don't evict on it.
+        self._record_own_write(user_id)
+        try:
+            await self._redis.hset(self._key(user_id), mapping=data)
+        except Exception:
+            self._forget_own_write(user_id)
+            self._invalidate(user_id)
+            raise
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            cached.update(self._decode(data))
+        else:
+            self._epoch += 1  # a read in flight may predate this write
+
+    async def compare_and_update(
+        self,
+        user_id: str,
+        expected: dict[str, Any],
+        **fields: Any,
+    ) -> bool:
+        self._invalidate(user_id)
+        return await super().compare_and_update(user_id, expected, **fields)
+
+    async def clear(self, user_id: str) -> None:
+        self._invalidate(user_id)
+        await super().clear(user_id)
+
+    async def start_invalidation(self) -> None:
+        """Enable keyspace notifications and start the invalidation listener.
+
+        Without notifications the cache is bypassed for this process.
+        """
+        if not await self._enable_notifications():
+            self._bypass()
+            return
+        db = self._redis.connection_pool.connection_kwargs.get("db", 0)
+        pattern = f"__keyspace@{db}__:{self.PREFIX}*"
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(pattern)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "enabled": self._enabled,
+        }
+
+    async def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await super().close()
+
+    async def _enable_notifications(self) -> bool:
+        """Make sure Redis emits keyspace events for hash and generic commands."""
+        try:
+            current = await self._redis.config_get("notify-keyspace-events")
+            flags = current.get("notify-keyspace-events", "")
+            flags = flags.decode() if isinstance(flags, bytes) else flags
+            wanted = set(flags) | {"K", "h", "g", "x"}
+            if "A" in wanted:
+                wanted -= {"h", "g", "x"}
+            if wanted != set(flags):
+                await self._redis.config_set("notify-keyspace-events", "".join(sorted(wanted)))
+        except Exception as e:
+            logger.warning("Could not enable keyspace notifications, bypassing session cache: %s", e)
+            return False
+        return True
+
+    async def _listen(self, pubsub: Any) -> None:
+        try:
+            async for msg in pubsub.listen():
+                if msg["type"] != "pmessage":
+                    continue
+                channel = msg["channel"]
+                channel = channel.decode() if isinstance(channel, bytes) else channel
+                key = channel.split(":", 1)[1]
+                self._on_keyspace_event(key[len(self.PREFIX):])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Session invalidation listener failed, bypassing cache: %s", e)
+            self._bypass()
+        finally:
+            await pubsub.aclose()
+
+    def _on_keyspace_event(self, user_id: str) -> None:
+        if self._forget_own_write(user_id):
+            return
+        self._invalidate(user_id)
+
+    def _bypass(self) -> None:
+        self._enabled = False
+        self._cache.clear()
+        self._own_writes.clear()
+
+    def _record_own_write(self, user_id: str) -> None:
+        if not self._enabled:
+            return
+        now = time.monotonic()
+        pending, _ = self._own_writes.pop(user_id, (0, now))
+        self._own_writes[user_id] = (pending + 1, now)
+        # Echoes that never arrived (no listener, dropped message) expire
+        while self._own_writes:
+            oldest, (_, at) = next(iter(self._own_writes.items()))
+            if now - at < self.OWN_WRITE_TTL_SEC and len(self._own_writes) <= self._max_entries:
+                break
+            del self._own_writes[oldest]
+
+    def _forget_own_write(self, user_id: str) -> bool:
+        pending, at = self._own_writes.get(user_id, (0, 0.0))
+        if not pending:
+            return False
+        if pending == 1:
+            del self._own_writes[user_id]
+        else:
+            self._own_writes[user_id] = (pending - 1, at)
+        return True
+
+    def _invalidate(self, user_id: str) -> None:
+        self._epoch += 1
+        self._cache.pop(user_id, None)
+
+    def _store(self, user_id: str, state: dict[str, Any]) -> None:
+        self._cache[user_id] = copy.deepcopy(state)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
@@ -1,16 +1,50 @@
 """OpenEcho LLM Adapter — atom 6.2.
 
 Unified interface to Anthropic API (Haiku/Sonnet/Opus) with retry and backoff.
+All calls share one pooled keep-alive HTTP/2 client (h2 comes with the
+httpx[http2] dependency); close it on shutdown with close_client().
+
+Admission control: LLMScheduler gives each model a priority-ordered
+concurrency limit plus requests/min and tokens/min buckets, so a burst of
+users queues up locally instead of turning into 429s.
+
+stream_llm is the streaming (SSE) variant of call_llm: it yields text
+deltas as the model produces them.
+
+Prompt caching: system_prompt may be a list of system blocks; build static
+ones with cached_system() so Anthropic caches that prefix. Token usage,
+including cache reads/writes, is accumulated for usage_stats().
 """
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
+import json
 import logging
 import os
-from typing import Any
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+
+# Shared client and its pool settings (see configure_client)
+_client: "httpx.AsyncClient | None" = None
+_client_settings: dict[str, Any] = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+    "http2": True,
+}
+
 # Model name mapping
 MODEL_MAP = {
     "haiku": "claude-haiku-4-5-20251001",
@@ -23,25 +57,393 @@ class LLMError(Exception):
     """Raised when LLM call fails after retries."""
 
 
+class Priority(IntEnum):
+    """Scheduling class for LLM calls. Lower value is served first."""
+    INTERACTIVE = 0  # intent parsing, replies the user is waiting for
+    DEFAULT = 1
+    BACKGROUND = 2  # log indexing and other batch work
+
+
+# Retry backoff: full jitter, capped; Retry-After from the API wins
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_CAP_SEC = 20.0
+
+
+class TokenBucket:
+    """Continuous-refill token bucket sized for one minute of budget."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until *amount* tokens are available (0 if they are now)."""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self._tokens) / self._rate)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    async def take(self, amount: float) -> None:
+        """Wait until *amount* tokens are available and consume them."""
+        while (wait := self.wait_time(amount)) > 0:
+            await asyncio.sleep(wait)
+        self.consume(amount)
+
+    def give_back(self, amount: float) -> None:
+        """Return over-reserved tokens (e.g. estimate exceeded actual usage)."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class _ModelLane:
+    """Concurrency slots and rate buckets for one model.
+
+    Waiters form one priority queue. The head is granted a slot, one request
+    and its tokens together as soon as all are free; nobody behind it can
+    overtake, so a waiting interactive call always gets the next budget.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_min: float, tokens_per_min: float) -> None:
+        self.limit = max_concurrency
+        self.active = 0
+        self.requests = TokenBucket(requests_per_min)
+        self.tokens = TokenBucket(tokens_per_min)
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    async def acquire(self, priority: int, tokens: int = 0) -> None:
+        """Wait for a slot plus one request and *tokens* of rate budget."""
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted just as we got cancelled: hand everything back
+                self.requests.give_back(1)
+                self.tokens.give_back(tokens)
+                self.release()
+            else:
+                self._dispatch()  # we may have been the head holding others up
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant the queue head(s) whatever slots and budget are free."""
+        while self._waiters and self.active < self.limit:
+            _, _, tokens, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                self._schedule_wakeup(wait)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.active += 1
+            fut.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def waiting(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    def waiting_by_priority(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for priority, *_, fut in self._waiters:
+            if not fut.done():
+                try:
+                    name = Priority(priority).name.lower()
+                except ValueError:
+                    name = str(priority)
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+
+class LLMScheduler:
+    """Per-model admission control for LLM calls.
+
+    Each model gets a concurrency limit plus requests/min and tokens/min
+    buckets. Callers wait in one priority-ordered queue that hands out a slot
+    and the rate budget together, so nothing is held while the buckets
+    refill and a rate-limited interactive call is never served after
+    background work that queued earlier.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_min: float = 50,
+        tokens_per_min: float = 80_000,
+    ) -> None:
+        self._max_concurrency = max_concurrency
+        self._requests_per_min = requests_per_min
+        self._tokens_per_min = tokens_per_min
+        self._lanes: dict[str, _ModelLane] = {}
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = _ModelLane(self._max_concurrency, self._requests_per_min, self._tokens_per_min)
+            self._lanes[model] = lane
+        return lane
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        priority: int = Priority.INTERACTIVE,
+        tokens: int = 0,
+    ) -> AsyncIterator[_ModelLane]:
+        """Hold one concurrency slot for *model* with rate budget reserved."""
+        lane = self._lane(model)
+        await lane.acquire(priority, tokens)
+        try:
+            yield lane
+        finally:
+            lane.release()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Queue depth and budget per model, for the debug console."""
+        return {
+            model: {
+                "active": lane.active,
+                "limit": lane.limit,
+                "waiting": lane.waiting(),
+                "waiting_by_priority": lane.waiting_by_priority(),
+                "requests_available": round(lane.requests.available(), 1),
+                "tokens_available": int(lane.tokens.available()),
+            }
+            for model, lane in self._lanes.items()
+        }
+
+
+_scheduler = LLMScheduler()
+
+
+def get_scheduler() -> LLMScheduler:
+    return _scheduler
+
+
+def set_scheduler(scheduler: LLMScheduler) -> None:
+    """Replace the module-wide scheduler (limits differ per API tier)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+SystemPrompt = str | list[dict[str, Any]]
+
+# Cumulative token usage reported by the API (see usage_stats)
+_usage: dict[str, int] = {
+    "calls": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "cache_creation_input_tokens": 0,
+    "cache_read_input_tokens": 0,
+}
+
+
+def cached_system(text: str) -> list[dict[str, Any]]:
+    """System blocks for a static prompt, marked as a prompt-cache breakpoint.
+
+    Prompts shorter than the model's minimum cacheable length (thousands of
+    tokens for Haiku) are sent uncached by the API: marking them is harmless
+    but saves nothing. The intent, indexer and chatbot prompts are currently
+    ~250-500 tokens each, so these breakpoints only start paying off once a
+    prompt grows past that minimum. Check cache_read_input_tokens in
+    usage_stats() to see whether they do.
+    """
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _system_text(system_prompt: SystemPrompt) -> str:
+    if isinstance(system_prompt, str):
+        return system_prompt
+    return "".join(block.get("text", "") for block in system_prompt)
+
+
+def _record_usage(usage: dict[str, Any]) -> int:
+    """Add one response's usage to the totals; return tokens counted against rate limits."""
+    _usage["calls"] += 1
+    for field in ("input_tokens", "output_tokens",
+                  "cache_creation_input_tokens", "cache_read_input_tokens"):
+        _usage[field] += usage.get(field) or 0
+    # Cache reads don't count toward input-token rate limits
+    return (
+        (usage.get("input_tokens") or 0)
+        + (usage.get("cache_creation_input_tokens") or 0)
+        + (usage.get("output_tokens") or 0)
+    )
+
+
+def usage_stats() -> dict[str, Any]:
+    """Token totals since start, with the share of input served from cache."""
+    cached = _usage["cache_read_input_tokens"]
+    total_input = _usage["input_tokens"] + _usage["cache_creation_input_tokens"] + cached
+    return {**_usage, "cache_hit_ratio": round(cached / total_input, 3) if total_input else 0.0}
+
+
+def _estimate_tokens(system_prompt: SystemPrompt, user_message: str, max_tokens: int) -> int:
+    """Rough reservation: ~4 chars per input token plus the full output budget."""
+    return (len(_system_text(system_prompt)) + len(user_message)) // 4 + max_tokens
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _backoff_delay(attempt: int, error: Exception) -> float:
+    """Honor Retry-After, otherwise full-jitter exponential backoff."""
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BACKOFF_BASE_SEC)
+    return random.uniform(0, min(BACKOFF_CAP_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+
+
+def configure_client(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = True,
+) -> None:
+    """Set pool limits for the shared client. Takes effect on next get_client()."""
+    _client_settings.update(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        http2=http2,
+    )
+
+
+def get_client() -> "httpx.AsyncClient":
+    """Return the shared pooled client, creating it on first use."""
+    global _client
+    if _client is None:
+        import httpx
+
+        http2 = _client_settings["http2"]
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                # Installed without the http2 extra; HTTP/1.1 keep-alive still pools
+                logger.warning("h2 not installed, LLM client falls back to HTTP/1.1")
+                http2 = False
+        _client = httpx.AsyncClient(
+            http2=http2,
+            timeout=60.0,
+            limits=httpx.Limits(
+                max_connections=_client_settings["max_connections"],
+                max_keepalive_connections=_client_settings["max_keepalive_connections"],
+                keepalive_expiry=_client_settings["keepalive_expiry"],
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client (call once on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def api_url(path: str) -> str:
+    """Absolute Anthropic API URL for *path* (ANTHROPIC_BASE_URL overrides the host)."""
+    base = os.getenv("ANTHROPIC_BASE_URL", "") or DEFAULT_BASE_URL
+    return base.rstrip("/") + path
+
+
+def _build_request(
+    system_prompt: SystemPrompt,
+    user_message: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    api_key: str | None,
+) -> tuple[str, dict[str, str], dict[str, Any]]:
+    """Resolve model and API key; return (model_id, headers, payload)."""
+    key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
+    if not key:
+        raise LLMError("ANTHROPIC_API_KEY is not set")
+
+    model_id = MODEL_MAP.get(model, model)
+
+    headers = {
+        "x-api-key": key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+    payload = {
+        "model": model_id,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": user_message}],
+    }
+    return model_id, headers, payload
+
+
 async def call_llm(
-    system_prompt: str,
+    system_prompt: SystemPrompt,
     user_message: str,
     model: str = "haiku",
     max_tokens: int = 1000,
     temperature: float = 0.3,
     max_retries: int = 3,
     api_key: str | None = None,
+    client: "httpx.AsyncClient | None" = None,
+    priority: int = Priority.INTERACTIVE,
+    scheduler: LLMScheduler | None = None,
 ) -> str:
     """Call Anthropic API and return the text response.
 
     Args:
-        system_prompt: System prompt for the model.
+        system_prompt: System prompt text, or system blocks (see cached_system).
         user_message: User message.
         model: Model alias (haiku, sonnet, opus) or full model name.
         max_tokens: Max tokens in response.
         temperature: Sampling temperature.
         max_retries: Number of retries on failure.
         api_key: Anthropic API key (falls back to env var).
+        client: HTTP client to use (defaults to the shared pooled client).
+        priority: Scheduling class; background work should pass Priority.BACKGROUND.
+        scheduler: Admission control to use (defaults to the module scheduler).
 
     Returns:
         Model response text.
@@ -49,51 +451,144 @@ async def call_llm(
     Raises:
         LLMError on failure after retries.
     """
-    key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
-    if not key:
-        raise LLMError("ANTHROPIC_API_KEY is not set")
+    model_id, headers, payload = _build_request(
+        system_prompt, user_message, model, max_tokens, temperature, api_key,
+    )
 
-    model_id = MODEL_MAP.get(model, model)
-
-    import httpx
-
-    headers = {
-        "x-api-key": key,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json",
-    }
-    payload = {
-        "model": model_id,
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-        "system": system_prompt,
-        "messages": [{"role": "user", "content": user_message}],
-    }
+    sched = scheduler or _scheduler
+    est_tokens = _estimate_tokens(system_prompt, user_message, max_tokens)
 
     last_error: Exception | None = None
     for attempt in range(max_retries):
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(
-                    "https://api.anthropic.com/v1/messages",
+            async with sched.slot(model_id, priority, est_tokens) as lane:
+                http = client or get_client()
+                resp = await http.post(
+                    api_url("/v1/messages"),
                     headers=headers,
                     json=payload,
                     timeout=60.0,
                 )
                 resp.raise_for_status()
                 data = resp.json()
+                used = _record_usage(data.get("usage") or {})
+                if used and used < est_tokens:
+                    lane.tokens.give_back(est_tokens - used)
                 return data["content"][0]["text"]
         except Exception as e:
             last_error = e
             if attempt < max_retries - 1:
-                wait = 2 ** attempt
-                logger.warning("LLM call failed (attempt %d/%d): %s, retrying in %ds",
+                wait = _backoff_delay(attempt, e)
+                logger.warning("LLM call failed (attempt %d/%d): %s, retrying in %.1fs",
                               attempt + 1, max_retries, e, wait)
                 await asyncio.sleep(wait)
 
     raise LLMError(f"LLM call failed after {max_retries} retries: {last_error}")
 
 
+async def stream_llm(
+    system_prompt: SystemPrompt,
+    user_message: str,
+    model: str = "haiku",
+    max_tokens: int = 1000,
+    temperature: float = 0.3,
+    max_retries: int = 3,
+    api_key: str | None = None,
+    client: "httpx.AsyncClient | None" = None,
+    priority: int = Priority.INTERACTIVE,
+    scheduler: LLMScheduler | None = None,
+) -> AsyncIterator[str]:
+    """Streaming variant of call_llm: yield response text deltas as they arrive.
+
+    Same arguments as call_llm. Failures before the first delta are retried
+    with backoff; once text has been yielded, an error raises LLMError
+    immediately, since a retry would repeat what the caller already has.
+
+    The response is read by a separate task into a queue, so the scheduler
+    slot is held only while the API streams, however slowly the caller
+    consumes. Closing the generator early cancels the request.
+    """
+    model_id, headers, payload = _build_request(
+        system_prompt, user_message, model, max_tokens, temperature, api_key,
+    )
+    payload["stream"] = True
+
+    queue: asyncio.Queue[str | None] = asyncio.Queue()
+    producer = asyncio.create_task(_stream_into(
+        queue, model_id, headers, payload, max_retries, client, priority,
+        scheduler or _scheduler, _estimate_tokens(system_prompt, user_message, max_tokens),
+    ))
+    try:
+        while (text := await queue.get()) is not None:
+            yield text
+        await producer  # raises the producer's error, if any
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+
+async def _stream_into(
+    queue: "asyncio.Queue[str | None]",
+    model_id: str,
+    headers: dict[str, str],
+    payload: dict[str, Any],
+    max_retries: int,
+    client: "httpx.AsyncClient | None",
+    priority: int,
+    sched: LLMScheduler,
+    est_tokens: int,
+) -> None:
+    """Read one streamed response into *queue*; None marks the end."""
+    try:
+        last_error: Exception | None = None
+        for attempt in range(max_retries):
+            yielded = False
+            try:
+                async with sched.slot(model_id, priority, est_tokens) as lane:
+                    http = client or get_client()
+                    async with http.stream(
+                        "POST", api_url("/v1/messages"), headers=headers, json=payload, timeout=60.0,
+                    ) as resp:
+                        resp.raise_for_status()
+                        usage: dict[str, Any] = {}
+                        async for line in resp.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            event = json.loads(line[5:])
+                            kind = event.get("type")
+                            if kind == "content_block_delta":
+                                text = event.get("delta", {}).get("text", "")
+                                if text:
+                                    yielded = True
+                                    queue.put_nowait(text)
+                            elif kind == "message_start":
+                                usage.update(event.get("message", {}).get("usage") or {})
+                            elif kind == "message_delta":
+                                usage.update(event.get("usage") or {})
+                            elif kind == "error":
+                                raise LLMError(f"Stream error: {event.get('error', {}).get('message', event)}")
+                            elif kind == "message_stop":
+                                break
+                    used = _record_usage(usage)
+                    if used and used < est_tokens:
+                        lane.tokens.give_back(est_tokens - used)
+                    return
+            except Exception as e:
+                last_error = e
+                if yielded:
+                    raise LLMError(f"LLM stream interrupted: {e}") from e
+                if attempt < max_retries - 1:
+                    wait = _backoff_delay(attempt, e)
+                    logger.warning("LLM stream failed (attempt %d/%d): %s, retrying in %.1fs",
+                                  attempt + 1, max_retries, e, wait)
+                    await asyncio.sleep(wait)
+
+        raise LLMError(f"LLM stream failed after {max_retries} retries: {last_error}")
+    finally:
+        queue.put_nowait(None)
+
+
 def graceful_llm_error() -> str:
     """User-friendly message when LLM is unavailable."""
     return "Сервис временно недоступен. Попробуй через минуту."
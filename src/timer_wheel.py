@@ -0,0 +1,119 @@
+"""OpenEcho Timer Wheel — atom 0.7.
+
+Hashed timing wheel for many keyed timeouts (one per user) served by a
+single driver task. schedule() and cancel() are O(1); each tick fires all
+expired callbacks of its slot together in one task. Timers fire no earlier
+than requested and at most one tick late. The driver only runs while
+timers are pending.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Awaitable[Any]]
+
+
+class _Timer:
+    __slots__ = ("slot", "rounds", "callback")
+
+    def __init__(self, slot: int, rounds: int, callback: Callback) -> None:
+        self.slot = slot
+        self.rounds = rounds
+        self.callback = callback
+
+
+class TimerWheel:
+    """Keyed timers on a hashed wheel of SLOTS buckets, TICK_SEC apart."""
+
+    TICK_SEC = 1.0
+    SLOTS = 512
+
+    def __init__(self, tick: float | None = None, slots: int | None = None) -> None:
+        self._tick = tick or self.TICK_SEC
+        self._slots: list[dict[Hashable, _Timer]] = [{} for _ in range(slots or self.SLOTS)]
+        self._timers: dict[Hashable, _Timer] = {}
+        self._cursor = 0
+        self._next_tick_at = 0.0
+        self._driver: asyncio.Task | None = None
+        self.fired = 0
+        self.batches = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def schedule(self, key: Hashable, delay: float, callback: Callback) -> None:
+        """Call *callback* after *delay* seconds, replacing any timer for *key*."""
+        self.cancel(key)
+        loop = asyncio.get_running_loop()
+        if self._driver is None or self._driver.done():
+            self._next_tick_at = loop.time() + self._tick
+            self._driver = loop.create_task(self._drive())
+        deadline = loop.time() + delay
+        ticks = max(1, math.ceil((deadline - self._next_tick_at) / self._tick) + 1)
+        size = len(self._slots)
+        timer = _Timer((self._cursor + ticks) % size, (ticks - 1) // size, callback)
+        self._slots[timer.slot][key] = timer
+        self._timers[key] = timer
+
+    def cancel(self, key: Hashable) -> bool:
+        """Drop the timer for *key*. Returns True if one was pending."""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del self._slots[timer.slot][key]
+        return True
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._timers:
+                await asyncio.sleep(max(0.0, self._next_tick_at - loop.time()))
+                self._next_tick_at += self._tick
+                self._cursor = (self._cursor + 1) % len(self._slots)
+                due = self._advance(self._slots[self._cursor])
+                if due:
+                    self.batches += 1
+                    self.fired += len(due)
+                    loop.create_task(self._fire(due))
+        finally:
+            self._driver = None
+
+    def _advance(self, slot: dict[Hashable, _Timer]) -> list[Callback]:
+        """Pop expired timers of *slot*; count down the rest."""
+        due: list[Callback] = []
+        for key in list(slot):
+            timer = slot[key]
+            if timer.rounds:
+                timer.rounds -= 1
+                continue
+            del slot[key]
+            del self._timers[key]
+            due.append(timer.callback)
+        return due
+
+    @staticmethod
+    async def _fire(due: list[Callback]) -> None:
+        results = await asyncio.gather(*(cb() for cb in due), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Timer callback failed: %r", result)
+
+    async def close(self) -> None:
+        """Cancel all timers and stop the driver."""
+        for slot in self._slots:
+            slot.clear()
+        self._timers.clear()
+        if self._driver is not None:
+            self._driver.cancel()
+            await asyncio.gather(self._driver, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {"pending": len(self._timers), "fired": self.fired, "batches": self.batches}
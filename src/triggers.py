@@ -0,0 +1,77 @@
+"""OpenEcho Trigger Index — atom 5.6.
+
+Aho-Corasick automaton over skill trigger roots, built once per registry.
+A trigger matches when its root (first 4 chars) appears in the text — this
+handles Russian morphology: "задача" matches "задачу", "задачи". The full
+trigger starts with its root, so the roots alone decide the match.
+"""
+from __future__ import annotations
+
+from collections import deque
+
+from src.config_loader import SkillConfig
+
+ROOT_LEN = 4
+
+# (priority, registry position) — lower wins, like the original linear scan
+_Rank = tuple[int, int]
+_NO_MATCH: _Rank = (10 ** 9, 10 ** 9)
+
+
+class TriggerIndex:
+    """Finds the best-priority skill whose trigger root occurs in a text."""
+
+    def __init__(self, registry: dict[str, SkillConfig]) -> None:
+        self._skills: list[str] = list(registry)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._best: list[_Rank] = [_NO_MATCH]  # best rank ending at each node
+        for pos, (skill_id, config) in enumerate(registry.items()):
+            rank = (config.priority, pos)
+            for trigger in config.triggers:
+                self._insert(trigger.lower()[:ROOT_LEN], rank)
+        self._link()
+
+    def _insert(self, root: str, rank: _Rank) -> None:
+        node = 0
+        for ch in root:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(_NO_MATCH)
+            node = nxt
+        # An empty root sits on node 0 and so matches any text
+        self._best[node] = min(self._best[node], rank)
+
+    def _link(self) -> None:
+        """BFS to set failure links and fold suffix matches into each node."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                fail = self._goto[f].get(ch, 0)
+                self._fail[child] = fail if fail != child else 0
+                self._best[child] = min(self._best[child], self._best[self._fail[child]])
+            self._best[node] = min(self._best[node], self._best[0])
+
+    def best(self, text: str) -> str | None:
+        """Return the best-priority matching skill_id in one pass, or None."""
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = best_at[0]
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best_at[node] < best:
+                best = best_at[node]
+        if best == _NO_MATCH:
+            return None
+        return self._skills[best[1]]
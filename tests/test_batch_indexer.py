@@ -0,0 +1,232 @@
+"""Tests for Batch Log Indexer — atom 8.4."""
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from src.log import batch_indexer
+from src.log.batch_indexer import BatchIndexer, load_history
+from src.log.indexer import card_prefix, index_session
+from src.log.incremental import IncrementalIndexer
+from src.log.raw import RawSessionLog
+from src.memory.index import MemoryIndex
+
+
+class _FakeBatchesAPI:
+    """Message Batches endpoints; answers each chunk with one id-less card."""
+
+    def __init__(self, ended: bool = True, fail_once: set[str] | None = None) -> None:
+        self.ended = ended
+        self.fail_once = fail_once or set()  # chunk bodies that error on first try
+        self.batches: dict[str, list[dict]] = {}
+        self.created: dict[str, str] = {}
+        self.submitted: list[str] = []
+        self.lose_response = False  # POST creates the batch, then the connection drops
+
+    @staticmethod
+    def answer(body: str) -> str:
+        return json.dumps([{"skill": "психолог", "summary": body[:40]}])
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "POST" and path == "/v1/messages/batches":
+            batch_id = f"msgbatch_{len(self.batches)}"
+            requests = json.loads(request.content)["requests"]
+            self.batches[batch_id] = requests
+            self.created[batch_id] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            self.submitted.extend(r["custom_id"] for r in requests)
+            if self.lose_response:
+                self.lose_response = False
+                raise httpx.ReadTimeout("connection lost", request=request)
+            return httpx.Response(200, json={"id": batch_id, "processing_status": "in_progress"})
+        if request.method == "GET" and path == "/v1/messages/batches":
+            data = [
+                {
+                    "id": batch_id,
+                    "created_at": self.created[batch_id],
+                    "processing_status": "ended" if self.ended else "in_progress",
+                    "request_counts": {"processing": 0, "succeeded": len(reqs), "errored": 0,
+                                       "canceled": 0, "expired": 0},
+                }
+                for batch_id, reqs in reversed(self.batches.items())
+            ]
+            return httpx.Response(200, json={"data": data, "has_more": False})
+        if path.endswith("/results"):
+            batch_id = path.split("/")[-2]
+            lines = []
+            for r in self.batches[batch_id]:
+                body = r["params"]["messages"][0]["content"]
+                if body in self.fail_once:
+                    self.fail_once.discard(body)
+                    result = {"type": "errored", "error": {"type": "overloaded_error"}}
+                else:
+                    result = {
+                        "type": "succeeded",
+                        "message": {"content": [{"type": "text", "text": self.answer(body)}]},
+                    }
+                lines.append(json.dumps({"custom_id": r["custom_id"], "result": result}))
+            return httpx.Response(200, text="\n".join(lines) + "\n")
+        batch_id = path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={
+            "id": batch_id,
+            "processing_status": "ended" if self.ended else "in_progress",
+            "results_url": f"https://api.anthropic.com/v1/messages/batches/{batch_id}/results",
+        })
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = MemoryIndex(tmp_path / "memory.db")
+    idx.connect()
+    yield idx
+    idx.close()
+
+
+def _indexer(index, tmp_path, api):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(api.handler))
+    indexer = BatchIndexer(
+        index, checkpoint_path=tmp_path / "batch.db", api_key="test-key", client=client,
+    )
+    indexer.connect()
+    return indexer
+
+
+SESSIONS = {
+    "s1": [{"role": "user", "text": "Я обиделся на маму"}, {"role": "bot", "text": "Расскажи"}],
+    "s2": [{"role": "user", "text": "Купи молоко"}],
+}
+
+
+@pytest.mark.unit
+class TestBatchIndexer:
+    @pytest.mark.asyncio
+    async def test_indexes_all_sessions(self, index, tmp_path):
+        api = _FakeBatchesAPI()
+        indexer = _indexer(index, tmp_path, api)
+        assert await indexer.run(SESSIONS, poll_interval=0) == 2
+        assert len(api.batches) == 1
+        card = index.get("s1_m0_chunk0_0")
+        assert card is not None
+        assert card["source"] == "s1"
+        assert index.get("s2_m0_chunk0_0") is not None
+        assert indexer.stats() == {"sessions_indexed": 2, "requests_pending": 0, "batches_open": 0}
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_ids_match_index_session(self, index, tmp_path):
+        big = [{"role": "user", "text": " ".join(["слово"] * 1200)} for _ in range(4)]
+        api = _FakeBatchesAPI()
+        indexer = _indexer(index, tmp_path, api)
+        await indexer.run({"big": big}, poll_interval=0)
+
+        async def llm(system, user):
+            return api.answer(user)
+
+        expected = await index_session(big, llm_call=llm, session_id=card_prefix("big"))
+        assert len(expected) > 1
+        for card in expected:
+            stored = index.get(card["id"])
+            assert stored is not None
+            assert stored["summary"] == card["summary"]
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_resume_polls_without_resubmitting(self, index, tmp_path):
+        api = _FakeBatchesAPI(ended=False)
+        indexer = _indexer(index, tmp_path, api)
+        assert await indexer.run(SESSIONS, poll_interval=0, max_wait=0) == 0
+        assert indexer.stats()["batches_open"] == 1
+        indexer.close()
+
+        api.ended = True
+        resumed = _indexer(index, tmp_path, api)
+        assert await resumed.run(SESSIONS, poll_interval=0) == 2
+        assert len(api.batches) == 1
+        assert len(api.submitted) == 2
+        # A third run has nothing left to do
+        assert await resumed.run(SESSIONS, poll_interval=0) == 0
+        assert len(api.batches) == 1
+        resumed.close()
+
+    @pytest.mark.asyncio
+    async def test_errored_request_is_resubmitted(self, index, tmp_path):
+        api = _FakeBatchesAPI(fail_once={"[user] Купи молоко"})
+        indexer = _indexer(index, tmp_path, api)
+        assert await indexer.run(SESSIONS, poll_interval=0) == 2
+        assert len(api.batches) == 2
+        assert len(api.batches["msgbatch_1"]) == 1
+        assert index.get("s2_m0_chunk0_0") is not None
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_lost_post_response_is_recovered(self, index, tmp_path):
+        api = _FakeBatchesAPI()
+        api.lose_response = True
+        indexer = _indexer(index, tmp_path, api)
+        with pytest.raises(httpx.ReadTimeout):
+            await indexer.run(SESSIONS, poll_interval=0)
+        indexer.close()
+
+        resumed = _indexer(index, tmp_path, api)
+        assert await resumed.run(SESSIONS, poll_interval=0) == 2
+        assert len(api.batches) == 1  # matched to the listed batch, not resubmitted
+        assert len(api.submitted) == 2
+        assert index.get("s1_m0_chunk0_0") is not None
+        resumed.close()
+
+    @pytest.mark.asyncio
+    async def test_unsent_submission_is_requeued(self, index, tmp_path):
+        api = _FakeBatchesAPI()
+        indexer = _indexer(index, tmp_path, api)
+
+        async def crash(*args, **kwargs):
+            raise httpx.ConnectError("no route")
+
+        indexer._request = crash
+        with pytest.raises(httpx.ConnectError):
+            await indexer.run(SESSIONS, poll_interval=0)
+        indexer.close()
+
+        resumed = _indexer(index, tmp_path, api)
+        assert await resumed.run(SESSIONS, poll_interval=0) == 2
+        assert len(api.batches) == 1
+        assert resumed.stats()["requests_pending"] == 0
+        resumed.close()
+
+
+@pytest.mark.unit
+class TestBatchIndexerCLI:
+    def test_load_history_stops_at_incremental_marks(self, tmp_path, index):
+        log = RawSessionLog(tmp_path / "sessions")
+        log.write("old", "user", "история")
+        offsets = tmp_path / "offsets.db"
+        seeded = IncrementalIndexer(log, index, None, db_path=offsets, seed_existing=True)
+        seeded.connect()
+        seeded.close()
+        log.write("old", "user", "новое")
+        log.write("new", "user", "привет")
+
+        history = load_history(log, offsets)
+        assert [m["text"] for m in history["old"]] == ["история"]
+        assert [m["text"] for m in history["new"]] == ["привет"]
+        assert set(load_history(log, tmp_path / "missing.db")) == {"old", "new"}
+
+    def test_main_indexes_log_dir(self, tmp_path, monkeypatch):
+        api = _FakeBatchesAPI()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(api.handler))
+        monkeypatch.setattr(batch_indexer, "get_client", lambda: client)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        log = RawSessionLog(tmp_path / "sessions")
+        log.write("s1", "user", "Купи молоко")
+
+        argv = [
+            str(tmp_path / "sessions"), "--memory-db", str(tmp_path / "memory.db"),
+            "--checkpoint", str(tmp_path / "batch.db"), "--offsets", str(tmp_path / "none.db"),
+            "--poll", "0",
+        ]
+        assert batch_indexer.main(argv) == 0
+        index = MemoryIndex(tmp_path / "memory.db")
+        index.connect()
+        assert index.get("s1_m0_chunk0_0")["source"] == "s1"
+        index.close()
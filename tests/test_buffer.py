@@ -1,6 +1,11 @@
 """Tests for src/gateway/buffer.py — atom 2.1."""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
-from src.gateway.buffer import MessageBuffer, BufferItem
+from src.gateway.buffer import MessageBuffer, BufferItem, RedisMessageBuffer
+from src.timer_wheel import TimerWheel
 
 
 @pytest.mark.unit
@@ -55,3 +60,110 @@ def test_separate_users():
     buf.collect("u1")
     assert not buf.has_items("u1")
     assert buf.has_items("u2")
+
+
+def _pipeline(results=None):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=results or [])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    return pipe
+
+
+def _make_redis_buffer(redis, timeout=0.02):
+    buf = RedisMessageBuffer.__new__(RedisMessageBuffer)
+    buf._redis = redis
+    buf._wheel = TimerWheel(tick=0.01)
+    buf._timeout_callback = None
+    buf.TIMEOUT_SEC = timeout
+    return buf
+
+
+def _shared_redis(store):
+    """AsyncMock Redis whose timer commands share *store* (one Redis, many workers)."""
+    redis = AsyncMock()
+
+    async def set_(key, value, ex=None):
+        store[key] = value
+
+    async def eval_(script, numkeys, timer_key, key, token):
+        if store.get(timer_key) != token:
+            return -1
+        del store[timer_key]
+        return 1
+
+    async def delete(*keys):
+        for key in keys:
+            store.pop(key, None)
+
+    redis.set.side_effect = set_
+    redis.eval.side_effect = eval_
+    redis.delete.side_effect = delete
+    return redis
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_add_pipelines_push_and_ttl():
+    pipe = _pipeline()
+    redis = MagicMock()
+    redis.pipeline = MagicMock(return_value=pipe)
+    buf = _make_redis_buffer(redis)
+    await buf.add("u1", BufferItem(type="forwarded", data={"text": "a"}, timestamp=1.0))
+    assert pipe.rpush.call_args.args[0] == "buffer:u1"
+    assert json.loads(pipe.rpush.call_args.args[1]) == {
+        "type": "forwarded", "data": {"text": "a"}, "timestamp": 1.0,
+    }
+    pipe.expire.assert_called_once_with("buffer:u1", RedisMessageBuffer.TTL_SEC)
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_collect_drops_items_and_timer_in_one_transaction():
+    raw = json.dumps({"type": "photo", "data": {}, "timestamp": 1.0})
+    pipe = _pipeline([[raw.encode()], 2])
+    redis = MagicMock()
+    redis.pipeline = MagicMock(return_value=pipe)
+    buf = _make_redis_buffer(redis)
+    items = await buf.collect("u1")
+    assert [i.type for i in items] == ["photo"]
+    redis.pipeline.assert_called_once_with(transaction=True)
+    pipe.delete.assert_called_once_with("buffer:u1", "buffer:u1:timer")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_timer_cancelled_by_other_worker():
+    store = {}
+    a, b = _make_redis_buffer(_shared_redis(store)), _make_redis_buffer(_shared_redis(store))
+    fired = []
+
+    async def on_timeout(user_id):
+        fired.append(user_id)
+
+    a.set_timeout_callback(on_timeout)
+    await a.start_timer("u1")
+    await b.clear("u1")
+    await asyncio.sleep(0.06)
+    assert fired == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_restarted_timer_fires_once_on_latest_worker():
+    store = {}
+    a, b = _make_redis_buffer(_shared_redis(store)), _make_redis_buffer(_shared_redis(store), 0.04)
+    fired = []
+
+    async def on_timeout(user_id):
+        fired.append(user_id)
+
+    a.set_timeout_callback(on_timeout)
+    b.set_timeout_callback(on_timeout)
+    await a.start_timer("u1")
+    await b.start_timer("u1")  # newer message handled by another worker
+    await asyncio.sleep(0.03)
+    assert fired == []  # a's timer was superseded
+    await asyncio.sleep(0.05)
+    assert fired == ["u1"]
@@ -0,0 +1,135 @@
+"""Tests for src/gateway/coalescer.py — atom 2.10."""
+import asyncio
+
+import pytest
+
+from src.gateway.coalescer import MessageCoalescer, merge_texts
+from src.timer_wheel import TimerWheel
+
+
+def _collector():
+    flushed = []
+
+    async def on_flush(user_id, items):
+        flushed.append((user_id, items))
+
+    return flushed, on_flush
+
+
+@pytest.mark.unit
+def test_merge_texts():
+    assert merge_texts(["купи молоко ", "", "и хлеб"]) == "купи молоко\nи хлеб"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_rapid_messages_flush_once():
+    c = MessageCoalescer(window=0.05, wheel=TimerWheel(tick=0.005))
+    flushed, on_flush = _collector()
+    c.set_flush_callback(on_flush)
+    for text in ("купи молоко", "и хлеб", "на завтра"):
+        await c.add("u1", text)
+        await asyncio.sleep(0.01)
+    assert flushed == []
+    await asyncio.sleep(0.1)
+    assert flushed == [("u1", ["купи молоко", "и хлеб", "на завтра"])]
+    assert c.stats()["flushed"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_users_are_independent():
+    c = MessageCoalescer(window=0.02, wheel=TimerWheel(tick=0.005))
+    flushed, on_flush = _collector()
+    c.set_flush_callback(on_flush)
+    await c.add("u1", "a")
+    await c.add("u2", "b")
+    await asyncio.sleep(0.05)
+    assert sorted(flushed) == [("u1", ["a"]), ("u2", ["b"])]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_zero_window_passes_through():
+    c = MessageCoalescer(window=0)
+    flushed, on_flush = _collector()
+    c.set_flush_callback(on_flush)
+    await c.add("u1", "a")
+    assert flushed == [("u1", ["a"])]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_max_wait_and_max_items_cap_delay():
+    c = MessageCoalescer(window=0.05, max_wait=0.08, max_items=3, wheel=TimerWheel(tick=0.005))
+    flushed, on_flush = _collector()
+    c.set_flush_callback(on_flush)
+    for i in range(4):
+        await c.add("u1", i)
+        await asyncio.sleep(0.03)
+    # 4 messages 30 ms apart never leave a 50 ms gap; max_wait flushes anyway
+    assert flushed and flushed[0][1] == [0, 1, 2]
+    await asyncio.sleep(0.1)
+    assert [items for _, items in flushed] == [[0, 1, 2], [3]]
+    assert c.pending("u1") == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_shared_wheel_and_failed_flush_logged(caplog):
+    wheel = TimerWheel(tick=0.005)
+    wheel.schedule("u1", 10, lambda: asyncio.sleep(0))  # another stage's timer
+    c = MessageCoalescer(window=0.02, wheel=wheel)
+
+    async def on_flush(user_id, items):
+        raise RuntimeError("queue closed")
+
+    c.set_flush_callback(on_flush)
+    await c.add("u1", "a")
+    await asyncio.sleep(0.05)
+    assert c.stats()["failed"] == 1
+    assert "Coalesced flush failed for u1" in caplog.text
+    assert "u1" in wheel  # the other timer was not replaced
+    await wheel.close()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_default_window_passes_through():
+    c = MessageCoalescer()
+    flushed, on_flush = _collector()
+    c.set_flush_callback(on_flush)
+    await c.add("u1", "a")
+    assert flushed == [("u1", ["a"])]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_blocked_flush_applies_backpressure():
+    c = MessageCoalescer(window=0.01, wheel=TimerWheel(tick=0.005), max_flushing=2)
+    release = asyncio.Event()
+    flushed = []
+
+    async def on_flush(user_id, items):
+        await release.wait()  # e.g. the executor's mailbox is full
+        flushed.append((user_id, items))
+
+    c.set_flush_callback(on_flush)
+    await c.add("u1", "a")
+    await asyncio.sleep(0.05)
+    assert c.stats()["flushing"] == 1
+
+    second = asyncio.create_task(c.add("u1", "b"))
+    await asyncio.sleep(0.02)
+    assert not second.done()  # the user's previous flush is still blocked
+    await c.add("u2", "x")  # other users are admitted up to max_flushing
+    await asyncio.sleep(0.05)
+    assert c.stats()["flushing"] == 2
+    third = asyncio.create_task(c.add("u3", "y"))
+    await asyncio.sleep(0.02)
+    assert not third.done()
+
+    release.set()
+    await asyncio.gather(second, third)
+    await asyncio.sleep(0.05)
+    assert sorted(flushed) == [("u1", ["a"]), ("u1", ["b"]), ("u2", ["x"]), ("u3", ["y"])]
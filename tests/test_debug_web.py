@@ -2,7 +2,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.debug.web import app, broadcast_event, _events, _clients
+from src.debug.web import app, broadcast_event, debug_state, register_stats, _events, _clients, _stats_providers
 
 
 @pytest.mark.unit
@@ -39,3 +39,11 @@ class TestDebugWeb:
         await broadcast_event({"component": "test", "action": "hello"})
         mock_ws.send_text.assert_called_once()
         _clients.clear()
+
+    @pytest.mark.asyncio
+    async def test_state_includes_registered_stats(self):
+        _stats_providers.clear()
+        register_stats("llm", lambda: {"haiku": {"waiting": 3}})
+        state = await debug_state()
+        assert state["llm"]["haiku"]["waiting"] == 3
+        _stats_providers.clear()
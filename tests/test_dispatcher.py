@@ -1,9 +1,12 @@
-"""Tests for src/dispatcher.py — atoms 5.1-5.5."""
+"""Tests for src/dispatcher.py — atoms 5.1-5.5, 5.7."""
+import asyncio
+import time
+
 import pytest
 from unittest.mock import AsyncMock
 
 from src.config_loader import SkillConfig
-from src.queue import IntentQueue
+from src.queue import IntentQueue, QueueManager
 from src.dispatcher import Dispatcher, SkillInput, SkillOutput
 
 
@@ -112,3 +115,134 @@ async def test_dispatch_no_skill_found():
     assert result is not None
     assert result.type == "error"
     assert result.done is True
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_dispatch_uses_user_shard():
+    session = AsyncMock()
+    session.update = AsyncMock()
+    queues = QueueManager()
+    queues.get("u2").add("создай задачу", priority=2, skill_hint="task-manager")
+
+    seen = []
+
+    async def mock_runner(skill_id, skill_input):
+        seen.append(skill_input.user_id)
+        return SkillOutput(type="complete", text="ok", done=True)
+
+    d = Dispatcher(_registry(), queues, session)
+    d.set_skill_runner(mock_runner)
+    assert await d.dispatch_next("u1") is None  # u1 must not pop u2's intent
+    result = await d.dispatch_next("u2")
+    assert result.text == "ok"
+    assert seen == ["u2"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_dispatch_uses_cached_skill_id():
+    session = AsyncMock()
+    session.update = AsyncMock()
+    q = IntentQueue()
+    q.add("просто текст", priority=2, skill_id="psychologist")
+
+    d = Dispatcher(_registry(), q, session)
+    d.match_skill = lambda *a, **kw: pytest.fail("match_skill must not run for cached intents")
+
+    async def mock_runner(skill_id, skill_input):
+        return SkillOutput(type="complete", text=skill_id, done=True)
+
+    d.set_skill_runner(mock_runner)
+    result = await d.dispatch_next("u1")
+    assert result.text == "psychologist"
+
+
+def _batch_registry():
+    reg = _registry()
+    reg["chatbot"] = SkillConfig(name="Собеседник", type="executor", description="Chat", priority=99)
+    return reg
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_dispatch_batch_runs_independent_skills_concurrently():
+    session = AsyncMock()
+    q = IntentQueue()
+    q.add("поговорим", priority=99, skill_id="chatbot")
+    q.add("создай задачу", priority=2, skill_id="task-manager")
+    q.add("тревога", priority=5, skill_id="psychologist")
+
+    async def slow_runner(skill_id, skill_input):
+        await asyncio.sleep(0.1)
+        return SkillOutput(type="complete", text=skill_id, done=True)
+
+    d = Dispatcher(_batch_registry(), q, session)
+    d.set_skill_runner(slow_runner)
+    start = time.perf_counter()
+    outputs = await d.dispatch_batch("u1")
+    assert time.perf_counter() - start < 0.25
+    assert [o.text for o in outputs] == ["task-manager", "psychologist", "chatbot"]
+    assert q.is_empty()
+    session.update.assert_called_with("u1", active_skill="", status="idle")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_dispatch_batch_splits_same_skill():
+    q = IntentQueue()
+    q.add("создай задачу раз", priority=2, skill_id="task-manager")
+    q.add("тревога", priority=5, skill_id="psychologist")
+    q.add("создай задачу два", priority=6, skill_id="task-manager")
+
+    async def runner(skill_id, skill_input):
+        return SkillOutput(type="complete", text=skill_input.intent, done=True)
+
+    d = Dispatcher(_batch_registry(), q, AsyncMock())
+    d.set_skill_runner(runner)
+    assert [o.text for o in await d.dispatch_batch("u1")] == ["создай задачу раз", "тревога"]
+    assert [o.text for o in await d.dispatch_batch("u1")] == ["создай задачу два"]
+    assert await d.dispatch_batch("u1") == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_dispatch_batch_ask_skill_runs_alone():
+    session = AsyncMock()
+    reg = _batch_registry()
+    reg["task-manager"].tools = ["ask_user"]
+    q = IntentQueue()
+    q.add("тревога", priority=1, skill_id="psychologist")
+    q.add("создай задачу", priority=2, skill_id="task-manager")
+    q.add("поговорим", priority=99, skill_id="chatbot")
+
+    async def runner(skill_id, skill_input):
+        if skill_id == "task-manager":
+            return SkillOutput(type="question", text="Что записать?", done=False)
+        return SkillOutput(type="complete", text=skill_id, done=True)
+
+    d = Dispatcher(reg, q, session)
+    d.set_skill_runner(runner)
+    assert [o.text for o in await d.dispatch_batch("u1")] == ["psychologist"]
+    assert [o.type for o in await d.dispatch_batch("u1")] == ["question"]
+    session.update.assert_called_with("u1", active_skill="task-manager", status="waiting_answer")
+    assert q.size() == 1  # the chatbot reply waits until the question is answered
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_dispatch_batch_failure_is_isolated():
+    q = IntentQueue()
+    q.add("тревога", priority=5, skill_id="psychologist")
+    q.add("поговорим", priority=99, skill_id="chatbot")
+
+    async def runner(skill_id, skill_input):
+        if skill_id == "psychologist":
+            raise RuntimeError("boom")
+        return SkillOutput(type="complete", text=skill_id, done=True)
+
+    d = Dispatcher(_batch_registry(), q, AsyncMock())
+    d.set_skill_runner(runner)
+    outputs = await d.dispatch_batch("u1")
+    assert [o.type for o in outputs] == ["error", "complete"]
+    assert "boom" in outputs[0].text
@@ -0,0 +1,87 @@
+"""Tests for src/executor.py — atom 0.6."""
+import asyncio
+
+import pytest
+
+from src.executor import KeyedExecutor
+
+
+def _job(log, name, delay=0.0):
+    async def run():
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+    return run
+
+
+@pytest.mark.unit
+class TestKeyedExecutor:
+    @pytest.mark.asyncio
+    async def test_same_key_runs_in_order(self):
+        ex = KeyedExecutor()
+        log = []
+        futs = [await ex.submit("u1", _job(log, i, 0.01 * (3 - i))) for i in range(3)]
+        assert await asyncio.gather(*futs) == [0, 1, 2]
+        assert log == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_in_parallel(self):
+        ex = KeyedExecutor()
+        log = []
+        await ex.submit("u1", _job(log, "a", 0.05))
+        await ex.submit("u2", _job(log, "b", 0.05))
+        await ex.join()
+        assert log[:2] == [("start", "a"), ("start", "b")]
+
+    @pytest.mark.asyncio
+    async def test_worker_cap(self):
+        ex = KeyedExecutor(max_workers=2)
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        for i in range(6):
+            await ex.submit(f"u{i}", job)
+        await ex.join()
+        assert peak == 2
+        assert ex.stats()["completed"] == 6
+
+    @pytest.mark.asyncio
+    async def test_backpressure_blocks_submit(self):
+        ex = KeyedExecutor(max_pending_per_key=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        await ex.submit("u1", blocker)  # running, no longer pending
+        await ex.submit("u1", blocker)  # fills the mailbox
+        third = asyncio.create_task(ex.submit("u1", blocker))
+        await asyncio.sleep(0.01)
+        assert not third.done()
+        assert ex.lag("u1") > 0
+        assert "u1" in ex.stats()["lagging"]
+        release.set()
+        await third
+        await ex.join()
+        assert ex.stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_stop_mailbox(self):
+        ex = KeyedExecutor()
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        failed = await ex.submit("u1", boom)
+        ok = await ex.submit("u1", _job([], "next"))
+        assert await ok == "next"
+        with pytest.raises(RuntimeError):
+            await failed
+        assert ex.stats()["failed"] == 1
@@ -0,0 +1,70 @@
+"""Tests for src/gateway/fast_path.py — atom 2.9."""
+import pytest
+
+from src.gateway.fast_path import FastPathClassifier
+from src.gateway.intent_parser import ParsedIntent, ParseResult
+
+
+def _match(text, skill_hint=""):
+    lower = text.lower()
+    if "задач" in lower or "сегодня" in lower:
+        return "task-manager"
+    return None
+
+
+@pytest.mark.unit
+def test_short_trigger_message_is_single():
+    fp = FastPathClassifier(_match)
+    r = fp.classify("что на сегодня")
+    assert r.single
+    assert r.skill_id == "task-manager"
+    assert r.confidence == 1.0
+
+
+@pytest.mark.unit
+def test_separator_defers_to_llm():
+    fp = FastPathClassifier(_match)
+    r = fp.classify("создай задачу купить молоко, а потом расскажи анекдот")
+    assert not r.single
+    assert r.reason == "separator"
+    assert not fp.classify("создай задачу\nи ещё одну").single
+    assert not fp.classify("Привет! Что на сегодня").single
+
+
+@pytest.mark.unit
+def test_soft_conjunction_lowers_confidence():
+    fp = FastPathClassifier(_match)
+    r = fp.classify("покажи задачи на сегодня и завтра")
+    assert r.single
+    assert r.confidence == 0.8
+
+
+@pytest.mark.unit
+def test_long_message_without_trigger_is_not_single():
+    fp = FastPathClassifier(_match)
+    r = fp.classify("расскажи мне пожалуйста что ты думаешь о погоде и о жизни вообще")
+    assert not r.single
+    assert r.skill_id is None
+
+
+@pytest.mark.unit
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        FastPathClassifier(_match, mode="fast")
+
+
+@pytest.mark.unit
+def test_shadow_agreement(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    fp = FastPathClassifier(_match)
+    fast = fp.classify("что на сегодня")
+
+    same = ParseResult(intents=[ParsedIntent(text="показать задачи", skill_hint="task-manager")])
+    split = ParseResult(intents=[ParsedIntent(text="a"), ParsedIntent(text="b")])
+    assert fp.record_shadow("что на сегодня", fast, same) is True
+    assert fp.record_shadow("что на сегодня", fast, split) is False
+
+    stats = fp.stats()
+    assert stats["agree"] == 1
+    assert stats["disagree"] == 1
+    assert list(tmp_path.glob("*.jsonl"))
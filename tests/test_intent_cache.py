@@ -0,0 +1,98 @@
+"""Tests for src/gateway/intent_cache.py — atom 2.8."""
+import json
+import pytest
+from unittest.mock import AsyncMock
+
+from src.gateway.intent_cache import IntentCache, normalize_message
+from src.gateway.intent_parser import ParsedIntent, ParseResult, parse_intents
+
+
+def _result(text="a"):
+    return ParseResult(intents=[ParsedIntent(text=text, skill_hint="task-manager")], raw_response="[]")
+
+
+@pytest.mark.unit
+def test_normalize_message():
+    assert normalize_message("  Что   на СЕГОДНЯ?  ") == "что на сегодня"
+
+
+@pytest.mark.unit
+def test_key_depends_on_skills_and_prompt():
+    base = IntentCache.make_key("что на сегодня", ["chatbot", "task-manager"], "prompt v1")
+    assert base == IntentCache.make_key("Что на сегодня?", ["task-manager", "chatbot"], "prompt v1")
+    assert base != IntentCache.make_key("что на сегодня", ["chatbot"], "prompt v1")
+    assert base != IntentCache.make_key("что на сегодня", ["chatbot", "task-manager"], "prompt v2")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_hit_miss_and_ttl():
+    cache = IntentCache(ttl=0.0)
+    await cache.put("k", _result())
+    assert await cache.get("k") is None  # expired immediately
+
+    cache = IntentCache(ttl=60)
+    assert await cache.get("k") is None
+    await cache.put("k", _result())
+    hit = await cache.get("k")
+    assert hit.from_cache is True
+    assert hit.intents[0].skill_hint == "task-manager"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    cache = IntentCache(max_entries=2)
+    await cache.put("a", _result("a"))
+    await cache.put("b", _result("b"))
+    await cache.get("a")
+    await cache.put("c", _result("c"))
+    assert await cache.get("b") is None
+    assert (await cache.get("a")).intents[0].text == "a"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_tier_fills_memory():
+    cache = IntentCache()
+    cache._redis = AsyncMock()
+    cache._redis.get = AsyncMock(return_value=json.dumps(IntentCache._encode(_result("shared"))))
+
+    hit = await cache.get("k")
+    assert hit.intents[0].text == "shared"
+    assert cache.stats()["redis_hits"] == 1
+    await cache.get("k")
+    cache._redis.get.assert_called_once()  # second read served from memory
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_parse_intents_skips_llm_on_repeat():
+    calls = 0
+
+    async def mock_llm(system, user):
+        nonlocal calls
+        calls += 1
+        return json.dumps([{"text": "показать задачи на сегодня", "skill_hint": "task-manager"}])
+
+    cache = IntentCache()
+    first = await parse_intents("что на сегодня", llm_call=mock_llm, skill_names=["task-manager"], cache=cache)
+    second = await parse_intents("Что на сегодня?", llm_call=mock_llm, skill_names=["task-manager"], cache=cache)
+
+    assert calls == 1
+    assert first.from_cache is False
+    assert second.from_cache is True
+    assert second.intents[0].text == first.intents[0].text
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_parse_failure_not_cached():
+    async def bad_llm(system, user):
+        raise Exception("API down")
+
+    cache = IntentCache()
+    await parse_intents("test", llm_call=bad_llm, cache=cache)
+    assert cache.stats()["entries"] == 0
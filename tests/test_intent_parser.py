@@ -61,3 +61,17 @@ def test_parse_response_dict_wrapper():
     raw = '{"intents": [{"text": "a"}, {"text": "b"}]}'
     intents = _parse_response(raw)
     assert len(intents) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_system_prompt_marked_cacheable():
+    seen = []
+
+    async def mock_llm(system, user):
+        seen.append(system)
+        return '[{"text": "hi", "skill_hint": ""}]'
+
+    await parse_intents("hi", llm_call=mock_llm, skill_names=["chatbot"])
+    assert seen[0][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "chatbot" in seen[0][0]["text"]
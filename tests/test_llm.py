@@ -1,7 +1,21 @@
 """Tests for src/skill_runtime/llm.py — atom 6.2."""
+import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from src.skill_runtime.llm import call_llm, LLMError, graceful_llm_error
+from src.skill_runtime import llm
+from src.skill_runtime.llm import (
+    call_llm, stream_llm, LLMError, graceful_llm_error, get_client, close_client,
+    LLMScheduler, Priority, TokenBucket, _backoff_delay, cached_system, usage_stats,
+)
+import httpx
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client():
+    llm._client = None
+    yield
+    llm._client = None
 
 
 @pytest.mark.unit
@@ -68,3 +82,261 @@ def test_graceful_llm_error():
     msg = graceful_llm_error()
     assert isinstance(msg, str)
     assert len(msg) > 10
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_and_closed():
+    first = get_client()
+    assert get_client() is first
+    await close_client()
+    assert llm._client is None
+    assert first.is_closed
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_call_llm_injected_client(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", "http://stub.local")
+
+    resp = MagicMock()
+    resp.raise_for_status = MagicMock()
+    resp.json = MagicMock(return_value={"content": [{"type": "text", "text": "pooled"}]})
+    client = AsyncMock()
+    client.post = AsyncMock(return_value=resp)
+
+    assert await call_llm("sys", "usr", client=client) == "pooled"
+    assert client.post.call_args.args[0] == "http://stub.local/v1/messages"
+    assert llm._client is None  # shared client untouched
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_serves_higher_priority_first():
+    sched = LLMScheduler(max_concurrency=1, requests_per_min=1000)
+    order = []
+
+    async def job(name, priority):
+        async with sched.slot("m", priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async with sched.slot("m"):
+        tasks = [
+            asyncio.create_task(job("background", Priority.BACKGROUND)),
+            asyncio.create_task(job("interactive", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert sched.stats()["m"]["waiting"] == 2
+        assert sched.stats()["m"]["waiting_by_priority"] == {"background": 1, "interactive": 1}
+    await asyncio.gather(*tasks)
+
+    assert order == ["interactive", "background"]
+    assert sched.stats()["m"]["active"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_cancelled_waiter_frees_nothing():
+    sched = LLMScheduler(max_concurrency=1)
+
+    async def waiter():
+        async with sched.slot("m"):
+            pass
+
+    async with sched.slot("m"):
+        t = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        t.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await t
+    assert sched.stats()["m"]["active"] == 0
+    assert sched.stats()["m"]["waiting"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_rate_wait_holds_no_slot():
+    sched = LLMScheduler(max_concurrency=1, requests_per_min=1)
+    async with sched.slot("m"):
+        pass
+
+    async def waiter():
+        async with sched.slot("m"):
+            pass
+
+    t = asyncio.create_task(waiter())
+    await asyncio.sleep(0.01)
+    # Queued for the request budget without holding a concurrency slot
+    assert sched.stats()["m"]["active"] == 0
+    assert sched.stats()["m"]["waiting"] == 1
+    t.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await t
+    assert sched.stats()["m"]["active"] == 0
+    assert sched.stats()["m"]["waiting"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_rate_limited_interactive_goes_first():
+    sched = LLMScheduler(max_concurrency=8, requests_per_min=60)
+    lane = sched._lane("m")
+    lane.requests.consume(lane.requests.available())  # bucket drained: 1 request/s
+    order = []
+
+    async def job(name, priority):
+        async with sched.slot("m", priority):
+            order.append(name)
+
+    tasks = [asyncio.create_task(job(f"bg{i}", Priority.BACKGROUND)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(job("interactive", Priority.INTERACTIVE)))
+    await asyncio.sleep(1.2)
+    assert order == ["interactive"]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert sched.stats()["m"]["waiting"] == 0
+
+
+@pytest.mark.unit
+def test_token_bucket_take_and_give_back():
+    bucket = TokenBucket(per_minute=60)
+    asyncio.run(bucket.take(60))
+    assert bucket.available() < 1
+    bucket.give_back(30)
+    assert 29 < bucket.available() <= 31
+
+
+@pytest.mark.unit
+def test_backoff_honors_retry_after():
+    error = Exception("429")
+    error.response = MagicMock(headers={"retry-after": "7"})
+    assert 7 <= _backoff_delay(0, error) <= 8
+
+
+@pytest.mark.unit
+def test_backoff_full_jitter_is_capped():
+    for attempt in range(10):
+        assert 0 <= _backoff_delay(attempt, Exception("boom")) <= llm.BACKOFF_CAP_SEC
+
+
+def _sse(*events):
+    body = ""
+    for event in events:
+        body += f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return body.encode()
+
+
+_STREAM_BODY = _sse(
+    {"type": "message_start", "message": {"usage": {"input_tokens": 10}}},
+    {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "При"}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "вет"}},
+    {"type": "message_delta", "usage": {"output_tokens": 2}},
+    {"type": "message_stop"},
+)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_llm_yields_deltas(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, content=_STREAM_BODY, headers={"content-type": "text/event-stream"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        deltas = [d async for d in stream_llm("sys", "usr", client=client)]
+    assert deltas == ["При", "вет"]
+    assert seen[0]["stream"] is True
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_llm_retries_before_first_delta(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(llm, "_backoff_delay", lambda attempt, e: 0)
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return httpx.Response(529, json={"type": "error"})
+        return httpx.Response(200, content=_STREAM_BODY)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        assert "".join([d async for d in stream_llm("sys", "usr", client=client)]) == "Привет"
+    assert calls == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_llm_error_after_output_is_not_retried(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    body = _sse(
+        {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "При"}},
+        {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+    )
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, content=body)
+
+    deltas = []
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(LLMError, match="Overloaded"):
+            async for d in stream_llm("sys", "usr", client=client):
+                deltas.append(d)
+    assert deltas == ["При"]
+    assert calls == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_llm_slow_consumer_holds_no_slot(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    sched = LLMScheduler(max_concurrency=1)
+
+    def handler(request):
+        return httpx.Response(200, content=_STREAM_BODY)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        stream = stream_llm("sys", "usr", client=client, scheduler=sched)
+        assert await stream.__anext__() == "При"
+        await asyncio.sleep(0.01)  # consumer busy (e.g. editing a Telegram message)
+        assert all(lane["active"] == 0 for lane in sched.stats().values())
+        await stream.aclose()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_call_llm_sends_cacheable_system_and_records_usage(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setitem(llm._usage, "cache_read_input_tokens", 0)
+    monkeypatch.setitem(llm._usage, "cache_creation_input_tokens", 0)
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "content": [{"type": "text", "text": "ok"}],
+            "usage": {"input_tokens": 5, "output_tokens": 1,
+                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 2000},
+        })
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        assert await call_llm(cached_system("static prompt"), "usr", client=client) == "ok"
+    assert seen[0]["system"] == [
+        {"type": "text", "text": "static prompt", "cache_control": {"type": "ephemeral"}},
+    ]
+    stats = usage_stats()
+    assert stats["cache_read_input_tokens"] == 2000
+    assert stats["cache_hit_ratio"] > 0
@@ -0,0 +1,213 @@
+"""Tests for Incremental Log Indexer — atom 8.5."""
+import asyncio
+import json
+
+import pytest
+
+from src.log.incremental import IncrementalIndexer
+from src.log.raw import RawSessionLog
+from src.memory.index import MemoryIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = MemoryIndex(tmp_path / "memory.db")
+    idx.connect()
+    yield idx
+    idx.close()
+
+
+class _RecordingLLM:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def __call__(self, system, user):
+        self.calls.append(user)
+        return json.dumps([{"skill": "психолог", "summary": user.splitlines()[-1]}])
+
+
+def _indexer(tmp_path, index, llm, **kwargs):
+    log = RawSessionLog(log_dir=tmp_path / "sessions")
+    indexer = IncrementalIndexer(log, index, llm, db_path=tmp_path / "offsets.db", **kwargs)
+    indexer.connect()
+    return log, indexer
+
+
+@pytest.mark.unit
+class TestIncrementalIndexer:
+    @pytest.mark.asyncio
+    async def test_indexes_only_new_tail(self, tmp_path, index):
+        llm = _RecordingLLM()
+        log, indexer = _indexer(tmp_path, index, llm)
+        log.write("s1", "user", "Обида на маму")
+        log.write("s1", "bot", "Расскажи")
+
+        assert await indexer.run_once() == {"s1": 1}
+        assert indexer.offset("s1") == (log.size("s1"), 2)
+        assert index.get("s1_m0_chunk0_0")["source"] == "s1"
+
+        # Nothing new: no LLM call
+        assert await indexer.run_once() == {}
+        assert len(llm.calls) == 1
+
+        log.write("s1", "user", "Купи молоко")
+        assert await indexer.run_once() == {"s1": 1}
+        assert llm.calls[-1] == "[user] Купи молоко"
+        assert indexer.offset("s1")[1] == 3
+        assert index.get("s1_m0_chunk0_0") is not None
+        assert index.get("s1_m2_chunk0_0") is not None
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_llm_ids_do_not_collide_across_tails(self, tmp_path, index):
+        async def llm(system, user):
+            return json.dumps([{"id": "c1", "skill": "психолог", "summary": user}])
+
+        log, indexer = _indexer(tmp_path, index, llm)
+        log.write("s1", "user", "один")
+        await indexer.run_once()
+        log.write("s1", "user", "два")
+        await indexer.run_once()
+        assert index.get("s1_m0_chunk0_c1")["summary"] == "[user] один"
+        assert index.get("s1_m1_chunk0_c1")["summary"] == "[user] два"
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_seed_existing_starts_at_end(self, tmp_path, index):
+        llm = _RecordingLLM()
+        log = RawSessionLog(log_dir=tmp_path / "sessions")
+        log.write("old", "user", "история")
+        indexer = IncrementalIndexer(
+            log, index, llm, db_path=tmp_path / "offsets.db", seed_existing=True,
+        )
+        indexer.connect()
+        assert indexer.offset("old") == (log.size("old"), 1)
+        log.write("old", "user", "новое")
+        log.write("new", "user", "привет")
+        await indexer.run_once()
+        assert sorted(llm.calls) == ["[user] новое", "[user] привет"]
+        assert index.get("old_m1_chunk0_0") is not None
+        indexer.close()
+
+        # Only a fresh checkpoint is seeded; later sessions start at 0
+        log.write("later", "user", "после рестарта")
+        indexer.connect()
+        assert indexer.offset("later") == (0, 0)
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_offsets_survive_restart(self, tmp_path, index):
+        llm = _RecordingLLM()
+        log, indexer = _indexer(tmp_path, index, llm)
+        log.write("s1", "user", "один")
+        await indexer.run_once()
+        indexer.close()
+
+        log, restarted = _indexer(tmp_path, index, llm)
+        assert restarted.changed_sessions() == []
+        log.write("s1", "user", "два")
+        assert restarted.changed_sessions() == ["s1"]
+        await restarted.run_once()
+        assert llm.calls == ["[user] один", "[user] два"]
+        restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_partial_line_waits(self, tmp_path, index):
+        llm = _RecordingLLM()
+        log, indexer = _indexer(tmp_path, index, llm)
+        log.write("s1", "user", "готово")
+        with open(tmp_path / "sessions" / "s1.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"role": "user", "te')
+        await indexer.run_once()
+        assert indexer.offset("s1")[1] == 1
+        assert indexer.offset("s1")[0] < log.size("s1")
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_store_keeps_offset(self, tmp_path, index, monkeypatch):
+        llm = _RecordingLLM()
+        log, indexer = _indexer(tmp_path, index, llm)
+        log.write("s1", "user", "привет")
+
+        def broken(card):
+            raise RuntimeError("index down")
+
+        with monkeypatch.context() as m:
+            m.setattr(index, "add", broken)
+            assert await indexer.run_once() == {}
+        assert indexer.offset("s1") == (0, 0)
+
+        assert await indexer.run_once() == {"s1": 1}
+        assert indexer.offset("s1")[1] == 1
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_keeps_offset(self, tmp_path, index, monkeypatch):
+        monkeypatch.setattr("src.log.indexer.RETRY_DELAY_SEC", 0)
+        calls = 0
+
+        async def broken_llm(system, user):
+            nonlocal calls
+            calls += 1
+            raise RuntimeError("LLM down")
+
+        log, indexer = _indexer(tmp_path, index, broken_llm)
+        log.write("s1", "user", "привет")
+        assert await indexer.run_once() == {}
+        assert calls > 1  # retried before giving up
+        assert indexer.offset("s1") == (0, 0)
+        assert indexer.failures("s1")[0] == 1
+        assert indexer.stats()["failed_passes"] == 1
+        # Backing off: the next pass leaves the session alone
+        assert indexer.changed_sessions() == []
+
+        monkeypatch.setattr(indexer, "FAILURE_BACKOFF_SEC", 0)
+        indexer._record_failure("s1")
+        indexer._llm_call = _RecordingLLM()
+        assert await indexer.run_once() == {"s1": 1}
+        assert indexer.offset("s1") == (log.size("s1"), 1)
+        assert indexer.failures("s1") == (0, 0.0)
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_bad_chunk_skipped_after_max_failures(self, tmp_path, index, monkeypatch):
+        monkeypatch.setattr("src.log.indexer.RETRY_DELAY_SEC", 0)
+        monkeypatch.setattr(IncrementalIndexer, "FAILURE_BACKOFF_SEC", 0)
+        big = " ".join(["слово"] * 1200)
+        sent = []
+
+        async def llm(system, user):
+            sent.append(user)
+            if user.startswith("[user] плохо"):
+                return "not json"
+            return json.dumps([{"skill": "психолог", "summary": user[:20]}])
+
+        log, indexer = _indexer(tmp_path, index, llm)
+        log.write("s1", "user", big)
+        log.write("s1", "user", "плохо " + big)
+        for _ in range(IncrementalIndexer.MAX_FAILURES):
+            assert await indexer.run_once() == {}
+        assert indexer.offset("s1") == (0, 0)
+
+        assert await indexer.run_once() == {"s1": 1}  # good chunk stored, bad one skipped
+        assert indexer.offset("s1") == (log.size("s1"), 2)
+        assert index.get("s1_m0_chunk0_0") is not None
+        calls = len(sent)
+        assert await indexer.run_once() == {}
+        assert len(sent) == calls  # the tail is not resent again
+        indexer.close()
+
+    @pytest.mark.asyncio
+    async def test_background_task(self, tmp_path, index):
+        llm = _RecordingLLM()
+        log, indexer = _indexer(tmp_path, index, llm, interval=0.01)
+        log.write("s1", "user", "один")
+        indexer.start()
+        await asyncio.sleep(0.05)
+        log.write("s2", "user", "два")
+        await asyncio.sleep(0.05)
+        await indexer.stop()
+        assert sorted(llm.calls) == ["[user] два", "[user] один"]
+        assert indexer.stats()["passes"] >= 2
+        assert indexer.stats()["running"] is False
+        indexer.close()
@@ -2,7 +2,7 @@
 import pytest
 import json
 
-from src.log.indexer import chunk_log, index_session
+from src.log.indexer import IndexingError, chunk_log, index_session
 
 
 @pytest.mark.unit
@@ -39,6 +39,7 @@ class TestLogIndexer:
         cards = await index_session(messages, llm_call=mock_llm, session_id="s1")
         assert len(cards) == 1
         assert cards[0]["summary"] == "Обида на маму"
+        assert cards[0]["id"] == "s1_chunk0_c1"
 
     @pytest.mark.asyncio
     async def test_index_session_no_llm(self):
@@ -61,3 +62,41 @@ class TestLogIndexer:
 
         cards = await index_session(messages, llm_call=broken_llm, session_id="s1")
         assert cards == []
+        with pytest.raises(IndexingError, match="1 of 1 chunks"):
+            await index_session(
+                messages, llm_call=broken_llm, session_id="s1", retry_delay=0, strict=True,
+            )
+
+    @pytest.mark.asyncio
+    async def test_index_session_concurrent_keeps_chunk_order(self):
+        import asyncio
+        messages = [{"role": "user", "text": f"m{i} " + " ".join(["word"] * 1200)} for i in range(5)]
+        in_flight = 0
+        peak = 0
+
+        async def slow_llm(system, user):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            n = int(user.split()[1][1:])
+            await asyncio.sleep(0.01 * (5 - n))  # later chunks finish first
+            in_flight -= 1
+            return json.dumps([{"summary": f"chunk {n}"}, {"summary": f"chunk {n} bis"}])
+
+        cards = await index_session(messages, llm_call=slow_llm, session_id="s1", max_concurrency=3)
+        assert peak == 3
+        assert [c["summary"] for c in cards[::2]] == [f"chunk {n}" for n in range(5)]
+        assert [c["id"] for c in cards[:4]] == ["s1_chunk0_0", "s1_chunk0_1", "s1_chunk1_2", "s1_chunk1_3"]
+
+    @pytest.mark.asyncio
+    async def test_index_session_retries_chunk(self):
+        calls = 0
+
+        async def flaky_llm(system, user):
+            nonlocal calls
+            calls += 1
+            return "not json" if calls == 1 else '[{"summary": "ok"}]'
+
+        cards = await index_session([{"text": "hi"}], llm_call=flaky_llm, session_id="s1", retry_delay=0)
+        assert calls == 2
+        assert cards == [{"summary": "ok", "id": "s1_chunk0_0"}]
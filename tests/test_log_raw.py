@@ -35,3 +35,14 @@ class TestRawSessionLog:
         log.write("s2", "user", "msg2")
         assert len(log.read("s1")) == 1
         assert len(log.read("s2")) == 1
+
+    def test_read_from_offset(self, tmp_path):
+        log = RawSessionLog(log_dir=tmp_path / "sessions")
+        log.write("sess_003", "user", "один")
+        entries, offset = log.read_from("sess_003")
+        assert [e["text"] for e in entries] == ["один"]
+        assert offset == log.size("sess_003")
+        log.write("sess_003", "bot", "два")
+        entries, offset = log.read_from("sess_003", offset)
+        assert [e["text"] for e in entries] == ["два"]
+        assert log.sessions() == ["sess_003"]
@@ -1,6 +1,10 @@
 """Tests for src/pending.py — atoms 4.1, 4.2, 4.3."""
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
-from src.pending import PendingManager, PendingIntent
+from src.pending import PendingManager, PendingIntent, RedisPendingManager
 
 
 @pytest.mark.unit
@@ -64,3 +68,58 @@ def test_separate_users():
     pm.confirm("u1")
     assert not pm.has_pending("u1")
     assert pm.has_pending("u2")
+
+
+def _make_redis_pending():
+    pm = RedisPendingManager.__new__(RedisPendingManager)
+    pm._redis = AsyncMock()
+    return pm
+
+
+def _entry(text, expires_at):
+    return json.dumps({
+        "intent": {"text": text, "skill_hint": "", "metadata": {}}, "expires_at": expires_at,
+    }).encode()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_add_stores_deadline_with_intent():
+    pm = _make_redis_pending()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    pm._redis.pipeline = MagicMock(return_value=pipe)
+
+    before = time.time()
+    msg = await pm.add("u1", PendingIntent(text="рефлексия", skill_hint="psychologist"))
+    assert "рефлексия" in msg
+    key, raw = pipe.rpush.call_args.args
+    entry = json.loads(raw)
+    assert key == "pending:u1"
+    assert entry["intent"]["skill_hint"] == "psychologist"
+    assert entry["expires_at"] >= before + RedisPendingManager.INTENT_TTL_SEC
+    pipe.expire.assert_called_once_with("pending:u1", RedisPendingManager.TTL_SEC)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_confirm_skips_expired_intents():
+    pm = _make_redis_pending()
+    now = time.time()
+    pm._redis.lpop = AsyncMock(side_effect=[_entry("old", now - 1), _entry("fresh", now + 60), None])
+    assert (await pm.confirm("u1")).text == "fresh"
+    assert await pm.reject("u1") is None
+    pm._redis.lpop.assert_awaited_with("pending:u1")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_peek_hides_expired_intents():
+    pm = _make_redis_pending()
+    now = time.time()
+    pm._redis.lrange = AsyncMock(return_value=[_entry("old", now - 1), _entry("fresh", now + 60)])
+    assert [i.text for i in await pm.peek("u1")] == ["fresh"]
+    pm._redis.lrange = AsyncMock(return_value=[_entry("old", now - 1)])
+    assert not await pm.has_pending("u1")
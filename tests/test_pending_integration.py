@@ -0,0 +1,63 @@
+"""Integration tests for src/pending.py and src/gateway/buffer.py Redis variants (real Redis)."""
+import asyncio
+
+import pytest
+
+from src.gateway.buffer import BufferItem, RedisMessageBuffer
+from src.pending import PendingIntent, RedisPendingManager
+from src.timer_wheel import TimerWheel
+
+REDIS_URL = "redis://localhost:6379/0"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_redis_pending_shared_between_workers():
+    a, b = RedisPendingManager(REDIS_URL), RedisPendingManager(REDIS_URL)
+    await a.clear("test_pending_u1")
+
+    msg = await a.add("test_pending_u1", PendingIntent(text="рефлексия", skill_hint="psychologist"))
+    assert "рефлексия" in msg
+    await a.add("test_pending_u1", PendingIntent(text="task2", metadata={"n": 2}))
+    assert await b.has_pending("test_pending_u1")
+    assert [i.text for i in await b.peek("test_pending_u1")] == ["рефлексия", "task2"]
+
+    first, second = await asyncio.gather(b.confirm("test_pending_u1"), a.reject("test_pending_u1"))
+    assert {first.text, second.text} == {"рефлексия", "task2"}
+    assert await a.confirm("test_pending_u1") is None
+    assert not await a.has_pending("test_pending_u1")
+
+    await a.close()
+    await b.close()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_redis_buffer_collect_is_atomic_and_times_out():
+    buf = RedisMessageBuffer(REDIS_URL, wheel=TimerWheel(tick=0.01))
+    other = RedisMessageBuffer(REDIS_URL)
+    await buf.clear("test_buffer_u1")
+
+    await buf.add("test_buffer_u1", BufferItem(type="forwarded", data={"text": "a"}))
+    await buf.add("test_buffer_u1", BufferItem(type="photo", data={"file": "x"}))
+    assert 0 < await buf._redis.ttl("buffer:test_buffer_u1") <= buf.TTL_SEC
+
+    got = await asyncio.gather(buf.collect("test_buffer_u1"), other.collect("test_buffer_u1"))
+    assert sorted(len(g) for g in got) == [0, 2]
+    assert not await buf.has_items("test_buffer_u1")
+
+    timed_out = []
+
+    async def on_timeout(user_id):
+        timed_out.append(user_id)
+
+    buf.TIMEOUT_SEC = 0.03
+    buf.set_timeout_callback(on_timeout)
+    await buf.add("test_buffer_u1", BufferItem(type="forwarded"))
+    await buf.start_timer("test_buffer_u1")
+    await asyncio.sleep(0.08)
+    assert timed_out == ["test_buffer_u1"]
+
+    await buf.clear("test_buffer_u1")
+    await buf.close()
+    await other.close()
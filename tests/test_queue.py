@@ -1,6 +1,9 @@
 """Tests for src/queue.py — atoms 3.1, 3.2, 3.3."""
+import json
 import pytest
-from src.queue import IntentQueue
+from unittest.mock import AsyncMock
+
+from src.queue import IntentQueue, QueueManager, RedisIntentQueue
 
 
 @pytest.mark.unit
@@ -58,6 +61,16 @@ def test_peek():
     assert q.size() == 2  # peek does not remove
 
 
+@pytest.mark.unit
+def test_head():
+    q = IntentQueue()
+    assert q.head() is None
+    q.add("a", priority=3)
+    q.add("b", priority=1)
+    assert q.head().text == "b"
+    assert q.size() == 2
+
+
 @pytest.mark.unit
 def test_size_and_clear():
     q = IntentQueue()
@@ -75,3 +88,88 @@ def test_skill_hint():
     q.add("do stuff", priority=2, skill_hint="task-manager")
     item = q.pop()
     assert item.skill_hint == "task-manager"
+
+
+@pytest.mark.unit
+def test_manager_isolates_users():
+    m = QueueManager()
+    m.get("u1").add("task for u1", priority=5)
+    m.get("u2").add("task for u2", priority=1)
+    assert m.get("u1").pop().text == "task for u1"
+    assert m.get("u1").pop() is None
+    assert m.get("u2").size() == 1
+    assert m.total_size() == 1
+
+
+@pytest.mark.unit
+def test_manager_returns_same_shard():
+    m = QueueManager()
+    assert m.get("u1") is m.get("u1")
+    assert m.active_users() == 1
+
+
+@pytest.mark.unit
+def test_manager_evicts_idle_empty_shards():
+    m = QueueManager(idle_ttl=0.0)
+    m.get("idle")
+    m.get("busy").add("still queued")
+    evicted = m.evict_idle()
+    assert evicted == 1
+    assert not m.has("idle")
+    assert m.has("busy")
+
+
+def _make_redis_queue():
+    q = RedisIntentQueue.__new__(RedisIntentQueue)
+    q._redis = AsyncMock()
+    q._key = "queue:u1"
+    q._seq_key = "queue:u1:seq"
+    return q
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_add_uses_single_script_call():
+    q = _make_redis_queue()
+    q._redis.eval = AsyncMock(return_value=7)
+    seq = await q.add("создай задачу", priority=2, skill_hint="task-manager")
+    assert seq == 7
+    args = q._redis.eval.call_args.args
+    assert args[1:5] == (2, "queue:u1", "queue:u1:seq", 2)
+    assert json.loads(args[5])["skill_hint"] == "task-manager"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_pop_decodes_score():
+    q = _make_redis_queue()
+    payload = json.dumps({"text": "a", "skill_hint": "chatbot", "metadata": {}})
+    member = f"{3:012d}|{payload}".encode()
+    q._redis.zpopmin = AsyncMock(return_value=[(member, float(5 * 2 ** 32 + 3))])
+    item = await q.pop()
+    assert item.text == "a"
+    assert item.priority == 5
+    assert item._seq == 3
+    assert item.skill_hint == "chatbot"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_skill_id_round_trip():
+    q = _make_redis_queue()
+    q._redis.eval = AsyncMock(return_value=4)
+    await q.add("создай задачу", priority=2, skill_id="task-manager", source="voice")
+    payload = q._redis.eval.call_args.args[5]
+    member = f"{4:012d}|{payload}".encode()
+    q._redis.zpopmin = AsyncMock(return_value=[(member, float(2 * 2 ** 32 + 4))])
+    item = await q.pop()
+    assert item.skill_id == "task-manager"
+    assert item.metadata == {"source": "voice"}  # not folded into metadata
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_pop_empty():
+    q = _make_redis_queue()
+    q._redis.zpopmin = AsyncMock(return_value=[])
+    assert await q.pop() is None
@@ -0,0 +1,30 @@
+"""Integration tests for src/queue.py — atom 3.5 (real Redis)."""
+import pytest
+
+from src.queue import RedisIntentQueue
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_redis_queue_priority_and_fifo():
+    q = RedisIntentQueue("redis://localhost:6379/0", name="test_queue_integration")
+    await q.clear()
+
+    await q.add("low", priority=10)
+    await q.add("first", priority=1)
+    await q.add("second", priority=1, skill_hint="task-manager")
+    assert await q.size() == 3
+
+    peeked = await q.peek()
+    assert [i.text for i in peeked] == ["first", "second", "low"]
+
+    assert (await q.pop()).text == "first"
+    item = await q.pop()
+    assert item.text == "second"
+    assert item.skill_hint == "task-manager"
+    assert (await q.pop()).text == "low"
+    assert await q.pop() is None
+    assert await q.is_empty()
+
+    await q.clear()
+    await q.close()
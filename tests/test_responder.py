@@ -1,8 +1,11 @@
 """Tests for src/gateway/responder.py — atom 2.6."""
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
-from src.gateway.responder import send_response, send_skill_response
+from src.gateway.responder import (
+    pack_messages, send_response, send_skill_response, send_streaming_response,
+)
+from src.gateway.send_queue import SendScheduler
 
 
 @pytest.mark.unit
@@ -37,3 +40,52 @@ async def test_send_skill_response():
     output = {"type": "response", "text": "Done!", "done": False}
     await send_skill_response(bot, 123, output)
     bot.send_message.assert_called_once_with(123, "Done!")
+
+
+@pytest.mark.unit
+def test_pack_messages_coalesces_and_splits():
+    assert pack_messages(["reply", "", "debug"]) == ["reply\n\ndebug"]
+    assert pack_messages(["A" * 4092, "debug"]) == ["A" * 4092, "debug"]
+    assert pack_messages(["A" * 5000, "B"]) == ["A" * 4096, "A" * 904 + "\n\nB"]
+
+
+async def _deltas(*parts):
+    for p in parts:
+        yield p
+
+
+def _sender(bot):
+    return SendScheduler(bot, chat_per_sec=100, chat_burst=10)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_streaming_sends_first_then_edits():
+    bot = AsyncMock()
+    bot.send_message.return_value = MagicMock(message_id=7)
+    text = await send_streaming_response(_sender(bot), 123, _deltas("При", "вет", "!"), edit_interval=0)
+    assert text == "Привет!"
+    bot.send_message.assert_called_once_with(123, "При")
+    assert [c.args[0] for c in bot.edit_message_text.call_args_list] == ["Привет", "Привет!"]
+    assert bot.edit_message_text.call_args.kwargs == {"chat_id": 123, "message_id": 7}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_streaming_throttles_edits_but_sends_final_text():
+    bot = AsyncMock()
+    bot.send_message.return_value = MagicMock(message_id=7)
+    await send_streaming_response(_sender(bot), 123, _deltas(*"abcdef"), edit_interval=60)
+    bot.send_message.assert_called_once_with(123, "a")
+    assert [c.args[0] for c in bot.edit_message_text.call_args_list] == ["abcdef"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_streaming_overflow_continues_in_new_message():
+    bot = AsyncMock()
+    bot.send_message.return_value = MagicMock(message_id=7)
+    text = await send_streaming_response(_sender(bot), 123, _deltas("A" * 4000, "B" * 200), edit_interval=60)
+    assert len(text) == 4200
+    assert [c.args[1] for c in bot.send_message.call_args_list] == ["A" * 4000, "B" * 104]
+    assert bot.edit_message_text.call_args_list[0].args[0] == "A" * 4000 + "B" * 96
@@ -0,0 +1,119 @@
+"""Tests for src/gateway/send_queue.py — atom 2.11."""
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.gateway.send_queue import SendPriority, SendScheduler
+
+
+def _bot():
+    bot = MagicMock()
+    sent = []
+
+    async def send_message(chat_id, text):
+        sent.append((chat_id, text, time.monotonic()))
+
+    bot.send_message = AsyncMock(side_effect=send_message)
+    return bot, sent
+
+
+@pytest.mark.unit
+class TestSendScheduler:
+    @pytest.mark.asyncio
+    async def test_reply_and_debug_coalesced(self):
+        bot, sent = _bot()
+        s = SendScheduler(bot)
+        await s.send(1, "reply", "debug block")
+        assert [(c, t) for c, t, _ in sent] == [(1, "reply\n\ndebug block")]
+        await s.close()
+
+    @pytest.mark.asyncio
+    async def test_per_chat_rate_keeps_order(self):
+        bot, sent = _bot()
+        s = SendScheduler(bot, chat_per_sec=20, chat_burst=1)
+        await asyncio.gather(s.send(1, "a"), s.send(1, "b"), s.send(1, "c"), s.send(2, "x"))
+        chat1 = [(t, ts) for c, t, ts in sent if c == 1]
+        assert [t for t, _ in chat1] == ["a", "b", "c"]
+        assert chat1[-1][1] - chat1[0][1] >= 0.09
+        assert s.stats()["sent"] == 4
+        await s.close()
+
+    @pytest.mark.asyncio
+    async def test_interactive_before_broadcast(self):
+        bot, sent = _bot()
+        s = SendScheduler(bot, global_per_sec=5)
+        broadcasts = [s.send(c, "cron", priority=SendPriority.BROADCAST) for c in range(1, 7)]
+        await asyncio.gather(*broadcasts, s.send(99, "reply"))
+        assert sent[0][0] == 99
+        assert len(sent) == 7
+        await s.close()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_retried(self):
+        bot, sent = _bot()
+        ok = bot.send_message.side_effect
+        calls = 0
+
+        async def flaky(chat_id, text):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=0)
+            await ok(chat_id, text)
+
+        bot.send_message.side_effect = flaky
+        s = SendScheduler(bot)
+        await s.send(1, "hello")
+        assert [t for _, t, _ in sent] == ["hello"]
+        assert s.stats()["retried"] == 1
+        await s.close()
+
+    @pytest.mark.asyncio
+    async def test_other_errors_propagate(self):
+        bot, _ = _bot()
+        bot.send_message.side_effect = RuntimeError("chat not found")
+        s = SendScheduler(bot)
+        with pytest.raises(RuntimeError, match="chat not found"):
+            await s.send(1, "hello")
+        assert s.stats()["failed"] == 1
+        await s.close()
+
+    @pytest.mark.asyncio
+    async def test_send_message_and_edit_share_chat_queue(self):
+        bot, sent = _bot()
+        bot.send_message.side_effect = None
+        bot.send_message.return_value = MagicMock(message_id=7)
+        bot.edit_message_text = AsyncMock()
+        s = SendScheduler(bot, chat_per_sec=20, chat_burst=1)
+        message = await s.send_message(1, "При")
+        start = time.monotonic()
+        await s.edit_text(1, message.message_id, "Привет")
+        assert time.monotonic() - start >= 0.04  # paced by the chat bucket
+        bot.edit_message_text.assert_awaited_once_with("Привет", chat_id=1, message_id=7)
+        assert s.stats()["sent"] == 2
+        await s.close()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_all_chats(self):
+        bot, sent = _bot()
+        ok = bot.send_message.side_effect
+        flooded_at = None
+
+        async def flaky(chat_id, text):
+            nonlocal flooded_at
+            if flooded_at is None:
+                flooded_at = time.monotonic()
+                raise TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=0.1)
+            await ok(chat_id, text)
+
+        bot.send_message.side_effect = flaky
+        s = SendScheduler(bot)
+        first = asyncio.create_task(s.send(1, "a"))
+        await asyncio.sleep(0.01)
+        await asyncio.gather(first, s.send(2, "b"))
+        assert all(ts - flooded_at >= 0.1 for _, _, ts in sent)
+        await s.close()
@@ -3,7 +3,7 @@ import json
 import pytest
 from unittest.mock import AsyncMock
 
-from src.session import SessionState
+from src.session import CachedSessionState, SessionState
 
 
 def _make_session():
@@ -50,3 +50,147 @@ async def test_clear_deletes_key():
 
     await s.clear("user1")
     s._redis.delete.assert_called_once_with("session:user1")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_update_is_single_hset():
+    s = _make_session()
+    s._redis.hset = AsyncMock()
+
+    await s.update("user1", active_skill="chatbot", status="busy")
+
+    s._redis.hgetall.assert_not_called()
+    s._redis.delete.assert_not_called()
+    s._redis.hset.assert_called_once_with(
+        "session:user1", mapping={"active_skill": "chatbot", "status": "busy"},
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_get_fills_missing_fields_with_defaults():
+    s = _make_session()
+    s._redis.hgetall = AsyncMock(return_value={b"status": b"busy"})
+
+    result = await s.get("user1")
+    assert result["status"] == "busy"
+    assert result["active_skill"] == ""
+    assert result["pending_intents"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_compare_and_update_args():
+    s = _make_session()
+    s._redis.eval = AsyncMock(return_value=1)
+
+    ok = await s.compare_and_update("user1", {"status": "idle"}, status="busy")
+    assert ok is True
+    args = s._redis.eval.call_args.args
+    assert args[1:] == (1, "session:user1", "1", "status", "idle", "idle", "status", "busy")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_compare_and_update_conflict():
+    s = _make_session()
+    s._redis.eval = AsyncMock(return_value=0)
+
+    assert await s.compare_and_update("user1", {"status": "idle"}, status="busy") is False
+
+
+def _make_cached_session():
+    s = CachedSessionState.__new__(CachedSessionState)
+    s._redis = AsyncMock()
+    s._init_cache(max_entries=2)
+    return s
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cached_get_hits_after_first_read():
+    s = _make_cached_session()
+    s._redis.hgetall = AsyncMock(return_value={b"status": b"busy"})
+
+    first = await s.get("user1")
+    first["status"] = "mutated"  # callers get copies
+    second = await s.get("user1")
+
+    assert second["status"] == "busy"
+    assert s._redis.hgetall.call_count == 1
+    assert s.stats()["hits"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cached_update_writes_through():
+    s = _make_cached_session()
+    s._redis.hgetall = AsyncMock(return_value={})
+    s._redis.hset = AsyncMock()
+
+    await s.get("user1")
+    await s.update("user1", status="waiting_answer", pending_intents=["x"])
+    state = await s.get("user1")
+
+    assert state["status"] == "waiting_answer"
+    assert state["pending_intents"] == ["x"]
+    assert s._redis.hgetall.call_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_keyspace_event_skips_own_write_and_evicts_foreign():
+    s = _make_cached_session()
+    s._redis.hgetall = AsyncMock(return_value={})
+    s._redis.hset = AsyncMock()
+
+    await s.get("user1")
+    await s.update("user1", status="busy")
+    s._on_keyspace_event("user1")  # echo of our own HSET
+    assert "user1" in s._cache
+
+    s._on_keyspace_event("user1")  # another worker wrote
+    assert "user1" not in s._cache
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cache_is_lru_bounded():
+    s = _make_cached_session()
+    s._redis.hgetall = AsyncMock(return_value={})
+
+    for user in ("u1", "u2", "u3"):
+        await s.get(user)
+    assert list(s._cache) == ["u2", "u3"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cache_bypassed_when_notifications_refused():
+    s = _make_cached_session()
+    s._redis.config_get = AsyncMock(side_effect=Exception("unknown command 'CONFIG'"))
+    s._redis.hgetall = AsyncMock(return_value={})
+
+    await s.start_invalidation()
+    await s.get("user1")
+    await s.get("user1")
+
+    assert s.stats()["enabled"] is False
+    assert s._redis.hgetall.call_count == 2
+    assert s._listener is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_own_writes_are_bounded():
+    s = _make_cached_session()
+    s._redis.hset = AsyncMock()
+
+    for user in ("u1", "u2", "u3", "u4"):
+        await s.update(user, status="busy")
+    assert list(s._own_writes) == ["u3", "u4"]  # capped at max_entries
+
+    s.OWN_WRITE_TTL_SEC = 0
+    await s.update("u5", status="busy")
+    assert list(s._own_writes) == []
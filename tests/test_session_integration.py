@@ -33,3 +33,22 @@ async def test_session_crud_real_redis():
     # Cleanup
     await s.clear(user)
     await s.close()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_compare_and_update_real_redis():
+    s = SessionState("redis://localhost:6379/0")
+    user = "test_user_cas"
+    await s.clear(user)
+
+    # Missing fields compare as defaults
+    assert await s.compare_and_update(user, {"status": "idle"}, status="busy", active_skill="chatbot")
+    # Stale expectation is rejected and nothing is written
+    assert not await s.compare_and_update(user, {"status": "idle"}, status="waiting_answer")
+    state = await s.get(user)
+    assert state["status"] == "busy"
+    assert state["active_skill"] == "chatbot"
+
+    await s.clear(user)
+    await s.close()
@@ -1,8 +1,14 @@
 """Tests for src/input/stt.py — atom 1.2 (unit, mocked Deepgram)."""
+import asyncio
+import gc
+import json
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.input.stt import transcribe_voice, STTError, graceful_stt_error
+from src.input.stt import (
+    transcribe_voice, STTError, graceful_stt_error, stream_deepgram, _deepgram_live_transcribe,
+)
 
 
 @pytest.mark.unit
@@ -29,3 +35,139 @@ def test_graceful_stt_error_returns_string():
     msg = graceful_stt_error()
     assert isinstance(msg, str)
     assert len(msg) > 10
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_transcribe_voice_streams_without_temp_file(monkeypatch):
+    monkeypatch.setenv("DEEPGRAM_API_KEY", "test-key")
+    bot = MagicMock()
+    bot.get_file = AsyncMock(return_value=MagicMock(file_path="voice/file.oga"))
+    bot.token = "123:abc"
+    bot.session.api.is_local = False
+    bot.session.api.file_url = MagicMock(return_value="https://tg/file")
+
+    async def stream_content(**kwargs):
+        for chunk in (b"Ogg", b"S-data"):
+            yield chunk
+
+    bot.session.stream_content = stream_content
+
+    uploaded = []
+
+    async def mock_post(url, content=None, **kwargs):
+        async for chunk in content:
+            uploaded.append(chunk)
+        resp = MagicMock()
+        resp.raise_for_status = MagicMock()
+        resp.json = MagicMock(return_value={
+            "results": {"channels": [{"alternatives": [{"transcript": "привет"}]}]}
+        })
+        return resp
+
+    mock_client = AsyncMock()
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+    mock_client.post = mock_post
+
+    with patch("httpx.AsyncClient", return_value=mock_client), \
+         patch("tempfile.NamedTemporaryFile", side_effect=AssertionError("no temp files")):
+        text = await transcribe_voice(bot, "file123")
+
+    assert text == "привет"
+    assert uploaded == [b"Ogg", b"S-data"]
+
+
+async def _fake_deepgram(ws):
+    """Local stand-in for Deepgram live: interim + final per audio chunk."""
+    received, words = [], ""
+    while True:
+        msg = await ws.recv()
+        if isinstance(msg, str):
+            assert json.loads(msg) == {"type": "CloseStream"}
+            break
+        received.append(msg)
+        words = " ".join(b.decode() for b in received)
+        await ws.send(json.dumps({
+            "type": "Results", "is_final": False,
+            "channel": {"alternatives": [{"transcript": msg.decode()[:2]}]},
+        }))
+        await ws.send(json.dumps({
+            "type": "Results", "is_final": True,
+            "channel": {"alternatives": [{"transcript": msg.decode()}]},
+        }))
+    await ws.send(json.dumps({"type": "Metadata", "received": words}))
+    await ws.close()
+
+
+async def _chunks(*parts: bytes):
+    for p in parts:
+        yield p
+
+
+@pytest.fixture
+async def fake_deepgram_url():
+    from websockets.asyncio.server import serve
+    async with serve(_fake_deepgram, "127.0.0.1", 0, subprotocols=["token"]) as server:
+        port = server.sockets[0].getsockname()[1]
+        yield f"ws://127.0.0.1:{port}/v1/listen"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_deepgram_yields_interim_and_final(fake_deepgram_url):
+    updates = [u async for u in stream_deepgram("k", _chunks(b"hello", b"world"), url=fake_deepgram_url)]
+    assert [(u.text, u.is_final) for u in updates] == [
+        ("he", False), ("hello", True), ("wo", False), ("world", True),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_live_transcribe_reports_running_transcript(fake_deepgram_url):
+    seen = []
+
+    async def on_interim(text):
+        seen.append(text)
+
+    text = await _deepgram_live_transcribe(
+        "k", _chunks(b"hello", b"world"), on_interim, url=fake_deepgram_url,
+    )
+    assert text == "hello world"
+    assert seen == ["he", "hello", "hello wo", "hello world"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_live_transcribe_surfaces_audio_errors(fake_deepgram_url):
+    async def broken():
+        yield b"hello"
+        raise ConnectionError("telegram dropped")
+
+    with pytest.raises(ConnectionError, match="telegram dropped"):
+        await _deepgram_live_transcribe("k", broken(), url=fake_deepgram_url)
+
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_deepgram_retrieves_cancelled_sender(fake_deepgram_url):
+    unretrieved = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda _, ctx: unretrieved.append(ctx["message"]))
+
+    async def endless():
+        try:
+            while True:
+                yield b"hello"
+                await asyncio.sleep(0.01)
+        finally:
+            raise ConnectionError("telegram dropped")  # fails while being cancelled
+
+    stream = stream_deepgram("k", endless(), url=fake_deepgram_url)
+    assert (await anext(stream)).text == "he"
+    await stream.aclose()
+    gc.collect()
+    await asyncio.sleep(0)
+    loop.set_exception_handler(None)
+    assert unretrieved == []
@@ -8,10 +8,24 @@ from unittest.mock import AsyncMock, patch, MagicMock
 # Import it by adding skills dir to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "skills", "task-manager"))
 
+import handler
 from handler import (
-    handle, create_task, get_tasks, complete_task, delete_task,
+    handle, create_task, get_tasks, complete_task, delete_task, get_projects,
     _extract_task_content, _extract_due, TodoistError,
 )
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+import httpx
+
+
+@pytest.fixture(autouse=True)
+def _reset_client():
+    """Each test builds its own (patched) pooled client and mirrors."""
+    handler._client = None
+    handler._mirrors.clear()
+    yield
+    handler._client = None
+    handler._mirrors.clear()
 
 
 @pytest.mark.unit
@@ -181,3 +195,91 @@ class TestHandle:
                 result = await handle("создай задачу тест ошибки")
 
         assert result["type"] == "error"
+
+
+class _FakeTodoist:
+    """Sync + REST endpoints backed by httpx.MockTransport."""
+
+    TZ = "Pacific/Kiritimati"  # UTC+14: usually a different date than the server's
+
+    def __init__(self):
+        today = datetime.now(ZoneInfo(self.TZ)).date().isoformat()
+        self.sync_tokens: list[str] = []
+        self.rest_gets = 0
+        self.pages = [
+            {
+                "sync_token": "t1", "full_sync": True,
+                "items": [
+                    {"id": "1", "content": "Купить молоко", "due": {"date": today}, "priority": 1},
+                    {"id": "2", "content": "Позвонить маме", "due": {"date": "2000-01-01"}},
+                ],
+                "projects": [{"id": "p1", "name": "Inbox"}],
+                "user": {"tz_info": {"timezone": self.TZ}},
+            },
+            {
+                "sync_token": "t2", "full_sync": False,
+                "items": [
+                    {"id": "1", "content": "Купить молоко", "checked": True},
+                    {"id": "3", "content": "Сдать отчёт", "due": {"date": today}},
+                ],
+                "projects": [],
+            },
+        ]
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/sync"):
+            form = dict(x.split("=", 1) for x in request.content.decode().split("&"))
+            self.sync_tokens.append(form["sync_token"].replace("%2A", "*"))
+            return httpx.Response(200, json=self.pages[len(self.sync_tokens) - 1])
+        if request.method == "POST" and request.url.path.endswith("/close"):
+            return httpx.Response(204)
+        self.rest_gets += 1
+        return httpx.Response(200, json={"results": []})
+
+
+@pytest.mark.unit
+class TestTodoistMirror:
+    @pytest.fixture
+    def fake(self, monkeypatch):
+        monkeypatch.setenv("TODOIST_API_TOKEN", "test_token")
+        monkeypatch.setenv("TODOIST_MIRROR_SEC", "60")
+        fake = _FakeTodoist()
+        handler._client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+        return fake
+
+    @pytest.mark.asyncio
+    async def test_reads_served_from_mirror(self, fake):
+        today = await get_tasks("today")
+        assert [t["content"] for t in today] == ["Купить молоко"]
+        assert len(await get_tasks("all")) == 2
+        assert await get_projects() == [{"id": "p1", "name": "Inbox"}]
+        assert fake.sync_tokens == ["*"]
+        assert fake.rest_gets == 0
+
+    @pytest.mark.asyncio
+    async def test_today_uses_account_timezone(self, fake):
+        await get_tasks("today")
+        mirror = handler._mirrors["test_token"]
+        assert mirror.timezone == _FakeTodoist.TZ
+        assert mirror.today() == datetime.now(ZoneInfo(_FakeTodoist.TZ)).date().isoformat()
+
+    @pytest.mark.asyncio
+    async def test_stale_mirror_syncs_incrementally(self, fake):
+        await get_tasks("today")
+        handler._mirrors["test_token"]._synced_at = 0.0
+        today = await get_tasks("today")
+        assert [t["content"] for t in today] == ["Сдать отчёт"]
+        assert fake.sync_tokens == ["*", "t1"]
+
+    @pytest.mark.asyncio
+    async def test_writes_update_mirror(self, fake):
+        await get_tasks("all")
+        await complete_task("1")
+        assert [t["id"] for t in await get_tasks("all")] == ["2"]
+        assert fake.sync_tokens == ["*"]
+
+    @pytest.mark.asyncio
+    async def test_unsupported_filter_uses_rest(self, fake):
+        await get_tasks("p1 & overdue")
+        assert fake.rest_gets == 1
+        assert fake.sync_tokens == []
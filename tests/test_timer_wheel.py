@@ -0,0 +1,77 @@
+"""Tests for src/timer_wheel.py — atom 0.7."""
+import asyncio
+
+import pytest
+
+from src.gateway.buffer import BufferItem, MessageBuffer
+from src.timer_wheel import TimerWheel
+
+
+def _recorder(fired, name):
+    async def cb():
+        fired.append((name, asyncio.get_running_loop().time()))
+    return cb
+
+
+@pytest.mark.unit
+class TestTimerWheel:
+    @pytest.mark.asyncio
+    async def test_fires_not_early_and_within_one_tick(self):
+        wheel = TimerWheel(tick=0.01, slots=8)
+        fired = []
+        start = asyncio.get_running_loop().time()
+        wheel.schedule("a", 0.05, _recorder(fired, "a"))
+        await asyncio.sleep(0.1)
+        assert [n for n, _ in fired] == ["a"]
+        assert 0.05 <= fired[0][1] - start <= 0.05 + 0.03
+        assert len(wheel) == 0
+
+    @pytest.mark.asyncio
+    async def test_delay_longer_than_one_revolution(self):
+        wheel = TimerWheel(tick=0.01, slots=4)
+        fired = []
+        wheel.schedule("a", 0.1, _recorder(fired, "a"))  # 2.5 revolutions
+        await asyncio.sleep(0.07)
+        assert fired == []
+        await asyncio.sleep(0.06)
+        assert [n for n, _ in fired] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_and_reschedule(self):
+        wheel = TimerWheel(tick=0.01)
+        fired = []
+        wheel.schedule("a", 0.02, _recorder(fired, "a1"))
+        wheel.schedule("a", 0.05, _recorder(fired, "a2"))  # replaces a1
+        wheel.schedule("b", 0.02, _recorder(fired, "b"))
+        assert wheel.cancel("b")
+        assert not wheel.cancel("b")
+        await asyncio.sleep(0.08)
+        assert [n for n, _ in fired] == ["a2"]
+
+    @pytest.mark.asyncio
+    async def test_same_tick_fires_as_one_batch(self):
+        wheel = TimerWheel(tick=0.02)
+        fired = []
+        for i in range(100):
+            wheel.schedule(i, 0.01, _recorder(fired, i))
+        await asyncio.sleep(0.06)
+        assert len(fired) == 100
+        assert wheel.stats() == {"pending": 0, "fired": 100, "batches": 1}
+
+    @pytest.mark.asyncio
+    async def test_buffer_timeout_uses_wheel(self):
+        buf = MessageBuffer(wheel=TimerWheel(tick=0.01))
+        buf.TIMEOUT_SEC = 0.03
+        timed_out = []
+
+        async def on_timeout(user_id):
+            timed_out.append(user_id)
+
+        buf.set_timeout_callback(on_timeout)
+        buf.add("u1", BufferItem(type="forwarded"))
+        buf.add("u2", BufferItem(type="forwarded"))
+        buf.start_timer("u1")
+        buf.start_timer("u2")
+        buf.collect("u2")  # cancels u2's timer
+        await asyncio.sleep(0.08)
+        assert timed_out == ["u1"]
@@ -0,0 +1,69 @@
+"""Tests for src/input/transcript_cache.py — atom 1.6."""
+import pytest
+from unittest.mock import AsyncMock
+
+from src.input.stt import transcribe_voice
+from src.input.transcript_cache import TranscriptCache
+from src.input.video_stt import transcribe_video
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = TranscriptCache(tmp_path / "transcripts.db")
+    c.connect()
+    yield c
+    c.close()
+
+
+@pytest.mark.unit
+class TestTranscriptCache:
+    def test_put_and_get(self, cache):
+        cache.put("uniq1", "nova-2", "ru", "привет")
+        assert cache.get("uniq1", "nova-2", "ru") == "привет"
+        assert cache.stats() == {"hits": 1, "misses": 0}
+
+    def test_key_includes_model_and_language(self, cache):
+        cache.put("uniq1", "nova-2", "ru", "привет")
+        assert cache.get("uniq1", "nova-3", "ru") is None
+        assert cache.get("uniq1", "nova-2", "en") is None
+
+    def test_ttl_expiry(self, tmp_path):
+        c = TranscriptCache(tmp_path / "t.db", ttl=0.0)
+        c.connect()
+        c.put("uniq1", "nova-2", "ru", "text")
+        assert c.get("uniq1", "nova-2", "ru") is None
+        c.close()
+
+    def test_size_bound_evicts_lru(self, tmp_path):
+        c = TranscriptCache(tmp_path / "t.db", max_entries=2)
+        c.connect()
+        c.put("a", "m", "ru", "A")
+        c.put("b", "m", "ru", "B")
+        c.put("c", "m", "ru", "C")
+        assert c.get("a", "m", "ru") is None
+        assert c.get("c", "m", "ru") == "C"
+        c.close()
+
+    def test_hit_refreshes_used_only_when_stale(self, cache, monkeypatch):
+        now = 1_000_000.0
+        monkeypatch.setattr("src.input.transcript_cache.time.time", lambda: now)
+        cache.put("a", "m", "ru", "A")
+        used = lambda: cache._conn.execute("SELECT used FROM transcripts").fetchone()[0]  # noqa: E731
+
+        now += cache.USED_RESOLUTION_SEC / 2
+        assert cache.get("a", "m", "ru") == "A"
+        assert used() == 1_000_000.0  # fresh enough: no write
+        assert not cache._conn.in_transaction
+
+        now += cache.USED_RESOLUTION_SEC
+        assert cache.get("a", "m", "ru") == "A"
+        assert used() == now
+
+    @pytest.mark.asyncio
+    async def test_voice_hit_skips_network(self, cache, monkeypatch):
+        monkeypatch.setenv("DEEPGRAM_API_KEY", "")
+        cache.put("uniq1", "nova-2", "ru", "из кэша")
+        bot = AsyncMock()
+        assert await transcribe_voice(bot, "f1", file_unique_id="uniq1", cache=cache) == "из кэша"
+        assert await transcribe_video(bot, "f1", file_unique_id="uniq1", cache=cache) == "из кэша"
+        bot.get_file.assert_not_called()
@@ -0,0 +1,46 @@
+"""Tests for src/triggers.py — atom 5.6."""
+import pytest
+
+from src.config_loader import SkillConfig
+from src.triggers import TriggerIndex
+
+
+def _skill(triggers, priority):
+    return SkillConfig(name="s", type="executor", description="", triggers=triggers, priority=priority)
+
+
+@pytest.mark.unit
+def test_root_matches_word_forms():
+    idx = TriggerIndex({"task-manager": _skill(["задача", "напомни"], 2)})
+    assert idx.best("создай задачу") == "task-manager"
+    assert idx.best("НАПОМНИ завтра") == "task-manager"
+    assert idx.best("погода") is None
+
+
+@pytest.mark.unit
+def test_best_priority_wins():
+    idx = TriggerIndex({
+        "chatbot": _skill(["сегодня"], 99),
+        "task-manager": _skill(["сегодня", "задача"], 2),
+    })
+    assert idx.best("что на сегодня") == "task-manager"
+
+
+@pytest.mark.unit
+def test_tie_goes_to_registry_order():
+    idx = TriggerIndex({"a": _skill(["план"], 5), "b": _skill(["план"], 5)})
+    assert idx.best("мой план") == "a"
+
+
+@pytest.mark.unit
+def test_overlapping_roots_all_found():
+    # "abcd" fails over into "bcde" — the lower-priority path must not hide it
+    idx = TriggerIndex({"low": _skill(["abcx"], 9), "high": _skill(["bcde"], 1)})
+    assert idx.best("abcde") == "high"
+
+
+@pytest.mark.unit
+def test_short_and_empty_triggers():
+    assert TriggerIndex({"s": _skill(["да"], 5)}).best("когда") == "s"
+    assert TriggerIndex({"s": _skill([""], 5)}).best("что угодно") == "s"
+    assert TriggerIndex({"s": _skill([], 5)}).best("что угодно") is None
@@ -1,9 +1,11 @@
 """Tests for src/input/video_stt.py — atom 1.3 (unit, mocked)."""
+import asyncio
 import pytest
 from unittest.mock import AsyncMock
 
 from src.input.stt import STTError
-from src.input.video_stt import transcribe_video
+from src.input import video_stt
+from src.input.video_stt import FFmpegPool, transcribe_video
 
 
 @pytest.mark.unit
@@ -23,3 +25,105 @@ async def test_transcribe_video_download_failure(monkeypatch):
     bot.get_file = AsyncMock(side_effect=Exception("network error"))
     with pytest.raises(STTError, match="Video transcription failed"):
         await transcribe_video(bot, "file123")
+
+
+class _FakeProc:
+    def __init__(self, delay=0.0, returncode=0):
+        self._delay = delay
+        self.returncode = None
+        self._final = returncode
+        self.killed = False
+
+    async def communicate(self, input=None):
+        await asyncio.sleep(self._delay)
+        self.returncode = self._final
+        return b"", b"err"
+
+    def kill(self):
+        self.killed = True
+
+    async def wait(self):
+        return self.returncode
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ffmpeg_pool_bounds_concurrency(monkeypatch):
+    pool = FFmpegPool(max_workers=2)
+    peak = 0
+
+    async def fake_exec(*args, **kwargs):
+        nonlocal peak
+        peak = max(peak, pool.running)
+        return _FakeProc(delay=0.01)
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    results = await asyncio.gather(*(pool.run(["-i", "x"]) for _ in range(5)))
+
+    assert all(code == 0 for code, _, _ in results)
+    assert peak == 2
+    stats = pool.stats()
+    assert stats["jobs"] == 5
+    assert stats["queued"] == 0 and stats["running"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ffmpeg_pool_kills_on_timeout(monkeypatch):
+    pool = FFmpegPool(max_workers=1)
+    proc = _FakeProc(delay=1.0)
+
+    async def fake_exec(*args, **kwargs):
+        return proc
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    with pytest.raises(TimeoutError):
+        await pool.run(["-i", "x"], timeout=0.01)
+    assert proc.killed
+    assert pool.stats()["failures"] == 1
+    assert pool.stats()["running"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ffmpeg_pool_pipes_async_stream():
+    pool = FFmpegPool(max_workers=1)
+    pool.BINARY = "cat"  # stdin -> stdout, stands in for ffmpeg
+
+    async def source():
+        for i in range(50):
+            yield bytes([i % 256]) * 4096
+
+    code, out, _ = await pool.run([], input=source())
+    assert code == 0
+    assert len(out) == 50 * 4096
+    assert out[:4096] == b"\x00" * 4096
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_transcribe_video_falls_back_to_seekable_file(monkeypatch):
+    monkeypatch.setenv("DEEPGRAM_API_KEY", "test-key")
+    calls = []
+
+    async def fake_stream(bot, file_id):
+        async def chunks():
+            yield b"mdat..."
+            yield b"moov"
+        return chunks()
+
+    async def fake_run(args, timeout=None, input=None):
+        calls.append((args[1], input))
+        if args[1] == "pipe:0":
+            return 1, b"", b"moov atom not found"
+        with open(args[1], "rb") as f:
+            assert f.read() == b"mdat...moov"
+        return 0, b"ogg", b""
+
+    monkeypatch.setattr(video_stt, "_open_telegram_stream", fake_stream)
+    monkeypatch.setattr(video_stt._pool, "run", fake_run)
+    monkeypatch.setattr(video_stt, "_deepgram_transcribe", AsyncMock(return_value="привет"))
+
+    assert await transcribe_video(AsyncMock(), "file123") == "привет"
+    assert calls[0] == ("pipe:0", b"mdat...moov")
+    assert calls[1][0].endswith(".mp4") and calls[1][1] is None